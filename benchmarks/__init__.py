@@ -0,0 +1 @@
+"""Offline benchmarks for harlequin-databricks, run against a fake Databricks connector."""
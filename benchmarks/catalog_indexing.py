@@ -0,0 +1,325 @@
+"""Benchmark Data Catalog indexing against synthetic metastores, without a Databricks workspace.
+
+Drives `HarlequinDatabricksConnection.get_catalog()` and `._get_unity_catalogs()` against the fake
+connector in `tests.fake_databricks`, at scales from 1k to 1M columns, and reports the wall
+time, peak memory and number of calls to the workspace of each operation. Run with:
+
+    python -m benchmarks.catalog_indexing --shapes wide-100k deep-1m --legacy --json out.jsonl
+
+With `--max-seconds` or `--max-peak-mb`, it exits with an error if any operation is slower or
+uses more memory than that, so CI catches regressions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pyarrow as pa
+
+from tests.fake_databricks import (
+    SHAPES,
+    FakeMetastore,
+    MetastoreShape,
+    connect_adapter,
+    patch_connect,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from harlequin.catalog import Catalog, CatalogItem
+
+    from harlequin_databricks.adapter import HarlequinDatabricksConnection
+
+DEFAULT_SHAPES = (
+    "wide-1k",
+    "deep-1k",
+    "wide-10k",
+    "deep-10k",
+    "wide-100k",
+    "deep-100k",
+)
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """The measurements of one indexing operation on one synthetic metastore.
+
+    `seconds` is the fastest of the timed runs and `median_seconds` their median. The peak memory
+    is measured in a separate run, as tracing Python allocations slows them down: `peak_python_mb`
+    covers Python objects (e.g. CatalogItems) and `peak_arrow_mb` Arrow buffers.
+    """
+
+    shape: str
+    metastore: str
+    operation: str
+    tables: int
+    columns: int
+    seconds: float
+    median_seconds: float
+    peak_python_mb: float
+    peak_arrow_mb: float
+    rpcs: int
+
+    @property
+    def peak_mb(self) -> float:
+        return self.peak_python_mb + self.peak_arrow_mb
+
+    def row(self) -> str:
+        return (
+            f"{self.shape:<10} {self.metastore:<7} {self.operation:<19} {self.tables:>8,} "
+            f"{self.columns:>10,} {self.seconds:>9.3f} {self.median_seconds:>9.3f} "
+            f"{self.peak_python_mb:>10.1f} {self.peak_arrow_mb:>9.1f} {self.rpcs:>7,}"
+        )
+
+
+HEADER = (
+    f"{'shape':<10} {'store':<7} {'operation':<19} {'tables':>8} {'columns':>10} "
+    f"{'best (s)':>9} {'median(s)':>9} {'python MB':>10} {'arrow MB':>9} {'rpcs':>7}"
+)
+
+
+def count_items(items: Sequence[CatalogItem]) -> tuple[int, int]:
+    """Count the tables and (eagerly loaded) columns in a tree of CatalogItems.
+
+    The columns of compact tables are counted without building their CatalogItems.
+    """
+
+    from harlequin_databricks.catalog import CompactTableCatalogItem
+
+    tables = columns = 0
+    for catalog_item in items:
+        for schema_item in catalog_item.children:
+            tables += len(schema_item.children)
+            columns += sum(
+                table_item.num_columns
+                if isinstance(table_item, CompactTableCatalogItem)
+                else len(table_item.children)
+                for table_item in schema_item.children
+            )
+    return tables, columns
+
+
+def _operations(
+    legacy: bool,
+) -> dict[
+    str, tuple[dict[str, Any], Callable[[HarlequinDatabricksConnection], Catalog]]
+]:
+    """Map each operation to benchmark to its connection options and the call to time.
+
+    The `refresh` operation indexes once before timing an incremental refresh of an unchanged
+    metastore.
+    """
+
+    def get_catalog(conn: HarlequinDatabricksConnection) -> Catalog:
+        return conn.get_catalog()
+
+    def get_unity_catalogs(conn: HarlequinDatabricksConnection) -> Catalog:
+        from harlequin.catalog import Catalog
+
+        result = conn._get_unity_catalogs([])  # noqa: SLF001
+        assert result is not None
+        return Catalog(items=result[0])
+
+    if legacy:
+        return {"get_catalog": ({}, get_catalog)}
+    return {
+        "get_catalog": ({}, get_catalog),
+        "_get_unity_catalogs": ({}, get_unity_catalogs),
+        "refresh": ({"incremental_catalog_refresh": True}, get_catalog),
+    }
+
+
+def _measure(
+    metastore: FakeMetastore,
+    options: dict[str, Any],
+    operation: Callable[[HarlequinDatabricksConnection], Catalog],
+    *,
+    refresh: bool,
+    trace: bool,
+) -> tuple[float, float, float, tuple[int, int], int]:
+    """Run `operation` on a fresh connection, returning its time, peak memory, counts & RPCs.
+
+    The catalog is released before returning, as Arrow arrays it holds (e.g. those of compact
+    catalogs) must be freed while the memory pool they were traced in still exists.
+    """
+
+    conn = connect_adapter(**options)
+    if refresh:
+        conn.get_catalog()
+    gc.collect()
+    arrow_pool = pa.proxy_memory_pool(pa.default_memory_pool())
+    default_pool = pa.default_memory_pool()
+    rpcs_before = metastore.rpc_counts.total()
+    if trace:
+        pa.set_memory_pool(arrow_pool)
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        catalog = operation(conn)
+        seconds = time.perf_counter() - start
+        peak_python = tracemalloc.get_traced_memory()[1] if trace else 0
+    finally:
+        if trace:
+            tracemalloc.stop()
+            pa.set_memory_pool(default_pool)
+    rpcs = metastore.rpc_counts.total() - rpcs_before
+    counts = count_items(catalog.items)
+    conn.close()
+    del catalog, conn
+    gc.collect()
+    return seconds, peak_python / MB, arrow_pool.max_memory() / MB, counts, rpcs
+
+
+def run_benchmark(
+    shape_name: str,
+    shape: MetastoreShape,
+    *,
+    legacy: bool = False,
+    repeat: int = 3,
+    **options: Any,
+) -> list[BenchmarkResult]:
+    """Benchmark indexing a metastore of `shape`, as Unity Catalog or as a legacy metastore.
+
+    `options` are passed on to the adapter, e.g. `lazy_column_loading=True`,
+    `compact_catalog=True` or `metadata_concurrency=4`. Each operation is checked to index every
+    table (and, unless columns are lazily loaded, every column) of the metastore.
+    """
+
+    metastore = (
+        FakeMetastore(legacy=replace(shape, catalog_prefix="legacy"))
+        if legacy
+        else FakeMetastore(unity=shape)
+    )
+    results = []
+    with patch_connect(metastore):
+        for name, (extra_options, operation) in _operations(legacy).items():
+            run_options = {**options, **extra_options}
+            refresh = name == "refresh"
+            timings = []
+            for _ in range(max(repeat, 1)):
+                seconds, _, _, _, rpcs = _measure(
+                    metastore, run_options, operation, refresh=refresh, trace=False
+                )
+                timings.append(seconds)
+            _, peak_python, peak_arrow, (tables, columns), _ = _measure(
+                metastore, run_options, operation, refresh=refresh, trace=True
+            )
+
+            expected_columns = (
+                0 if options.get("lazy_column_loading") else shape.total_cols
+            )
+            assert (tables, columns) == (shape.total_tables, expected_columns), (
+                f"{name} indexed {tables} tables & {columns} columns of {shape}"
+            )
+            results.append(
+                BenchmarkResult(
+                    shape=shape_name,
+                    metastore="legacy" if legacy else "unity",
+                    operation=name,
+                    tables=shape.total_tables,
+                    columns=shape.total_cols,
+                    seconds=min(timings),
+                    median_seconds=statistics.median(timings),
+                    peak_python_mb=peak_python,
+                    peak_arrow_mb=peak_arrow,
+                    rpcs=rpcs,
+                )
+            )
+    return results
+
+
+def regressions(
+    results: Sequence[BenchmarkResult],
+    max_seconds: float | None = None,
+    max_peak_mb: float | None = None,
+) -> list[str]:
+    """Describe each result slower than `max_seconds` or using more memory than `max_peak_mb`."""
+
+    found = []
+    for result in results:
+        name = f"{result.operation} of {result.shape} ({result.metastore})"
+        if max_seconds is not None and result.seconds > max_seconds:
+            found.append(f"{name} took {result.seconds:.3f}s (max {max_seconds:g}s)")
+        if max_peak_mb is not None and result.peak_mb > max_peak_mb:
+            found.append(
+                f"{name} peaked at {result.peak_mb:.1f} MB (max {max_peak_mb:g} MB)"
+            )
+    return found
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--shapes",
+        nargs="+",
+        choices=sorted(SHAPES),
+        default=DEFAULT_SHAPES,
+        help="Synthetic metastore shapes to index (default: up to 100k columns).",
+    )
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="Also index each shape as a legacy metastore, through catalog-wide metadata calls.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3, help="Timed runs per operation."
+    )
+    parser.add_argument("--lazy-column-loading", action="store_true")
+    parser.add_argument("--compact-catalog", action="store_true")
+    parser.add_argument("--metadata-concurrency", type=int, default=1)
+    parser.add_argument(
+        "--json", type=Path, help="Also write the results to this file as JSON lines."
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        help="Fail if the best timed run of any operation takes longer than this.",
+    )
+    parser.add_argument(
+        "--max-peak-mb",
+        type=float,
+        help="Fail if the peak memory (Python objects & Arrow buffers) of any operation exceeds "
+        "this.",
+    )
+    args = parser.parse_args(argv)
+
+    results: list[BenchmarkResult] = []
+    sys.stdout.write(HEADER + "\n")
+    for shape_name in args.shapes:
+        for legacy in (False, True) if args.legacy else (False,):
+            for result in run_benchmark(
+                shape_name,
+                SHAPES[shape_name],
+                legacy=legacy,
+                repeat=args.repeat,
+                lazy_column_loading=args.lazy_column_loading,
+                compact_catalog=args.compact_catalog,
+                metadata_concurrency=args.metadata_concurrency,
+            ):
+                sys.stdout.write(result.row() + "\n")
+                sys.stdout.flush()
+                results.append(result)
+
+    if args.json is not None:
+        with args.json.open("w", encoding="utf-8") as f:
+            f.writelines(json.dumps(asdict(result)) + "\n" for result in results)
+
+    found = regressions(results, args.max_seconds, args.max_peak_mb)
+    if found:
+        sys.stderr.write("".join(f"Regression: {regression}\n" for regression in found))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""Benchmark the latency of the adapter's operations against a simulated network & warehouse.
+
+Drives `HarlequinDatabricksConnection` against the fake connector in `tests.fake_databricks`,
+with simulated round-trip times, warehouse execution times, result delivery rates, failures and
+cancellations, and reports the p50 & p95 latency of connecting, `execute()`, `fetchall()`,
+`_fetch()` and `cancel()`. Run with:
+
+    python -m benchmarks.latency --rtt-ms 40 --execution-ms 250 --rows 500000 --json out.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from harlequin.exception import HarlequinConnectionError, HarlequinQueryError
+
+from harlequin_databricks.adapter import _fetch
+from tests.fake_databricks import (
+    FakeMetastore,
+    NetworkProfile,
+    connect_adapter,
+    patch_connect,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+
+    from harlequin_databricks.adapter import HarlequinDatabricksConnection
+
+OPERATIONS = ("connect", "execute", "fetchall", "_fetch", "cancel")
+
+# how long the queries which are cancelled would run for on the warehouse, if not cancelled:
+CANCELLED_QUERY_SECONDS = 60.0
+
+
+@dataclass(frozen=True)
+class LatencyResult:
+    """The latency distribution of one adapter operation, in milliseconds.
+
+    `failures` counts the runs which raised an error (or, for `cancel`, left the query running),
+    which are left out of the percentiles.
+    """
+
+    operation: str
+    samples: int
+    failures: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+    def row(self) -> str:
+        return (
+            f"{self.operation:<10} {self.samples:>7} {self.failures:>8} {self.p50_ms:>10.1f} "
+            f"{self.p95_ms:>10.1f} {self.max_ms:>10.1f}"
+        )
+
+
+HEADER = (
+    f"{'operation':<10} {'samples':>7} {'failures':>8} {'p50 (ms)':>10} {'p95 (ms)':>10} "
+    f"{'max (ms)':>10}"
+)
+
+
+def percentile(samples: Sequence[float], fraction: float) -> float:
+    """Return the `fraction` percentile of `samples`, interpolating between the nearest two."""
+
+    if not samples:
+        return math.nan
+    ordered = sorted(samples)
+    position = (len(ordered) - 1) * fraction
+    lower, upper = math.floor(position), math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+@dataclass(frozen=True)
+class _Run:
+    metastore: FakeMetastore
+    conn: HarlequinDatabricksConnection
+    query: str
+    options: dict[str, Any]
+
+
+def _time_connect(run: _Run) -> float:
+    start = time.perf_counter()
+    new_conn = connect_adapter(**run.options)
+    seconds = time.perf_counter() - start
+    new_conn.close()
+    return seconds
+
+
+def _time_execute(run: _Run) -> float:
+    start = time.perf_counter()
+    cursor = run.conn.execute(run.query)
+    seconds = time.perf_counter() - start
+    assert cursor is not None
+    cursor.fetchall()
+    return seconds
+
+
+def _time_fetchall(run: _Run) -> float:
+    cursor = run.conn.execute(run.query)
+    assert cursor is not None
+    start = time.perf_counter()
+    cursor.fetchall()
+    return time.perf_counter() - start
+
+
+def _time_fetch(run: _Run) -> float:
+    from databricks import sql as databricks_sql
+
+    with run.conn.conn.cursor() as cursor:
+        try:
+            cursor.execute(run.query)
+        except databricks_sql.DatabaseError as e:
+            raise HarlequinQueryError(msg=repr(e)) from e
+        start = time.perf_counter()
+        _fetch(cursor)
+        return time.perf_counter() - start
+
+
+def _time_cancel(run: _Run) -> float:
+    """Time from calling `cancel()` on a running query until its `execute()` returns."""
+
+    def submitted() -> int:
+        return (
+            run.metastore.rpc_counts["execute"]
+            + run.metastore.rpc_counts["execute_async"]
+        )
+
+    executes = submitted()
+    outcome: list[object] = []
+
+    def execute() -> None:
+        try:
+            outcome.append(
+                run.conn.execute(
+                    f"/* execution_time={CANCELLED_QUERY_SECONDS} */ {run.query}"
+                )
+            )
+        except HarlequinQueryError as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=execute, daemon=True)
+    thread.start()
+    while submitted() == executes and thread.is_alive():
+        time.sleep(0.0005)
+    time.sleep(0.001)  # let the cursor be assigned its command
+
+    start = time.perf_counter()
+    run.conn.cancel()
+    thread.join(CANCELLED_QUERY_SECONDS)
+    seconds = time.perf_counter() - start
+    if thread.is_alive() or outcome != [None]:
+        msg = f"query was not cancelled: {outcome}"
+        raise HarlequinQueryError(msg=msg)
+    return seconds
+
+
+_TIMERS: dict[str, Callable[[_Run], float]] = {
+    "connect": _time_connect,
+    "execute": _time_execute,
+    "fetchall": _time_fetchall,
+    "_fetch": _time_fetch,
+    "cancel": _time_cancel,
+}
+
+
+def run_latency_benchmark(
+    network: NetworkProfile,
+    *,
+    rows: int = 100_000,
+    iterations: int = 20,
+    operations: Sequence[str] = OPERATIONS,
+    **options: Any,
+) -> list[LatencyResult]:
+    """Measure the latency of adapter operations over a simulated `network`.
+
+    Queries select `rows` rows. Each operation is run `iterations` times on one connection, and
+    `options` are passed on to the adapter (e.g. `warm_standby=True`).
+    """
+
+    metastore = FakeMetastore(network=network)
+    query = f"SELECT * FROM range({int(rows)})"  # noqa: S608 - `rows` is an int
+    results = []
+    with patch_connect(metastore):
+        conn = connect_adapter(**options)
+        for operation in operations:
+            timer = _TIMERS[operation]
+            samples: list[float] = []
+            failures = 0
+            run = _Run(metastore, conn, query, options)
+            for _ in range(iterations):
+                try:
+                    samples.append(timer(run))
+                except (HarlequinQueryError, HarlequinConnectionError):  # noqa: PERF203
+                    failures += 1
+            results.append(
+                LatencyResult(
+                    operation=operation,
+                    samples=len(samples),
+                    failures=failures,
+                    p50_ms=percentile(samples, 0.5) * 1000,
+                    p95_ms=percentile(samples, 0.95) * 1000,
+                    max_ms=max(samples, default=math.nan) * 1000,
+                )
+            )
+        conn.close()
+    return results
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rtt-ms", type=float, default=30.0, help="Network round trip."
+    )
+    parser.add_argument(
+        "--connect-round-trips",
+        type=int,
+        default=3,
+        help="Round trips to open a session.",
+    )
+    parser.add_argument(
+        "--execution-ms", type=float, default=100.0, help="Warehouse time per query."
+    )
+    parser.add_argument(
+        "--rows", type=int, default=100_000, help="Rows per query result."
+    )
+    parser.add_argument(
+        "--batch-rows", type=int, default=100_000, help="Rows per result round trip."
+    )
+    parser.add_argument(
+        "--rows-per-second",
+        type=float,
+        default=5_000_000.0,
+        help="Result delivery rate (0 for instant).",
+    )
+    parser.add_argument(
+        "--failure-rate", type=float, default=0.0, help="Fraction of queries that fail."
+    )
+    parser.add_argument(
+        "--failure-message",
+        default="Simulated failure",
+        help='Error of failed queries (e.g. "Invalid SessionHandle" to simulate expiry).',
+    )
+    parser.add_argument(
+        "--cancel-ms",
+        type=float,
+        default=20.0,
+        help="Warehouse time to cancel a query.",
+    )
+    parser.add_argument(
+        "--cancel-fails",
+        action="store_true",
+        help="Make the cancel RPC fail, so the adapter falls back to reconnecting.",
+    )
+    parser.add_argument("--warm-standby", action="store_true")
+    parser.add_argument(
+        "--async-execution",
+        action="store_true",
+        help="Submit queries asynchronously and poll their state.",
+    )
+    parser.add_argument(
+        "--iterations", type=int, default=20, help="Runs per operation."
+    )
+    parser.add_argument(
+        "--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS)
+    )
+    parser.add_argument(
+        "--json", type=Path, help="Also write the results to this file as JSON lines."
+    )
+    args = parser.parse_args(argv)
+
+    network = NetworkProfile(
+        rtt=args.rtt_ms / 1000,
+        connect_round_trips=args.connect_round_trips,
+        execution_time=args.execution_ms / 1000,
+        batch_rows=args.batch_rows,
+        rows_per_second=args.rows_per_second or None,
+        failure_rate=args.failure_rate,
+        failure_message=args.failure_message,
+        cancel_time=args.cancel_ms / 1000,
+        cancel_fails=args.cancel_fails,
+    )
+    results = run_latency_benchmark(
+        network,
+        rows=args.rows,
+        iterations=args.iterations,
+        operations=args.operations,
+        warm_standby=args.warm_standby,
+        async_execution=args.async_execution,
+    )
+    sys.stdout.write(HEADER + "\n")
+    sys.stdout.writelines(result.row() + "\n" for result in results)
+    if args.json is not None:
+        with args.json.open("w", encoding="utf-8") as f:
+            f.writelines(json.dumps(asdict(result)) + "\n" for result in results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import csv
+import json
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).parents[1] / "src" / "harlequin_databricks"
+
+HEADER = '''"""Databricks SQL keywords & functions for autocompletion, precompiled from CSV.
+
+Generated by `scripts/compile_completions.py` from `keywords.csv` and `functions.csv`. Do not edit
+by hand: rerun the scraping scripts (or `compile_completions.py`) to update it.
+"""
+
+'''
+
+
+def _tuple(name: str, values: list[str]) -> str:
+    lines = "".join(f"    {json.dumps(value)},\n" for value in values)
+    return f"{name}: tuple[str, ...] = (\n{lines})\n"
+
+
+def compile_completions(package_dir: Path = PACKAGE_DIR) -> str:
+    """Render the keywords and function names in the package's CSVs as a Python module."""
+
+    with (package_dir / "keywords.csv").open("r", encoding="utf-8") as file:
+        keywords = [row[0].lower() for row in csv.reader(file, dialect="unix")]
+
+    with (package_dir / "functions.csv").open("r", encoding="utf-8") as file:
+        reader = csv.reader(file, dialect="unix")
+        next(reader)  # Skip header row
+        functions = [name.lower() for name, _, _ in reader]
+
+    return HEADER + _tuple("KEYWORDS", keywords) + "\n" + _tuple("FUNCTIONS", functions)
+
+
+def main() -> None:
+    # Overwrite file in ../src/harlequin_databricks/completion_data.py
+    # creating it if it doesn't exist
+    path = PACKAGE_DIR / "completion_data.py"
+    with path.open("w+", encoding="utf-8") as file:
+        file.write(compile_completions())
+
+
+if __name__ == "__main__":
+    main()
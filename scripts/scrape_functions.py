@@ -1,6 +1,7 @@
 from pathlib import Path
 
 import pandas as pd
+from compile_completions import main as compile_completions
 
 # Scrape Databricks's SQL functions page ver Dec 9, 2025 for function names. This page is archived
 # at:
@@ -37,6 +38,9 @@ def main() -> None:
     path = Path(__file__).parents[1] / "src" / "harlequin_databricks" / "functions.csv"
     functions.to_csv(path, encoding="utf-8")
 
+    # Regenerate the precompiled completions module from the updated CSV
+    compile_completions()
+
 
 if __name__ == "__main__":
     main()
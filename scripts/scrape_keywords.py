@@ -2,6 +2,7 @@ from pathlib import Path
 
 import requests
 from bs4 import BeautifulSoup
+from compile_completions import main as compile_completions
 
 # Databricks's SQL keywords page was last updated October 10, 2023. It is archived at:
 # https://web.archive.org/web/20250705123402/https://docs.databricks.com/aws/en/sql/language-manual/sql-ref-reserved-words
@@ -55,6 +56,9 @@ def main() -> None:
     with path.open("w+", encoding="utf-8") as file:
         file.write("\n".join(keywords))
 
+    # Regenerate the precompiled completions module from the updated CSV
+    compile_completions()
+
 
 if __name__ == "__main__":
     main()
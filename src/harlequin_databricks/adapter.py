@@ -1,13 +1,18 @@
 from __future__ import annotations
 
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from contextlib import suppress
 from pathlib import Path
 from typing import (
     TYPE_CHECKING,
     Any,
+    Literal,
 )
 
-import pyarrow.compute as pc
-from databricks import sql as databricks_sql
+import harlequin.catalog
 from harlequin import (
     HarlequinAdapter,
     HarlequinConnection,
@@ -25,23 +30,70 @@ from harlequin.exception import (
 
 from harlequin_databricks.cli_options import DATABRICKS_ADAPTER_OPTIONS
 from harlequin_databricks.completions import load_completions
+from harlequin_databricks.cursors import CursorRegistry
+from harlequin_databricks.filters import CatalogFilter
+from harlequin_databricks.init_script import InitScriptPlan, plan_init_script
+from harlequin_databricks.metrics import MetricsRecorder, phase
+from harlequin_databricks.polling import PendingQuery, QueryProgress, wait_for_query
+from harlequin_databricks.pool import ConnectionPool
+from harlequin_databricks.profiling import PROFILE_DIR_ENV_VAR, Profiler, profile
+from harlequin_databricks.sql import (
+    is_cacheable,
+    is_read_only,
+    normalize_sql,
+    statement_type,
+    supports_limit_pushdown,
+)
 
 if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from datetime import datetime
+
+    import pyarrow as pa
+    from databricks import sql as databricks_sql
+    from databricks.sql.client import Connection as DatabricksConnection
     from databricks.sql.client import Cursor as DatabricksCursor
     from harlequin.autocomplete.completion import HarlequinCompletion
+    from harlequin.catalog import CatalogSearchResult
     from textual_fastdatatable.backend import AutoBackendType
 
+    from harlequin_databricks.catalog_search import CatalogIndex
+    from harlequin_databricks.metrics import OperationMetrics
+    from harlequin_databricks.result_cache import CachedResult, ResultCache
+    from harlequin_databricks.token_cache import TokenCache
+
+# Above this many created or altered tables, incremental catalog refreshes fall back to fetching
+# the metadata of all columns, rather than listing each table in the columns query:
+MAX_INCREMENTAL_TABLES = 1000
+
+# The heavy `pyarrow` and `databricks.sql` modules (and the modules of this package using them)
+# are imported only when connecting, executing queries or indexing the Data Catalog, as Harlequin
+# imports this module to discover the adapter even when another adapter is selected.
+
+# Query results are streamed from Databricks in Arrow batches of (at most) this many rows:
+FETCH_BATCH_ROWS = 100_000
+
+logger = logging.getLogger(__name__)
+
+
+def _is_cancelled(e: databricks_sql.DatabaseError) -> bool:
+    return (
+        e.message.startswith("Invalid OperationHandle:")
+        and e.__class__.__name__ == "DatabaseError"
+    )  # maybe user pressed `Cancel Query` button here
+
+
+def _is_session_lost(e: databricks_sql.Error) -> bool:
+    return "Invalid SessionHandle" in str(e)
+
+
+def _fetch(cursor: DatabricksCursor) -> AutoBackendType | None:
+    from databricks import sql as databricks_sql
 
-def _fetch(
-    cursor: DatabricksCursor, limit: int | None = None
-) -> AutoBackendType | None:
     try:
-        rows = cursor.fetchmany_arrow(limit) if limit else cursor.fetchall_arrow()
+        rows = cursor.fetchall_arrow()
     except databricks_sql.DatabaseError as e:
-        if (
-            e.message.startswith("Invalid OperationHandle:")
-            and e.__class__.__name__ == "DatabaseError"
-        ):  # maybe user pressed `Cancel Query` button here
+        if _is_cancelled(e):
             return None
         raise HarlequinQueryError(
             msg=repr(e),
@@ -50,12 +102,239 @@ def _fetch(
     return rows
 
 
+def _stream(
+    cursor: DatabricksCursor,
+    limit: int | None,
+    max_bytes: int | None,
+    metrics: OperationMetrics | None = None,
+    spill_bytes: int | None = None,
+) -> tuple[pa.Table, bool] | None:
+    """Fetch a result batch-wise, stopping at `limit` rows or `max_bytes` of Arrow data.
+
+    The fetched record batches are assembled into a chunked table without copying them, or, past
+    `spill_bytes` (if given), spilled to a temporary Arrow IPC file which the table is
+    memory-mapped from. Returns the table and whether it was truncated by `max_bytes`, or None if
+    the query was cancelled. The time spent fetching and assembling the batches, and the number of
+    fetch calls, batches and bytes, are recorded to `metrics` if given.
+    """
+
+    from databricks import sql as databricks_sql
+
+    from harlequin_databricks.spill import ResultBuffer
+
+    buffer = ResultBuffer(spill_bytes)
+    schema: pa.Schema | None = None
+    truncated = False
+    try:
+        # (a limit of 0 still fetches once, for the schema of the result)
+        while schema is None or limit is None or buffer.num_rows < limit:
+            size = FETCH_BATCH_ROWS if limit is None else limit - buffer.num_rows
+            with phase(metrics, "fetch"):
+                table = cursor.fetchmany_arrow(min(size, FETCH_BATCH_ROWS))
+            if metrics is not None:
+                metrics.count("rpcs")
+            schema = table.schema
+            if table.num_rows == 0:
+                break
+            for batch in table.to_batches():
+                if (
+                    max_bytes is not None
+                    and buffer.num_bytes + batch.nbytes > max_bytes
+                ):
+                    # keep as many rows of the batch as fit within the byte budget:
+                    row_bytes = batch.nbytes / batch.num_rows
+                    buffer.append(
+                        batch.slice(0, int((max_bytes - buffer.num_bytes) / row_bytes))
+                    )
+                    truncated = True
+                    break
+                buffer.append(batch)
+            if truncated:
+                break
+        with phase(metrics, "arrow"):
+            result = buffer.to_table(schema)
+    except databricks_sql.DatabaseError as e:
+        if _is_cancelled(e):
+            return None
+        raise HarlequinQueryError(
+            msg=repr(e),
+            title="Harlequin encountered an error while querying Databricks.",
+        ) from e
+    except OSError as e:
+        raise HarlequinQueryError(
+            msg=repr(e),
+            title="Harlequin could not spill the query result to disk.",
+        ) from e
+    finally:
+        buffer.close()  # deletes the spill file if the query was cancelled
+    if metrics is not None:
+        metrics.count("batches", buffer.num_batches)
+        metrics.count("bytes", result.nbytes)
+        if buffer.spill is not None:
+            metrics.attributes["spilled"] = True
+            metrics.count("spilled_bytes", buffer.spill.num_bytes)
+    return result, truncated
+
+
+def _table_keys(tables: pa.Table) -> list[tuple[str, str, str]]:
+    return list(
+        zip(
+            tables["table_catalog"].to_pylist(),
+            tables["table_schema"].to_pylist(),
+            tables["table_name"].to_pylist(),
+            strict=True,
+        )
+    )
+
+
+def _sql_tuples(tables: pa.Table) -> str:
+    """Format the (catalog, schema, table) keys of `tables` as a list of SQL tuple literals."""
+
+    from harlequin_databricks.filters import sql_string
+
+    return ", ".join(
+        f"({sql_string(catalog)}, {sql_string(schema)}, {sql_string(table)})"
+        for catalog, schema, table in zip(
+            tables["table_catalog"].to_pylist(),
+            tables["table_schema"].to_pylist(),
+            tables["table_name"].to_pylist(),
+            strict=True,
+        )
+    )
+
+
+def _fetch_schemas(cursor: DatabricksCursor, catalog: str) -> list[str] | None:
+    cursor.schemas(catalog_name=catalog)
+    schemas = _fetch(cursor)
+    if schemas is None:  # maybe user pressed `Cancel Query` button
+        return None
+    schemas = schemas.sort_by([("TABLE_SCHEM", "ascending")])
+    return [schema.as_py() for schema in schemas["TABLE_SCHEM"]]
+
+
+def _fetch_scope_tables(
+    cursor: DatabricksCursor, scope: tuple[str, str | None]
+) -> pa.Table | None:
+    """Fetch the tables of a whole catalog, or of one schema if the scope names one."""
+
+    catalog, schema = scope
+    cursor.tables(catalog_name=catalog, schema_name=schema)
+    tables = _fetch(cursor)
+    if tables is None:  # maybe user pressed `Cancel Query` button
+        return None
+    return tables.select(["TABLE_SCHEM", "TABLE_NAME", "TABLE_TYPE"]).rename_columns(
+        ["table_schema", "table_name", "table_type"]
+    )
+
+
+def _fetch_scope_columns(
+    cursor: DatabricksCursor, scope: tuple[str, str | None]
+) -> pa.Table | None:
+    """Fetch the columns of a whole catalog, or of one schema if the scope names one."""
+
+    catalog, schema = scope
+    cursor.columns(catalog_name=catalog, schema_name=schema)
+    columns = _fetch(cursor)
+    if columns is None:  # maybe user pressed `Cancel Query` button
+        return None
+    return columns.select(
+        ["TABLE_SCHEM", "TABLE_NAME", "COLUMN_NAME", "ORDINAL_POSITION", "TYPE_NAME"]
+    ).rename_columns(
+        ["table_schema", "table_name", "column_name", "ordinal_position", "data_type"]
+    )
+
+
+def _legacy_scopes(
+    catalogs: list[str],
+    catalog_schemas: list[list[str]],
+    catalog_filter: CatalogFilter | None = None,
+) -> list[tuple[str, str | None]]:
+    """Choose the scopes to list the tables and columns of legacy catalogs in.
+
+    Each catalog is listed whole (a schema of None), unless `catalog_filter` excludes some of its
+    schemas: then each allowed schema is listed on its own, and the excluded schemas are dropped
+    from `catalog_schemas` in place.
+    """
+
+    scopes: list[tuple[str, str | None]] = []
+    for i, (catalog, schemas) in enumerate(zip(catalogs, catalog_schemas, strict=True)):
+        allowed = [
+            schema
+            for schema in schemas
+            if catalog_filter is None or catalog_filter.schema_allowed(catalog, schema)
+        ]
+        if len(allowed) == len(schemas):
+            scopes.append((catalog, None))
+        else:
+            catalog_schemas[i] = allowed
+            scopes.extend((catalog, schema) for schema in allowed)
+    return scopes
+
+
+def _concat_tables(tables: list[pa.Table]) -> pa.Table | None:
+    import pyarrow as pa
+
+    return pa.concat_tables(tables) if tables else None
+
+
+def _fetch_columns(
+    cursor: DatabricksCursor, table_key: tuple[str, str, str]
+) -> list[tuple[str, str]] | None:
+    catalog, schema, table = table_key
+    cursor.columns(catalog_name=catalog, schema_name=schema, table_name=table)
+    columns = _fetch(cursor)
+    if columns is None:  # maybe user pressed `Cancel Query` button
+        return None
+    columns = columns.sort_by([("ORDINAL_POSITION", "ascending")])
+    return list(
+        zip(
+            columns["COLUMN_NAME"].to_pylist(),
+            columns["TYPE_NAME"].to_pylist(),
+            strict=True,
+        )
+    )
+
+
 class HarlequinDatabricksCursor(HarlequinCursor):
-    def __init__(self, cursor: DatabricksCursor, *args: Any, **kwargs: Any) -> None:
+    def __init__(
+        self,
+        cursor: DatabricksCursor,
+        *args: Any,
+        max_result_bytes: int | None = None,
+        spill_bytes: int | None = None,
+        result_cache: ResultCache | None = None,
+        cache_key: str | None = None,
+        cursors: CursorRegistry | None = None,
+        metrics: OperationMetrics | None = None,
+        profiler: Profiler | None = None,
+        pending: PendingQuery | None = None,
+        **kwargs: Any,
+    ) -> None:
         self.cur = cursor
+        self.cursors = cursors if cursors is not None else CursorRegistry()
         self._limit: int | None = None
+        self.max_result_bytes = max_result_bytes
+        self.spill_bytes = spill_bytes
+        self.result_cache = result_cache
+        self.cache_key = cache_key
+        # a result fetched after the cache was cleared (by a later write) is not saved to it:
+        self.cache_generation = (
+            result_cache.generation if result_cache is not None else None
+        )
+        # the metrics of the query, finished once its result is fetched:
+        self.metrics = metrics
+        self.profiler = profiler
+        # the query, if it was only submitted to run concurrently with others, still to wait for:
+        self.pending = pending
+        # set by `fetchall()` if the result was truncated to fit within `max_result_bytes`:
+        self.notice: str | None = None
 
     def columns(self) -> list[tuple[str, str]]:
+        if self.pending is not None:
+            with suppress(HarlequinQueryError):  # raised by `fetchall()` instead
+                self.pending.wait()
+            if self.cur.description is None:
+                return []
         assert self.cur.description is not None
         return [
             (col_metadata[0], self._get_short_col_type(col_metadata[1].upper()))
@@ -67,7 +346,60 @@ class HarlequinDatabricksCursor(HarlequinCursor):
         return self
 
     def fetchall(self) -> AutoBackendType | None:
-        return _fetch(self.cur, self._limit)
+        with profile(self.profiler, "fetchall"):
+            return self._fetchall()
+
+    def _fetchall(self) -> AutoBackendType | None:
+        try:
+            fetched = None
+            if self.pending is not None:
+                with phase(self.metrics, "wait"):
+                    finished = self.pending.wait()
+            if self.pending is None or finished:
+                with self.cursors.track(self.cur):
+                    fetched = _stream(
+                        self.cur,
+                        self._limit,
+                        self.max_result_bytes,
+                        self.metrics,
+                        self.spill_bytes,
+                    )
+        except HarlequinQueryError:
+            if self.cursors.cancelled(self.cur):  # user pressed `Cancel Query` button
+                self._finish_metrics("cancelled")
+                return None
+            self._finish_metrics("error")
+            raise
+        if fetched is None or self.cursors.cancelled(self.cur):
+            self._finish_metrics("cancelled")
+            return None  # maybe user pressed `Cancel Query` button
+        rows, truncated = fetched
+        if self.metrics is not None:
+            self.metrics.count("rows", rows.num_rows)
+            self.metrics.attributes["truncated"] = truncated
+        if truncated:
+            assert self.max_result_bytes is not None
+            self.notice = (
+                f"Results truncated at {self.max_result_bytes / 1024 / 1024:g} MB "
+                f"({rows.num_rows:,} rows). Add a LIMIT or raise --max-result-mb to "
+                "fetch more."
+            )
+            logger.warning(self.notice)
+        elif self.result_cache is not None and self.cache_key is not None:
+            with phase(self.metrics, "cache_save"):
+                self.result_cache.save(
+                    self.cache_key,
+                    rows,
+                    self.columns(),
+                    complete=self._limit is None or rows.num_rows < self._limit,
+                    generation=self.cache_generation,
+                )
+        self._finish_metrics("ok")
+        return rows
+
+    def _finish_metrics(self, status: str) -> None:
+        if self.metrics is not None:
+            self.metrics.finish(status)
 
     @staticmethod
     def _get_short_col_type(info_schema_type: str) -> str:
@@ -105,6 +437,149 @@ class HarlequinDatabricksCursor(HarlequinCursor):
         return mapping.get(info_schema_type, "?")
 
 
+class HarlequinDatabricksCachedCursor(HarlequinCursor):
+    """Serves a query result from the result cache.
+
+    If the cached result was cut short by a lower row limit than the one now set, the query is
+    re-run on Databricks by calling `rerun`.
+    """
+
+    def __init__(
+        self,
+        result: CachedResult,
+        rerun: Callable[[], HarlequinDatabricksCursor | None],
+        *args: Any,
+        metrics: OperationMetrics | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self.result = result
+        self.rerun = rerun
+        self._limit: int | None = None
+        self.metrics = metrics
+
+    def columns(self) -> list[tuple[str, str]]:
+        return self.result.columns
+
+    def set_limit(self, limit: int) -> HarlequinDatabricksCachedCursor:
+        self._limit = limit
+        return self
+
+    def fetchall(self) -> AutoBackendType | None:
+        table = self.result.table
+        if self._limit is None:
+            if self.result.complete:
+                return self._served(table)
+        elif self.result.complete or self._limit <= table.num_rows:
+            return self._served(table.slice(0, self._limit))
+
+        if self.metrics is not None:
+            self.metrics.attributes["cache"] = "rerun"
+        cursor = self.rerun()
+        if cursor is None:  # maybe user pressed `Cancel Query` button
+            if self.metrics is not None:
+                self.metrics.finish("cancelled")
+            return None
+        if self._limit is not None:
+            cursor.set_limit(self._limit)
+        return cursor.fetchall()
+
+    def _served(self, table: pa.Table) -> pa.Table:
+        if self.metrics is not None:
+            self.metrics.count("rows", table.num_rows)
+            self.metrics.finish()
+        return table
+
+
+class HarlequinDatabricksDeferredCursor(HarlequinCursor):
+    """Runs a query once its row limit is known, pushing the limit down to Databricks.
+
+    Harlequin sets the row limit of a cursor after `execute()` has returned it, so to pass the
+    limit to the warehouse, the query is run by calling `run` with the limit (or None) when the
+    limit is set. A query without a limit is run when the next statement is executed, or when
+    its result (or its columns) is first asked for, whichever comes first. Errors of the query
+    are raised when its result is fetched, as Harlequin does not expect `set_limit()` to raise,
+    and by the connection when the next statement is executed, so a script stops at the query.
+    """
+
+    def __init__(
+        self,
+        run: Callable[
+            [int | None],
+            HarlequinDatabricksCursor | HarlequinDatabricksCachedCursor | None,
+        ],
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        self.run = run
+        self._limit: int | None = None
+        self._started = False
+        self._cursor: (
+            HarlequinDatabricksCursor | HarlequinDatabricksCachedCursor | None
+        ) = None
+        self._error: Exception | None = None
+
+    def columns(self) -> list[tuple[str, str]]:
+        cursor = self._result()
+        return cursor.columns() if cursor is not None else []
+
+    def set_limit(self, limit: int) -> HarlequinDatabricksDeferredCursor:
+        self._limit = limit
+        self.start()
+        return self
+
+    def fetchall(self) -> AutoBackendType | None:
+        cursor = self._result()
+        if cursor is None:  # maybe user pressed `Cancel Query` button
+            return None
+        if self._limit is not None:
+            cursor.set_limit(self._limit)
+        return cursor.fetchall()
+
+    @property
+    def error(self) -> Exception | None:
+        """The error the query failed with, once it is run."""
+
+        return self._error
+
+    def start(self) -> None:
+        """Run the query (once), with the row limit set so far."""
+
+        if self._started:
+            return
+        self._started = True
+        # not every backend of the connector passes on a row limit of 0, so it is kept
+        # client-side:
+        row_limit = self._limit if self._limit is not None and self._limit > 0 else None
+        try:
+            self._cursor = self.run(row_limit)
+        except Exception as e:  # noqa: BLE001 - raised when the result is fetched
+            self._error = e
+
+    def _result(
+        self,
+    ) -> HarlequinDatabricksCursor | HarlequinDatabricksCachedCursor | None:
+        self.start()
+        if self._error is not None:
+            raise self._error
+        return self._cursor
+
+
+def _announce_result_ceiling(init_message: str, max_result_bytes: int | None) -> str:
+    """Add the result size ceiling (if any) to the message Harlequin shows on connecting.
+
+    Harlequin cannot mark a single result as truncated, so the ceiling is announced up front (and
+    each truncated result is logged).
+    """
+
+    if max_result_bytes is None:
+        return init_message
+    ceiling = (
+        f"Query results are truncated at {max_result_bytes / 1024 / 1024:g} MB "
+        "(--max-result-mb), without being marked as incomplete."
+    )
+    return f"{init_message}\n{ceiling}" if init_message else ceiling
+
+
 class HarlequinDatabricksConnection(HarlequinConnection):
     def __init__(
         self,
@@ -112,20 +587,86 @@ class HarlequinDatabricksConnection(HarlequinConnection):
         init_message: str = "",
         options: dict[str, Any],
     ) -> None:
-        self._original_init_message = init_message
         self.skip_legacy_indexing = options.pop("skip_legacy_indexing")
+        self.metadata_concurrency = options.pop("metadata_concurrency")
+        self.catalog_filter: CatalogFilter = options.pop("catalog_filter")
         self.init_path = options.pop("init_path")
         self.no_init = options.pop("no_init")
+        # a max_result_mb of 0 means results are fetched in full:
+        self.max_result_bytes = int(options.pop("max_result_mb") * 1024 * 1024) or None
+        self._original_init_message = _announce_result_ceiling(
+            init_message, self.max_result_bytes
+        )
+        # results growing past spill_threshold_mb are spilled to disk and memory-mapped (0 is off):
+        self.spill_bytes = int(options.pop("spill_threshold_mb") * 1024 * 1024) or None
 
         self.init_script = (
             self._read_init_script(self.init_path)
             if self.init_path is not None and not self.no_init
             else None
         )
+        # fold the session settings at the start of the script into the connection itself:
+        self._init_plan = plan_init_script(self.init_script or "")
 
         # store the state of the catalog to reuse if the user pressing `Cancel Query` stops the
         # catalog indexing thread in-flight:
         self._existing_catalog: Catalog = Catalog(items=[])
+        self._metadata_pool: ConnectionPool | None = None
+
+        # state of the last Unity Catalog indexing, to patch on incremental refreshes:
+        self.incremental_catalog_refresh = options.pop("incremental_catalog_refresh")
+        self._unity_catalog_items: list[CatalogItem] | None = None
+        self._unity_table_keys: set[tuple[str, str, str]] = set()
+        self._unity_watermark: datetime | None = None
+
+        # fetch the columns of each table only when its Data Catalog node is expanded:
+        self.lazy_column_loading = options.pop("lazy_column_loading")
+        self._table_columns: dict[tuple[str, str, str], list[CatalogItem]] = {}
+        # hold eagerly indexed columns in Arrow, building their CatalogItems on expansion:
+        self.compact_catalog = options.pop("compact_catalog")
+        # the search index over the Data Catalog last returned, rebuilt whenever it changes:
+        self._catalog_index: CatalogIndex | None = None
+
+        self._configure_caches(options)
+
+        # the cursors running queries, which `cancel()` cancels in place:
+        self._cursors = CursorRegistry()
+
+        # submit queries asynchronously and poll their state, reporting it to the progress hooks:
+        self.async_execution = options.pop("async_execution")
+        self.progress_hooks: list[Callable[[QueryProgress], None]] = []
+
+        # submit up to this many read-only statements at once, to run concurrently on the
+        # warehouse; other statements wait for those submitted before them to finish:
+        self.concurrent_statements = options.pop("concurrent_statements")
+        self._pending: list[PendingQuery] = []
+
+        # run `SELECT` & `WITH` queries only once their row limit is set, passing it to the
+        # warehouse (unless they run concurrently, so must be submitted before it is set):
+        self.limit_pushdown = options.pop("limit_pushdown")
+        if self.limit_pushdown and self.concurrent_statements > 1:
+            logger.warning(
+                "--limit-pushdown has no effect with --concurrent-statements above 1, as "
+                "concurrent statements are submitted before their row limit is set."
+            )
+            self.limit_pushdown = False
+
+        # report the timings of each query and Data Catalog indexing to hooks, the
+        # `harlequin_databricks.metrics` logger and (optionally) a JSON-lines file:
+        self.metrics = MetricsRecorder(options.pop("metrics_log"))
+        # capture a full profile of each indexing and `fetchall()` if a directory is configured:
+        profile_dir = options.pop("profile_dir")
+        self.profiler = Profiler(profile_dir) if profile_dir is not None else None
+
+        # Cache OAuth tokens on disk, so connecting (and reconnecting) reuses unexpired tokens:
+        from harlequin_databricks.token_cache import TokenCache, TokenCachePersistence
+
+        token_cache = TokenCache() if options.pop("token_cache") else None
+        if options["auth_type"] is not None and token_cache is not None:
+            # the connector's default U2M client id depends on the auth type:
+            options["experimental_oauth_persistence"] = TokenCachePersistence(
+                token_cache, options.get("oauth_client_id") or options["auth_type"]
+            )
 
         # Set up OAuth machine-to-machine (M2M) authentication:
         client_id = options.pop("client_id")
@@ -139,56 +680,205 @@ class HarlequinDatabricksConnection(HarlequinConnection):
                     ),
                     title="Harlequin could not connect to Databricks SQL warehouse.",
                 )
+            options["credentials_provider"] = self._m2m_credentials_provider(
+                options["server_hostname"], client_id, client_secret, token_cache
+            )
 
-            try:
-                from databricks.sdk.core import (
-                    Config,
-                    oauth_service_principal,
-                )
+        # if enabled, keep a spare session warm in the background, to promote instantly when the
+        # active session is discarded (e.g. on cancel, or when it expires):
+        self.warm_standby = options.pop("warm_standby")
+        self._standby: Future[DatabricksConnection] | None = None
+        self._closed = False
 
-                if TYPE_CHECKING:
-                    from databricks.sdk.credentials_provider import (
-                        CredentialsProvider,
-                    )
+        self._connection_options = options
+        self._connect_and_run_init_script()
 
-                def credentials_provider() -> CredentialsProvider | None:
-                    config = Config(
-                        host=f"https://{options['server_hostname']}",
-                        client_id=client_id,
-                        client_secret=client_secret,
-                    )
-                    return oauth_service_principal(config)  # type:ignore
+    @staticmethod
+    def _m2m_credentials_provider(
+        server_hostname: str,
+        client_id: str,
+        client_secret: str,
+        token_cache: TokenCache | None,
+    ) -> Callable[[], Callable[[], dict[str, str]]]:
+        """Build the connector's `credentials_provider` for OAuth M2M authentication.
+
+        Tokens are minted with the client secret through `databricks-sdk`, and served from a
+        CachedTokenSource shared by every connection opened (e.g. when reconnecting after a
+        cancel), so only the first connection with no unexpired cached token waits on the token
+        exchange.
+        """
 
-                options["credentials_provider"] = credentials_provider
-            except ImportError as e:
-                raise HarlequinConnectionError(
-                    msg="To use OAuth M2M you must install `databricks-sdk` as an extra",
-                    title="Harlequin could not connect to Databricks SQL warehouse.",
-                ) from e
+        from harlequin_databricks.token_cache import CachedToken, CachedTokenSource
 
-        self._connection_options = options
-        self._connect_and_run_init_script()
+        try:
+            from databricks.sdk.core import Config
+            from databricks.sdk.oauth import ClientCredentials
+        except ImportError as e:
+            raise HarlequinConnectionError(
+                msg="To use OAuth M2M you must install `databricks-sdk` as an extra",
+                title="Harlequin could not connect to Databricks SQL warehouse.",
+            ) from e
 
-    def _connect_and_run_init_script(self) -> None:
+        def fetch_token() -> CachedToken:
+            config = Config(
+                host=f"https://{server_hostname}",
+                client_id=client_id,
+                client_secret=client_secret,
+            )
+            token = ClientCredentials(
+                client_id=client_id,
+                client_secret=client_secret,
+                token_url=config.oidc_endpoints.token_endpoint,
+                scopes=["all-apis"],
+                use_header=True,
+            ).token()
+            return CachedToken(token.access_token, token.expiry.timestamp())
+
+        source = CachedTokenSource(token_cache, server_hostname, client_id, fetch_token)
+
+        def credentials_provider() -> Callable[[], dict[str, str]]:
+            return source.headers
+
+        return credentials_provider
+
+    def _configure_caches(self, options: dict[str, Any]) -> None:
+        from harlequin_databricks.catalog_cache import CatalogCache, catalog_cache_key
+        from harlequin_databricks.result_cache import ResultCache
+
+        # Set up the on-disk Data Catalog cache, keyed by the workspace, warehouse and identity:
+        identity = "\x1f".join(
+            str(options.get(option) or "")
+            for option in ("username", "client_id", "auth_type", "access_token")
+        )
+        catalog_cache_ttl = options.pop("catalog_cache_ttl")
+        catalog_cache_max_mb = options.pop("catalog_cache_max_mb")
+        self._catalog_cache = (
+            CatalogCache(
+                key=catalog_cache_key(
+                    server_hostname=options["server_hostname"] or "",
+                    http_path=options["http_path"] or "",
+                    identity=identity,
+                ),
+                ttl=catalog_cache_ttl,
+                max_bytes=catalog_cache_max_mb * 1024 * 1024,
+            )
+            if catalog_cache_ttl > 0
+            else None
+        )
+        # serve the cached catalog only on the first call to `get_catalog()` and refresh it in
+        # the background, unless the user asked for the cache to be rebuilt:
+        self._serve_cached_catalog = not options.pop("rebuild_catalog_cache")
+        self._catalog_refresh: threading.Thread | None = None
+        self._refreshed_catalog: Catalog | None = None
+        # the number of statements run which may have changed the catalog (e.g. DDL), counted by
+        # `execute()`, as when the background refresh started:
+        self._write_count = 0
+        self._refresh_write_count = 0
+        # the last query run with `--limit-pushdown`, if it may still wait for its row limit:
+        self._deferred: HarlequinDatabricksDeferredCursor | None = None
+
+        # Set up the opt-in on-disk query result cache, keyed by the normalized SQL of each query
+        # plus the workspace, warehouse, identity and the session's current catalog & schema:
+        result_cache = options.pop("result_cache")
+        result_cache_ttl = options.pop("result_cache_ttl")
+        result_cache_max_mb = options.pop("result_cache_max_mb")
+        self._result_cache = (
+            ResultCache(
+                ttl=result_cache_ttl, max_bytes=result_cache_max_mb * 1024 * 1024
+            )
+            if result_cache and result_cache_ttl > 0
+            else None
+        )
+        self._result_cache_identity = "\x1f".join(
+            (options["server_hostname"] or "", options["http_path"] or "", identity)
+        )
+        self._session_namespace: tuple[str, str] | None = None
+
+    def _open_connection(
+        self, plan: InitScriptPlan | None = None
+    ) -> DatabricksConnection:
+        """Open a connection, applying the session settings in `plan` if given."""
+
+        from databricks import sql as databricks_sql
+
+        options = dict(self._connection_options)
+        if plan is not None:
+            if plan.session_configuration:
+                options["session_configuration"] = plan.session_configuration
+            if plan.catalog is not None:
+                options["catalog"] = plan.catalog
+            if plan.schema is not None:
+                options["schema"] = plan.schema
         try:
-            self.conn = databricks_sql.connect(**self._connection_options)
+            return databricks_sql.connect(**options)
         except Exception as e:
             raise HarlequinConnectionError(
                 msg=repr(e),
                 title="Harlequin could not connect to Databricks SQL warehouse.",
             ) from e
 
+    def _connect_and_run_init_script(self) -> None:
+        """Replace `self.conn` with a fresh session, promoting the warm standby if there is one."""
+
+        standby_conn = None
+        if self._standby is not None:
+            standby, self._standby = self._standby, None
+            with suppress(Exception):  # fall back to connecting from scratch below
+                standby_conn = standby.result()
+        if standby_conn is not None:
+            # the rest of the initialization script only runs once the standby is promoted:
+            msg = self._run_init_statements(
+                standby_conn, self._init_plan.session_statement_count
+            )
+            self.conn = standby_conn
+        else:
+            self.conn, msg = self._new_session()
+        self._session_namespace = None
+        self.init_message = self._original_init_message + ("\n" + msg if msg else "")
+        self._prepare_standby()
+
+    def _new_session(self) -> tuple[DatabricksConnection, str]:
+        """Open a connection and run the initialization script on it.
+
+        `SET` and `USE` statements at the start of the script are applied as the connection opens,
+        and only the rest of the script is executed. Returns the connection and a message
+        reporting the commands executed from the script.
+        """
+
+        conn = self._open_connection(self._init_plan)
+        return conn, self._run_init_statements(conn)
+
+    def _run_init_statements(
+        self, conn: DatabricksConnection, start: int = 0, stop: int | None = None
+    ) -> str:
+        """Execute `statements[start:stop]` of the initialization script on `conn`.
+
+        Returns a message reporting the commands executed from the script, counting those folded
+        into the connection and the statements before `start` as executed already. If a statement
+        fails, `conn` is closed.
+        """
+
+        from databricks import sql as databricks_sql
+
+        plan = self._init_plan
         msg = ""
-        if self.init_script:
+        if plan.command_count > 0:
             try:
-                count = 0
-                for cmd in self.init_script.split(";"):
-                    stripped_cmd = cmd.strip()
-                    if not stripped_cmd:
-                        continue
-                    self.execute(stripped_cmd)
-                    count += 1
+                count = plan.folded_count + start
+                with conn.cursor() as cursor:
+                    for cmd in plan.statements[start:stop]:
+                        try:
+                            cursor.execute(cmd)
+                        except databricks_sql.DatabaseError as e:
+                            raise HarlequinQueryError(
+                                msg=repr(e),
+                                title=(
+                                    "Harlequin encountered an error while querying Databricks."
+                                ),
+                            ) from e
+                        count += 1
             except HarlequinQueryError as e:
+                conn.close()
                 msg = f"Attempted to execute script at {self.init_path}\n{e}"
                 raise HarlequinConnectionError(
                     msg,
@@ -200,8 +890,32 @@ class HarlequinDatabricksConnection(HarlequinConnection):
                         f"Executed {count} {'command' if count == 1 else 'commands'} "
                         f"from {self.init_path}"
                     )
+        return msg
 
-        self.init_message = self._original_init_message + ("\n" + msg if msg else "")
+    def _prepare_standby(self) -> None:
+        """Start opening a spare session in the background, to promote when `self.conn` is lost.
+
+        Only the statements of the initialization script which change nothing but the state of the
+        session are run on the spare, so statements with other effects (e.g. `CREATE TABLE`) do
+        not run again until the spare is promoted.
+        """
+
+        if not self.warm_standby or self._closed:
+            return
+        standby: Future[DatabricksConnection] = Future()
+
+        def connect() -> None:
+            try:
+                conn = self._open_connection(self._init_plan)
+                self._run_init_statements(
+                    conn, stop=self._init_plan.session_statement_count
+                )
+                standby.set_result(conn)
+            except Exception as e:  # noqa: BLE001 - raised when the standby is promoted
+                standby.set_exception(e)
+
+        threading.Thread(target=connect, daemon=True).start()
+        self._standby = standby
 
     @staticmethod
     def _read_init_script(init_path: Path) -> str:
@@ -212,31 +926,237 @@ class HarlequinDatabricksConnection(HarlequinConnection):
             init_script = ""
         return init_script
 
-    def execute(self, query: str) -> HarlequinDatabricksCursor | None:
+    def execute(
+        self, query: str
+    ) -> (
+        HarlequinDatabricksCursor
+        | HarlequinDatabricksCachedCursor
+        | HarlequinDatabricksDeferredCursor
+        | None
+    ):
+        deferred, self._deferred = self._deferred, None
+        if deferred is not None:
+            # statements reach the warehouse in the order they are executed, so a query still
+            # waiting for its row limit is run first, and if it failed, the script stops there:
+            deferred.start()
+            if deferred.error is not None:
+                raise HarlequinQueryError(
+                    msg=str(deferred.error),
+                    title="Harlequin did not run this statement, as the query before it failed.",
+                ) from deferred.error
+        if not is_read_only(query):
+            self._write_count += 1
+            if self._result_cache is not None:
+                # the statement may change the data behind cached results:
+                self._result_cache.clear()
+        metrics = self.metrics.start("query", statement=statement_type(query))
+        if self.limit_pushdown and supports_limit_pushdown(query):
+            self._deferred = HarlequinDatabricksDeferredCursor(
+                lambda row_limit: self._start_query(query, metrics, row_limit)
+            )
+            return self._deferred
+        return self._start_query(query, metrics)
+
+    def _start_query(
+        self, query: str, metrics: OperationMetrics, row_limit: int | None = None
+    ) -> HarlequinDatabricksCursor | HarlequinDatabricksCachedCursor | None:
         try:
-            cur = self.conn.cursor()
-            cur.execute(query)
+            cursor = self._execute_or_load(query, metrics, row_limit)
+        except Exception:
+            metrics.finish("error")
+            raise
+        if cursor is None:  # maybe user pressed `Cancel Query` button
+            metrics.finish("cancelled")
+        return cursor
+
+    def _execute_or_load(
+        self, query: str, metrics: OperationMetrics, row_limit: int | None = None
+    ) -> HarlequinDatabricksCursor | HarlequinDatabricksCachedCursor | None:
+        """Execute `query`, or serve its result from the result cache if it is cached there.
+
+        If `row_limit` is given, the warehouse returns at most that many rows of the result.
+        """
+
+        if row_limit is not None:
+            metrics.attributes["row_limit"] = row_limit
+        if self._result_cache is None:
+            return self._execute(query, metrics=metrics, row_limit=row_limit)
+        if not is_cacheable(query):
+            # the statement may change the session's current catalog or schema (e.g. `USE`):
+            self._session_namespace = None
+            return self._execute(query, metrics=metrics, row_limit=row_limit)
+
+        with metrics.phase("cache_load"):
+            cache_key = self._result_cache_key(query)
+            cached = (
+                self._result_cache.load(cache_key) if cache_key is not None else None
+            )
+        if cache_key is None:
+            return self._execute(query, metrics=metrics, row_limit=row_limit)
+        metrics.attributes["cache"] = "miss" if cached is None else "hit"
+        if cached is None:
+            return self._execute(query, cache_key, metrics=metrics, row_limit=row_limit)
+        return HarlequinDatabricksCachedCursor(
+            cached,
+            rerun=lambda: self._execute(
+                query, cache_key, metrics=metrics, row_limit=row_limit
+            ),
+            metrics=metrics,
+        )
+
+    def _execute(
+        self,
+        query: str,
+        cache_key: str | None = None,
+        *,
+        retry: bool = True,
+        metrics: OperationMetrics | None = None,
+        row_limit: int | None = None,
+    ) -> HarlequinDatabricksCursor | None:
+        from databricks import sql as databricks_sql
+
+        concurrent = self.concurrent_statements > 1 and is_read_only(query)
+        # leave a slot free for a concurrent statement, or else run after all those before:
+        self._wait_for_pending(self.concurrent_statements - 1 if concurrent else 0)
+
+        cur = None
+        pending = None
+        try:
+            cur = (
+                self.conn.cursor(row_limit=row_limit)
+                if row_limit is not None
+                else self.conn.cursor()
+            )
+            with self._cursors.track(cur), phase(metrics, "execute"):
+                if metrics is not None:
+                    metrics.count("rpcs")
+                if concurrent:
+                    cur.execute_async(query)
+                    pending = PendingQuery(
+                        cur, self._cursors, self._report_progress, metrics
+                    )
+                    self._pending.append(pending)
+                elif not self._run_query(cur, query, metrics):
+                    return None  # maybe user pressed `Cancel Query` button
         except databricks_sql.DatabaseError as e:
-            if (
-                e.message.startswith("Invalid OperationHandle:")
-                and e.__class__.__name__ == "DatabaseError"
-            ):  # maybe user pressed `Cancel Query` button here
+            if _is_cancelled(e) or (cur is not None and self._cursors.cancelled(cur)):
                 return None
+            if retry and _is_session_lost(e):
+                # the session expired or the connection dropped: swap in a fresh session and
+                # run the query again:
+                old_conn = self.conn
+                with phase(metrics, "reconnect"):
+                    self._connect_and_run_init_script()
+                with suppress(Exception):
+                    old_conn.close()
+                if metrics is not None:
+                    metrics.count("reconnects")
+                return self._execute(
+                    query, cache_key, retry=False, metrics=metrics, row_limit=row_limit
+                )
             raise HarlequinQueryError(
                 msg=repr(e),
                 title="Harlequin encountered an error while querying Databricks.",
             ) from e
-        return HarlequinDatabricksCursor(cur)
+        if self._cursors.cancelled(cur):  # user pressed `Cancel Query` button
+            return None
+        return HarlequinDatabricksCursor(
+            cur,
+            max_result_bytes=self.max_result_bytes,
+            spill_bytes=self.spill_bytes,
+            result_cache=self._result_cache if cache_key is not None else None,
+            cache_key=cache_key,
+            cursors=self._cursors,
+            metrics=metrics,
+            profiler=self.profiler,
+            pending=pending,
+        )
+
+    def _run_query(
+        self,
+        cur: DatabricksCursor,
+        query: str,
+        metrics: OperationMetrics | None = None,
+    ) -> bool:
+        """Run `query` on `cur` until it finishes, returning False if it was cancelled."""
+
+        if not self.async_execution:
+            cur.execute(query)
+            return True
+        cur.execute_async(query)
+        if metrics is not None:
+            metrics.attributes["query_id"] = cur.query_id
+        return wait_for_query(cur, self._cursors, self._report_progress, metrics)
+
+    def _wait_for_pending(self, keep: int) -> None:
+        """Wait for the oldest submitted statements to finish, until at most `keep` are running."""
+
+        while len(self._pending) > keep:
+            pending = self._pending.pop(0)
+            with suppress(
+                HarlequinQueryError
+            ):  # raised again when its result is fetched
+                pending.wait()
+
+    def _report_progress(self, progress: QueryProgress) -> None:
+        logger.info(
+            "Query %s %s after %.1fs",
+            progress.query_id,
+            progress.state.lower(),
+            progress.elapsed,
+        )
+        for hook in list(self.progress_hooks):
+            try:
+                hook(progress)
+            except Exception:  # noqa: PERF203
+                # a broken hook must not break the query:
+                logger.exception("Progress hook %r failed", hook)
+
+    def _result_cache_key(self, query: str) -> str | None:
+        """Key the result of `query` by its normalized SQL and the session's current namespace.
+
+        The current catalog & schema are queried once, and again only after a statement which may
+        have changed them. Returns None if they cannot be queried, so the result is not cached.
+        """
+
+        from databricks import sql as databricks_sql
+
+        from harlequin_databricks.result_cache import result_cache_key
+
+        if self._session_namespace is None:
+            try:
+                with self.conn.cursor() as cursor:
+                    cursor.execute("SELECT current_catalog(), current_schema()")
+                    row = cursor.fetchone()
+            except databricks_sql.Error:
+                return None
+            if row is None:
+                return None
+            self._session_namespace = (str(row[0]), str(row[1]))
+        catalog, schema = self._session_namespace
+        return result_cache_key(
+            self._result_cache_identity, catalog, schema, normalize_sql(query)
+        )
 
     def cancel(self) -> None:
-        # This is a hacky way to cancel all ongoing queries of a Databricks Connection. It kills
-        # and reestablishes a fresh connection, as closing a Databricks Connection will cancel all
-        # in-flight queries which that connection started. This is a hack around the Databricks
-        # Python SQL Connector not offering a Connection-level `interrupt()` or `cancel()` method
-        # to cancel all in-flight queries, without having to kill and reestablish a new connection.
-        # The Databricks Python SQL Connector does offer a `cancel()` method at the Cursor-level,
-        # but this is hard to implement within Harlequin's existing adapter framework which
-        # requires cancellation of all ongoing queries of the Connection.
+        # The Databricks Python SQL Connector does not offer a Connection-level `interrupt()` or
+        # `cancel()` method, so the connection tracks the cursors running queries and cancels each
+        # of them in place with the Cursor-level `cancel()` method (a single RPC per cursor).
+        #
+        # If that fails, fall back to killing and reestablishing a fresh connection, as closing a
+        # Databricks Connection cancels all in-flight queries which that connection started. This
+        # is much slower, as it pays for a new session and a rerun of the initialization script.
+
+        if self._metadata_pool is not None:
+            # also stop any legacy metastore indexing running on the extra pooled connections (its
+            # calls on this connection are cancelled with the rest below):
+            self._metadata_pool.close()
+        # the submitted statements are cancelled with the rest below:
+        self._pending = []
+
+        with suppress(Exception):  # reconnecting below cancels all queries anyway
+            if self._cursors.cancel_all():
+                return
 
         old_conn = self.conn
         self._connect_and_run_init_script()
@@ -248,10 +1168,81 @@ class HarlequinDatabricksConnection(HarlequinConnection):
         If the user presses the `Cancel Query` button while this function is executing
         asynchronously, this function will return the Catalog as it stood before this function was
         called (from the `self._existing_catalog` instance variable).
+
+        If the on-disk catalog cache is enabled, the first call returns the cached catalog straight
+        away and rebuilds the catalog in a background thread (stale-while-revalidate). The next call
+        returns the rebuilt catalog, waiting for the background rebuild to finish if necessary,
+        unless a statement which may have changed the catalog (e.g. DDL) ran since the rebuild
+        started: then the rebuilt catalog may already be stale, so the catalog is indexed again.
         """
 
+        if self._catalog_refresh is not None:
+            self._catalog_refresh.join()
+            self._catalog_refresh = None
+            catalog, self._refreshed_catalog = self._refreshed_catalog, None
+            if catalog is not None and self._write_count == self._refresh_write_count:
+                return catalog
+
+        if self._catalog_cache is not None and self._serve_cached_catalog:
+            self._serve_cached_catalog = False
+            cached_catalog = self._catalog_cache.load(
+                self if self.lazy_column_loading else None,
+                compact=self.compact_catalog,
+            )
+            if cached_catalog is not None:
+                self._existing_catalog = cached_catalog
+                self._index_for_search(cached_catalog)
+                self._refresh_write_count = self._write_count
+                self._catalog_refresh = threading.Thread(
+                    target=self._refresh_catalog_in_background, daemon=True
+                )
+                self._catalog_refresh.start()
+                return cached_catalog
+
+        return self._build_catalog()
+
+    def _refresh_catalog_in_background(self) -> None:
+        try:
+            self._refreshed_catalog = self._build_catalog(background=True)
+        except Exception:  # noqa: BLE001
+            # any error will resurface when the next call to `get_catalog()` indexes again:
+            self._refreshed_catalog = None
+
+    def _build_catalog(self, *, background: bool = False) -> Catalog:
+        """Index the Data Catalog, recording the timings of the indexing to `self.metrics`.
+
+        In the `background`, the indexing runs on connections of its own, as Databricks
+        connections cannot be shared between threads and `self.conn` runs the user's queries.
+        """
+
+        existing_catalog = self._existing_catalog
+        pool = ConnectionPool(
+            None if background else self.conn,
+            self._open_connection,
+            self.metadata_concurrency,
+            self._cursors,
+        )
+        try:
+            with (
+                profile(self.profiler, "get_catalog"),
+                self.metrics.operation("catalog_index") as metrics,
+            ):
+                catalog = self._index_catalog(pool, metrics)
+                if (
+                    catalog is existing_catalog
+                ):  # maybe user pressed `Cancel Query` button
+                    metrics.attributes["status"] = "cancelled"
+        finally:
+            pool.close()
+        return catalog
+
+    def _index_catalog(
+        self, pool: ConnectionPool, metrics: OperationMetrics | None = None
+    ) -> Catalog:
+        """Index the Unity Catalog and legacy metastore assets, and update the catalog cache."""
+
         catalog_items: list[CatalogItem] = []
-        unity_catalog_result = self._get_unity_catalogs(catalog_items)
+        unity_catalog_result = self._get_unity_catalogs(catalog_items, metrics, pool)
 
         # maybe user pressed `Cancel Query` button interrupting the indexing of Unity Catalog
         # assets:
@@ -260,111 +1251,188 @@ class HarlequinDatabricksConnection(HarlequinConnection):
         catalog_items, seen_catalogs = unity_catalog_result
 
         if self.skip_legacy_indexing:
-            return Catalog(items=catalog_items)
+            return self._store_catalog(Catalog(items=catalog_items), metrics)
 
         # Index legacy metastore metadata (e.g. `hive_metastore`):
-        with self.conn.cursor() as cursor:
+        with phase(metrics, "legacy_catalogs"), pool.cursor() as cursor:
             cursor.catalogs()
             catalogs = _fetch(cursor)
-            if catalogs is None:  # maybe user pressed `Cancel Query` button
-                return self._existing_catalog
-            catalogs = catalogs.sort_by([("TABLE_CAT", "ascending")])
-
-            for catalog_arrow in catalogs["TABLE_CAT"]:
-                catalog = catalog_arrow.as_py()
-                if catalog in seen_catalogs:
-                    continue
-                seen_catalogs.append(catalog)
-
-                cursor.schemas(catalog_name=catalog)
-                schemas = _fetch(cursor)
-                if schemas is None:  # maybe user pressed `Cancel Query` button
-                    return self._existing_catalog
-                schemas = schemas.sort_by([("TABLE_SCHEM", "ascending")])
-                schema_items: list[CatalogItem] = []
-
-                for schema_arrow in schemas["TABLE_SCHEM"]:
-                    schema = schema_arrow.as_py()
-
-                    cursor.tables(catalog_name=catalog, schema_name=schema)
-                    tables = _fetch(cursor)
-                    if tables is None:  # maybe user pressed `Cancel Query` button
-                        return self._existing_catalog
-                    tables = tables.sort_by([("TABLE_NAME", "ascending")])
-                    table_items: list[CatalogItem] = []
-
-                    for table_arrow, table_type_arrow in zip(
-                        tables["TABLE_NAME"],
-                        tables["TABLE_TYPE"],
-                        strict=True,
-                    ):
-                        table = table_arrow.as_py()
-
-                        cursor.columns(
-                            catalog_name=catalog, schema_name=schema, table_name=table
-                        )
-                        columns = _fetch(cursor)
-                        if columns is None:  # maybe user pressed `Cancel Query` button
-                            return self._existing_catalog
-                        columns = columns.sort_by([("ORDINAL_POSITION", "ascending")])
-
-                        column_items = [
-                            CatalogItem(
-                                qualified_identifier=(
-                                    f"{catalog}.{schema}.{table}.{column.as_py()}"
-                                ),
-                                query_name=column.as_py(),
-                                label=column.as_py(),
-                                type_label=column_type.as_py(),
-                            )
-                            for column, column_type in zip(
-                                columns["COLUMN_NAME"],
-                                columns["TYPE_NAME"],
-                                strict=True,
-                            )
-                        ]
-
-                        table_items.append(
-                            CatalogItem(
-                                qualified_identifier=f"{catalog}.{schema}.{table}",
-                                query_name=f"{catalog}.{schema}.{table}",
-                                label=table,
-                                type_label=table_type_arrow.as_py(),
-                                children=column_items,
-                            )
-                        )
-                    schema_items.append(
-                        CatalogItem(
-                            qualified_identifier=f"{catalog}.{schema}",
-                            query_name=f"{catalog}.{schema}",
-                            label=schema,
-                            type_label="s",
-                            children=table_items,
-                        )
-                    )
-                catalog_items.append(
-                    CatalogItem(
-                        qualified_identifier=catalog,
-                        query_name=catalog,
-                        label=catalog,
-                        type_label="catalog",
-                        children=schema_items,
-                    )
-                )
-            # Sort the catalogs again to ensure legacy and unity catalogs appear alphabetically:
-            catalog_items = [
-                catalog_item
-                for _, catalog_item in sorted(
-                    zip(seen_catalogs, catalog_items, strict=True)
-                )
-            ]
+            if self._cursors.cancelled(cursor):
+                catalogs = None
+        if metrics is not None:
+            metrics.count("rpcs")
+        if catalogs is None:  # maybe user pressed `Cancel Query` button
+            return self._existing_catalog
+        legacy_catalogs = [
+            catalog
+            for catalog in catalogs.sort_by([("TABLE_CAT", "ascending")])[
+                "TABLE_CAT"
+            ].to_pylist()
+            if catalog not in seen_catalogs
+            and self.catalog_filter.catalog_allowed(catalog)
+        ]
+
+        # legacy metastores have no change timestamps, so forget all their lazily fetched columns:
+        for key in list(self._table_columns):
+            if key[0] in legacy_catalogs:
+                self._table_columns.pop(key, None)
 
-            self._existing_catalog = Catalog(items=catalog_items)
+        self._metadata_pool = pool
+        try:
+            legacy_catalog_items = self._get_legacy_catalogs(
+                pool,
+                legacy_catalogs,
+                self if self.lazy_column_loading else None,
+                self.catalog_filter,
+                metrics,
+                compact=self.compact_catalog,
+            )
+        finally:
+            self._metadata_pool = None
+        if legacy_catalog_items is None:  # maybe user pressed `Cancel Query` button
             return self._existing_catalog
+        catalog_items.extend(legacy_catalog_items)
+        seen_catalogs.extend(legacy_catalogs)
+
+        # Sort the catalogs again to ensure legacy and unity catalogs appear alphabetically:
+        catalog_items = [
+            catalog_item
+            for _, catalog_item in sorted(
+                zip(seen_catalogs, catalog_items, strict=True)
+            )
+        ]
+
+        return self._store_catalog(Catalog(items=catalog_items), metrics)
+
+    def _store_catalog(
+        self, catalog: Catalog, metrics: OperationMetrics | None = None
+    ) -> Catalog:
+        self._existing_catalog = catalog
+        with phase(metrics, "search_index"):
+            self._index_for_search(catalog)
+        if self._catalog_cache is not None:
+            with phase(metrics, "cache_save"):
+                self._catalog_cache.save(catalog)
+        return catalog
+
+    def _index_for_search(self, catalog: Catalog) -> None:
+        from harlequin_databricks.catalog_search import CatalogIndex
+
+        self._catalog_index = CatalogIndex(catalog)
+
+    def search_catalog(
+        self, term: str, kind: Literal["relations", "columns", "all"] = "all"
+    ) -> list[CatalogSearchResult]:
+        """Return the Data Catalog items whose label contains `term`, from the search index.
+
+        The index is built whenever the Data Catalog is indexed (or loaded from the catalog
+        cache), so a search never walks the catalog, nor queries Databricks, unless the catalog
+        has not been indexed yet.
+        """
+
+        from harlequin.catalog import CatalogSearchResult
+
+        if self._catalog_index is None:
+            self.get_catalog()
+        assert self._catalog_index is not None
+        return [
+            CatalogSearchResult(item=item, parents=parents)
+            for item, parents in self._catalog_index.search(term, kind)
+        ]
+
+    @staticmethod
+    def _get_legacy_catalogs(
+        pool: ConnectionPool,
+        catalogs: list[str],
+        lazy_connection: HarlequinDatabricksConnection | None = None,
+        catalog_filter: CatalogFilter | None = None,
+        metrics: OperationMetrics | None = None,
+        *,
+        compact: bool = False,
+    ) -> list[CatalogItem] | None:
+        """Index the assets of legacy metastores (e.g. `hive_metastore`).
+
+        Rather than one metadata call per schema and per table, the tables and the columns of each
+        catalog are listed with one call each, leaving the schema and table names unset so the
+        connector matches them all, and the results are grouped into the tree vectorially. Only
+        catalogs with schemas excluded by `catalog_filter` are listed schema by schema instead, so
+        excluded schemas are never crawled.
+
+        The calls are spread over the connections in `pool`, one level of the tree at a time. The
+        results are gathered in the order the calls were made, so the resulting tree is the same
+        whatever the level of concurrency.
+
+        If `lazy_connection` is given, no columns calls are made: tables are built as
+        LazyTableCatalogItems which fetch their columns through `lazy_connection` on expansion.
+        Otherwise, if `compact` is True, they are built as CompactTableCatalogItems, holding their
+        columns in Arrow until expansion. The time spent on each level, and the number of metadata
+        calls, are recorded to `metrics` if given.
+
+        Returns None if the user presses the `Cancel Query` button during indexing.
+        """
+
+        from harlequin_databricks.catalog import build_legacy_catalog_item
+
+        with phase(metrics, "legacy_schemas"):
+            catalog_schemas = pool.map(_fetch_schemas, catalogs)
+        if metrics is not None:
+            metrics.count("rpcs", len(catalogs))
+        if catalog_schemas is None:
+            return None
+
+        scopes = _legacy_scopes(catalogs, catalog_schemas, catalog_filter)
+
+        with phase(metrics, "legacy_tables"):
+            scope_tables = pool.map(_fetch_scope_tables, scopes)
+        if metrics is not None:
+            metrics.count("rpcs", len(scopes))
+        if scope_tables is None:
+            return None
+
+        scope_columns: list[pa.Table] | None = None
+        if lazy_connection is None:
+            with phase(metrics, "legacy_columns"):
+                scope_columns = pool.map(_fetch_scope_columns, scopes)
+            if metrics is not None:
+                metrics.count("rpcs", len(scopes))
+            if scope_columns is None:
+                return None
+
+        # Group the listings of each catalog's scopes together:
+        catalog_tables: dict[str, list[pa.Table]] = {
+            catalog: [] for catalog in catalogs
+        }
+        catalog_columns: dict[str, list[pa.Table]] = {
+            catalog: [] for catalog in catalogs
+        }
+        for i, (catalog, _) in enumerate(scopes):
+            catalog_tables[catalog].append(scope_tables[i])
+            if scope_columns is not None:
+                catalog_columns[catalog].append(scope_columns[i])
+
+        catalog_items: list[CatalogItem] = []
+        for catalog, schemas in zip(catalogs, catalog_schemas, strict=True):
+            tables = _concat_tables(catalog_tables[catalog])
+            columns = (
+                None
+                if scope_columns is None
+                else _concat_tables(catalog_columns[catalog])
+            )
+            if metrics is not None:
+                metrics.count("tables", 0 if tables is None else tables.num_rows)
+                metrics.count("columns", 0 if columns is None else columns.num_rows)
+            catalog_items.append(
+                build_legacy_catalog_item(
+                    catalog, schemas, tables, columns, lazy_connection, compact=compact
+                )
+            )
+        return catalog_items
 
     def _get_unity_catalogs(
         self,
         catalog_items: list[CatalogItem],
+        metrics: OperationMetrics | None = None,
+        pool: ConnectionPool | None = None,
     ) -> tuple[list[CatalogItem], list[str]] | None:
         """Index Unity Catalog assets.
 
@@ -378,162 +1446,254 @@ class HarlequinDatabricksConnection(HarlequinConnection):
         Only two SQL queries are required to fetch all metadata on Unity Catalog assets from the
         information schema.
 
+        With incremental catalog refreshes on, refreshes after the first indexing only fetch the
+        columns of the tables created or altered since (according to their `last_altered`
+        timestamps), and patch (a copy of) the previous tree rather than rebuilding it.
+
         If one of the SQL queries to fetch the Unity Catalog metadata fails because the user
         presses the `Cancel Query` button, this function will return None, triggering
         `get_catalog()` to return the Catalog as it stood before the call to `get_catalog()`.
+
+        The metadata queries run on a connection of `pool` if given, and on `self.conn` if not.
+        The time spent in each phase of the indexing is recorded to `metrics` if given.
         """
 
-        with self.conn.cursor() as cursor:
-            try:
-                cursor.execute(
-                    """SELECT
-                    table_catalog
-                    , table_schema
-                    , table_name
-                    , table_type
-                    FROM system.information_schema.tables"""
-                )
-            except databricks_sql.DatabaseError as e:
-                if (
-                    e.message.startswith("Invalid OperationHandle:")
-                    and e.__class__.__name__ == "DatabaseError"
-                ):  # maybe user pressed `Cancel Query` button here
-                    return None
-                raise HarlequinQueryError(
-                    msg=repr(e),
-                    title=(
-                        "Harlequin encountered an error while querying Databricks to index the "
-                        "Unity Catalog assets."
-                    ),
-                ) from e
-            all_tables = _fetch(cursor)
+        import pyarrow.compute as pc
+
+        from harlequin_databricks.catalog import (
+            build_unity_catalog_items,
+            patch_unity_catalog_items,
+        )
+
+        with pool.cursor() if pool is not None else self.conn.cursor() as cursor:
+            all_tables = self._fetch_unity_metadata(
+                cursor,
+                f"""SELECT
+                table_catalog
+                , table_schema
+                , table_name
+                , table_type
+                , coalesce(last_altered, created) AS last_altered
+                FROM system.information_schema.tables
+                {self.catalog_filter.sql_where()}""",  # noqa: S608 - patterns are escaped
+                metrics,
+                "tables_query",
+            )
             if all_tables is None:  # maybe user pressed `Cancel Query` button here
                 return None
-            all_tables = all_tables.sort_by(
-                [
-                    ("table_catalog", "ascending"),
-                    ("table_schema", "ascending"),
-                    ("table_name", "ascending"),
-                ]
+            with phase(metrics, "filter"):
+                all_tables = self.catalog_filter.filter_table(all_tables)
+            watermark = pc.max(all_tables["last_altered"]).as_py()
+            if metrics is not None:
+                metrics.count("tables", all_tables.num_rows)
+
+            with phase(metrics, "diff"):
+                changed_tables = self._get_changed_unity_tables(all_tables)
+                self._evict_table_columns(changed_tables)
+            lazy_connection = self if self.lazy_column_loading else None
+
+            if (
+                self.incremental_catalog_refresh
+                and changed_tables is not None
+                and changed_tables.num_rows <= MAX_INCREMENTAL_TABLES
+                and self._unity_catalog_items is not None
+            ):
+                changed_cols = None
+                if changed_tables.num_rows > 0 and not self.lazy_column_loading:
+                    changed_cols = self._fetch_unity_metadata(
+                        cursor,
+                        f"""SELECT
+                        table_catalog
+                        , table_schema
+                        , table_name
+                        , column_name
+                        , ordinal_position
+                        , data_type
+                        FROM system.information_schema.columns
+                        WHERE (table_catalog, table_schema, table_name) IN (
+                        {_sql_tuples(changed_tables)}
+                        )""",  # noqa: S608 - identifiers are escaped by `sql_string()`
+                        metrics,
+                        "columns_query",
+                    )
+                    if changed_cols is None:  # maybe user pressed `Cancel Query` button
+                        return None
+                if metrics is not None:
+                    metrics.attributes["incremental"] = True
+                    metrics.count("changed_tables", changed_tables.num_rows)
+                with phase(metrics, "patch"):
+                    unity_catalog_items, unity_catalogs = patch_unity_catalog_items(
+                        self._unity_catalog_items,
+                        all_tables,
+                        changed_tables,
+                        changed_cols,
+                        lazy_connection,
+                        compact=self.compact_catalog,
+                    )
+            else:
+                all_cols = None
+                if not self.lazy_column_loading:
+                    all_cols = self._fetch_unity_metadata(
+                        cursor,
+                        f"""SELECT
+                        table_catalog
+                        , table_schema
+                        , table_name
+                        , column_name
+                        , ordinal_position
+                        , data_type
+                        FROM system.information_schema.columns
+                        {self.catalog_filter.sql_where()}""",  # noqa: S608 - patterns are escaped
+                        metrics,
+                        "columns_query",
+                    )
+                    if all_cols is None:  # maybe user pressed `Cancel Query` button
+                        return None
+                    with phase(metrics, "filter"):
+                        all_cols = self.catalog_filter.filter_table(all_cols)
+                    if metrics is not None:
+                        metrics.count("columns", all_cols.num_rows)
+                with phase(metrics, "build"):
+                    unity_catalog_items, unity_catalogs = build_unity_catalog_items(
+                        all_tables,
+                        all_cols,
+                        lazy_connection,
+                        compact=self.compact_catalog,
+                    )
+
+            self._unity_catalog_items = unity_catalog_items
+            self._unity_table_keys = set(_table_keys(all_tables))
+            self._unity_watermark = watermark
+            catalog_items.extend(unity_catalog_items)
+            return catalog_items, unity_catalogs
+
+    def _get_changed_unity_tables(self, all_tables: pa.Table) -> pa.Table | None:
+        """Select the tables created or altered since the Unity Catalog was last indexed.
+
+        Tables are selected if their `last_altered` timestamp is at or after the latest timestamp
+        seen at the last indexing, or if they were not seen then at all. Returns None if there has
+        been no previous indexing to compare against.
+        """
+
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if self._unity_catalog_items is None or self._unity_watermark is None:
+            return None
+
+        is_changed = (
+            pc.greater_equal(all_tables["last_altered"], self._unity_watermark)
+            .fill_null(fill_value=True)
+            .to_pylist()
+        )
+        changed_rows = [
+            i
+            for i, (changed, key) in enumerate(
+                zip(is_changed, _table_keys(all_tables), strict=True)
             )
+            if changed or key not in self._unity_table_keys
+        ]
+        # (typed, as an empty list of indexes would be a null array, which `take()` rejects)
+        return all_tables.take(pa.array(changed_rows, pa.int64()))
+
+    def _evict_table_columns(self, changed_tables: pa.Table | None) -> None:
+        """Forget the lazily fetched columns of tables that may have changed since."""
+
+        if changed_tables is None:
+            self._table_columns.clear()
+            return
+        for key in _table_keys(changed_tables):
+            self._table_columns.pop(key, None)
+
+    def fetch_table_columns(
+        self, catalog: str, schema: str, table: str
+    ) -> list[CatalogItem]:
+        """Fetch the columns of a table, for when its node is expanded in the Data Catalog.
 
+        The columns of each table are memoized, so they are only fetched once, until the table is
+        seen to have changed when the Data Catalog is refreshed.
+        """
+
+        from harlequin_databricks.catalog import column_catalog_items
+
+        key = (catalog, schema, table)
+        column_items = self._table_columns.get(key)
+        if column_items is None:
+            with self.conn.cursor() as cursor:
+                columns = _fetch_columns(cursor, key)
+            if columns is None:  # maybe user pressed `Cancel Query` button
+                return []
+            column_items = column_catalog_items(catalog, schema, table, columns)
+            self._table_columns[key] = column_items
+        return column_items
+
+    def _fetch_unity_metadata(
+        self,
+        cursor: DatabricksCursor,
+        query: str,
+        metrics: OperationMetrics | None = None,
+        phase_name: str = "query",
+    ) -> pa.Table | None:
+        from databricks import sql as databricks_sql
+
+        with self._cursors.track(cursor), phase(metrics, phase_name):
             try:
-                cursor.execute(
-                    """SELECT
-                    table_catalog
-                    , table_schema
-                    , table_name
-                    , column_name
-                    , ordinal_position
-                    , data_type
-                    FROM system.information_schema.columns"""
-                )
+                if metrics is not None:
+                    metrics.count("rpcs")
+                cursor.execute(query)
+                result = _fetch(cursor)
             except databricks_sql.DatabaseError as e:
-                if (
-                    e.message.startswith("Invalid OperationHandle:")
-                    and e.__class__.__name__ == "DatabaseError"
-                ):  # maybe user pressed `Cancel Query` button here
-                    return None
+                if _is_cancelled(e) or self._cursors.cancelled(cursor):
+                    return None  # maybe user pressed `Cancel Query` button here
                 raise HarlequinQueryError(
                     msg=repr(e),
                     title=(
-                        "Harlequin encountered an error while querying Databricks to index the "
-                        "Unity Catalog assets."
+                        "Harlequin encountered an error while querying Databricks to index "
+                        "the Unity Catalog assets."
                     ),
                 ) from e
-            all_cols = _fetch(cursor)
-            if all_cols is None:  # maybe user pressed `Cancel Query` button here
-                return None
-            all_cols = all_cols.sort_by(
-                [
-                    ("table_catalog", "ascending"),
-                    ("table_schema", "ascending"),
-                    ("table_name", "ascending"),
-                    ("ordinal_position", "ascending"),
-                ]
-            )
-            unity_catalogs = all_tables["table_catalog"].unique()
-
-            for catalog_arrow in unity_catalogs:
-                catalog = catalog_arrow.as_py()
-
-                schemas = all_tables.filter(pc.field("table_catalog") == catalog_arrow)
-                schema_items: list[CatalogItem] = []
-
-                for schema_arrow in schemas["table_schema"].unique():
-                    schema = schema_arrow.as_py()
-
-                    tables = schemas.filter(pc.field("table_schema") == schema_arrow)
-                    table_items: list[CatalogItem] = []
-
-                    for table_arrow, table_type_arrow in zip(
-                        tables["table_name"],
-                        tables["table_type"],
-                        strict=True,
-                    ):
-                        table = table_arrow.as_py()
-
-                        columns = all_cols.filter(
-                            (pc.field("table_catalog") == catalog_arrow)
-                            & (pc.field("table_schema") == schema_arrow)
-                            & (pc.field("table_name") == table_arrow)
-                        )
-                        column_items = [
-                            CatalogItem(
-                                qualified_identifier=(
-                                    f"{catalog}.{schema}.{table}.{column.as_py()}"
-                                ),
-                                query_name=column.as_py(),
-                                label=column.as_py(),
-                                type_label=column_type.as_py(),
-                            )
-                            for column, column_type in zip(
-                                columns["column_name"],
-                                columns["data_type"],
-                                strict=True,
-                            )
-                        ]
-
-                        table_items.append(
-                            CatalogItem(
-                                qualified_identifier=f"{catalog}.{schema}.{table}",
-                                query_name=f"{catalog}.{schema}.{table}",
-                                label=table,
-                                type_label=table_type_arrow.as_py(),
-                                children=column_items,
-                            )
-                        )
-                    schema_items.append(
-                        CatalogItem(
-                            qualified_identifier=f"{catalog}.{schema}",
-                            query_name=f"{catalog}.{schema}",
-                            label=schema,
-                            type_label="s",
-                            children=table_items,
-                        )
-                    )
-                catalog_items.append(
-                    CatalogItem(
-                        qualified_identifier=catalog,
-                        query_name=catalog,
-                        label=catalog,
-                        type_label="catalog",
-                        children=schema_items,
-                    )
-                )
-            return catalog_items, unity_catalogs.to_pylist()
+            except HarlequinQueryError:
+                if self._cursors.cancelled(cursor):
+                    return None
+                raise
+        if self._cursors.cancelled(cursor):
+            return None
+        if metrics is not None and result is not None:
+            metrics.count("bytes", result.nbytes)
+        return result
 
     def get_completions(self) -> list[HarlequinCompletion]:
         return load_completions()
 
     def close(self) -> None:
+        self._closed = True
+        if self._standby is not None:
+            standby, self._standby = self._standby, None
+            standby.add_done_callback(_close_session)
         if self.conn:
             self.conn.close()
 
 
+def _close_session(session: Future[DatabricksConnection]) -> None:
+    if session.exception() is None:
+        session.result().close()
+
+
+def _patterns(value: Sequence[str] | str | None) -> tuple[str, ...]:
+    """Normalize a list option, which may be given as a space or comma separated string."""
+
+    if value is None:
+        return ()
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    return tuple(str(pattern) for pattern in value)
+
+
 class HarlequinDatabricksAdapter(HarlequinAdapter):
     ADAPTER_OPTIONS = DATABRICKS_ADAPTER_OPTIONS
     IMPLEMENTS_CANCEL = True
+    # catalog search is part of the adapter interface from harlequin 2.16:
+    IMPLEMENTS_CATALOG_SEARCH = hasattr(harlequin.catalog, "CatalogSearchResult")
 
     def __init__(
         self,
@@ -548,8 +1708,33 @@ class HarlequinDatabricksAdapter(HarlequinAdapter):
         client_secret: str | None = None,
         init_path: Path | str | None = None,
         no_init: bool | str = False,
+        metadata_concurrency: int | str | None = None,
+        catalog_cache_ttl: float | str | None = None,
+        catalog_cache_max_mb: int | str | None = None,
+        rebuild_catalog_cache: bool | str = False,
+        incremental_catalog_refresh: bool | str = False,
+        lazy_column_loading: bool | str = False,
+        compact_catalog: bool | str = False,
+        include_catalogs: Sequence[str] | str | None = None,
+        exclude_catalogs: Sequence[str] | str | None = None,
+        include_schemas: Sequence[str] | str | None = None,
+        exclude_schemas: Sequence[str] | str | None = None,
+        max_result_mb: float | str | None = None,
+        spill_threshold_mb: float | str | None = None,
+        warm_standby: bool | str = False,
+        no_token_cache: bool | str = False,
+        result_cache: bool | str = False,
+        result_cache_ttl: float | str | None = None,
+        result_cache_max_mb: int | str | None = None,
+        metrics_log: Path | str | None = None,
+        profile_dir: Path | str | None = None,
+        async_execution: bool | str = False,
+        concurrent_statements: int | str | None = None,
+        limit_pushdown: bool | str = False,
         **_: Any,
     ) -> None:
+        if profile_dir is None:
+            profile_dir = os.environ.get(PROFILE_DIR_ENV_VAR)
         try:
             init_path = (
                 Path(init_path).expanduser().resolve()
@@ -557,11 +1742,60 @@ class HarlequinDatabricksAdapter(HarlequinAdapter):
                 else Path.home() / ".databricksrc"
             )
             no_init = bool(no_init)
+            metadata_concurrency = (
+                int(metadata_concurrency) if metadata_concurrency is not None else 1
+            )
+            catalog_cache_ttl = (
+                float(catalog_cache_ttl) if catalog_cache_ttl is not None else 3600.0
+            )
+            catalog_cache_max_mb = (
+                int(catalog_cache_max_mb) if catalog_cache_max_mb is not None else 256
+            )
+            rebuild_catalog_cache = bool(rebuild_catalog_cache)
+            incremental_catalog_refresh = bool(incremental_catalog_refresh)
+            lazy_column_loading = bool(lazy_column_loading)
+            compact_catalog = bool(compact_catalog)
+            catalog_filter = CatalogFilter(
+                include_catalogs=_patterns(include_catalogs),
+                exclude_catalogs=_patterns(exclude_catalogs),
+                include_schemas=_patterns(include_schemas),
+                exclude_schemas=_patterns(exclude_schemas),
+            )
+            max_result_mb = float(max_result_mb) if max_result_mb is not None else 0.0
+            spill_threshold_mb = (
+                float(spill_threshold_mb) if spill_threshold_mb is not None else 0.0
+            )
+            warm_standby = bool(warm_standby)
+            no_token_cache = bool(no_token_cache)
+            result_cache = bool(result_cache)
+            async_execution = bool(async_execution)
+            limit_pushdown = bool(limit_pushdown)
+            concurrent_statements = (
+                int(concurrent_statements) if concurrent_statements is not None else 1
+            )
+            result_cache_ttl = (
+                float(result_cache_ttl) if result_cache_ttl is not None else 3600.0
+            )
+            result_cache_max_mb = (
+                int(result_cache_max_mb) if result_cache_max_mb is not None else 1024
+            )
         except (ValueError, TypeError) as e:
             raise HarlequinConfigError(
                 msg=f"Databricks adapter received bad config value: {e}",
                 title="Harlequin could not initialize the selected adapter.",
             ) from e
+        for name, value in (
+            ("metadata_concurrency", metadata_concurrency),
+            ("concurrent_statements", concurrent_statements),
+        ):
+            if value < 1:
+                raise HarlequinConfigError(
+                    msg=(
+                        f"Databricks adapter received bad config value: {name} must be a "
+                        f"positive integer, got {value}"
+                    ),
+                    title="Harlequin could not initialize the selected adapter.",
+                )
 
         self.options = {
             "server_hostname": server_hostname,
@@ -575,6 +1809,28 @@ class HarlequinDatabricksAdapter(HarlequinAdapter):
             "client_secret": client_secret,
             "init_path": init_path,
             "no_init": no_init,
+            "metadata_concurrency": metadata_concurrency,
+            "catalog_cache_ttl": catalog_cache_ttl,
+            "catalog_cache_max_mb": catalog_cache_max_mb,
+            "rebuild_catalog_cache": rebuild_catalog_cache,
+            "incremental_catalog_refresh": incremental_catalog_refresh,
+            "lazy_column_loading": lazy_column_loading,
+            "compact_catalog": compact_catalog,
+            "catalog_filter": catalog_filter,
+            "max_result_mb": max_result_mb,
+            "spill_threshold_mb": spill_threshold_mb,
+            "warm_standby": warm_standby,
+            "token_cache": not no_token_cache,
+            "result_cache": result_cache,
+            "result_cache_ttl": result_cache_ttl,
+            "result_cache_max_mb": result_cache_max_mb,
+            "metrics_log": (
+                Path(metrics_log).expanduser() if metrics_log is not None else None
+            ),
+            "async_execution": async_execution,
+            "concurrent_statements": concurrent_statements,
+            "limit_pushdown": limit_pushdown,
+            "profile_dir": (Path(profile_dir).expanduser() if profile_dir else None),
         }
 
     def connect(self) -> HarlequinDatabricksConnection:
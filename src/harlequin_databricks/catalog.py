@@ -0,0 +1,503 @@
+from __future__ import annotations
+
+import copy
+import sys
+from bisect import bisect_left
+from dataclasses import dataclass
+from itertools import pairwise
+from typing import TYPE_CHECKING
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from harlequin.catalog import CatalogItem, InteractiveCatalogItem
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from harlequin_databricks.adapter import HarlequinDatabricksConnection
+
+
+@dataclass
+class LazyTableCatalogItem(InteractiveCatalogItem["HarlequinDatabricksConnection"]):
+    """A table whose columns are only fetched when its node is expanded in the Data Catalog."""
+
+    table_key: tuple[str, str, str] = ("", "", "")
+
+    def fetch_children(self) -> list[CatalogItem]:
+        assert self.connection is not None
+        return self.connection.fetch_table_columns(*self.table_key)
+
+
+class ColumnStore:
+    """The names and types of the columns of many tables, held in Arrow arrays.
+
+    The columns of each table are a contiguous run of the arrays, so a table only needs to keep
+    the (start, stop) offsets of its run. Names and types are dictionary-encoded, so each distinct
+    name or type (e.g. `id`, or `STRING`) is stored once however many columns share it, and they
+    are interned when read out as Python strings.
+    """
+
+    def __init__(self, names: pa.ChunkedArray, types: pa.ChunkedArray) -> None:
+        self.names = pc.dictionary_encode(names)
+        self.types = pc.dictionary_encode(types)
+
+    def columns(self, start: int, stop: int) -> Iterator[tuple[str, str]]:
+        """Yield the (name, type) of the columns in a run, with the strings interned."""
+
+        names = self.names.slice(start, stop - start).to_pylist()
+        types = self.types.slice(start, stop - start).to_pylist()
+        for name, column_type in zip(names, types, strict=True):
+            yield sys.intern(name), sys.intern(column_type)
+
+    def take(self, indices: list[int]) -> list[tuple[str, str]]:
+        """Return the (name, type) of the columns at `indices`, with the strings interned."""
+
+        positions = pa.array(indices, pa.int64())
+        names = self.names.take(positions).to_pylist()
+        types = self.types.take(positions).to_pylist()
+        return [
+            (sys.intern(name), sys.intern(column_type))
+            for name, column_type in zip(names, types, strict=True)
+        ]
+
+
+@dataclass
+class CompactTableCatalogItem(InteractiveCatalogItem["HarlequinDatabricksConnection"]):
+    """A table whose columns are held in a ColumnStore, until its node is expanded.
+
+    Rather than keeping a CatalogItem (and its freshly formatted qualified identifier) per column,
+    the CatalogItems of the table's columns are only built when Harlequin renders them.
+    """
+
+    table_key: tuple[str, str, str] = ("", "", "")
+    column_store: ColumnStore | None = None
+    column_range: tuple[int, int] = (0, 0)
+
+    @property
+    def num_columns(self) -> int:
+        start, stop = self.column_range
+        return stop - start
+
+    def fetch_children(self) -> list[CatalogItem]:
+        if self.column_store is None:
+            return []
+        return column_catalog_items(
+            *self.table_key, self.column_store.columns(*self.column_range)
+        )
+
+
+def column_catalog_items(
+    catalog: str,
+    schema: str,
+    table: str,
+    columns: Iterable[tuple[str, str]],
+) -> list[CatalogItem]:
+    return [
+        CatalogItem(
+            qualified_identifier=f"{catalog}.{schema}.{table}.{column}",
+            query_name=column,
+            label=column,
+            type_label=column_type,
+        )
+        for column, column_type in columns
+    ]
+
+
+def table_catalog_item(
+    catalog: str,
+    schema: str,
+    table: str,
+    table_type: str,
+    columns: Iterable[tuple[str, str]],
+    *,
+    connection: HarlequinDatabricksConnection | None = None,
+    column_store: ColumnStore | None = None,
+    column_range: tuple[int, int] = (0, 0),
+) -> CatalogItem:
+    """Build the CatalogItem for a table and its columns.
+
+    If `connection` is given, `columns` is ignored and a LazyTableCatalogItem is returned instead,
+    which fetches its columns through `connection` when it is expanded. Otherwise, if
+    `column_store` is given, `columns` is ignored and a CompactTableCatalogItem is returned,
+    which builds its columns from the `column_range` run of `column_store` when it is expanded.
+    """
+
+    if connection is not None:
+        return LazyTableCatalogItem(
+            qualified_identifier=f"{catalog}.{schema}.{table}",
+            query_name=f"{catalog}.{schema}.{table}",
+            label=table,
+            type_label=table_type,
+            connection=connection,
+            table_key=(catalog, schema, table),
+        )
+    if column_store is not None:
+        return CompactTableCatalogItem(
+            qualified_identifier=f"{catalog}.{schema}.{table}",
+            query_name=f"{catalog}.{schema}.{table}",
+            label=table,
+            type_label=table_type,
+            table_key=(catalog, schema, table),
+            column_store=column_store,
+            column_range=column_range,
+        )
+    return CatalogItem(
+        qualified_identifier=f"{catalog}.{schema}.{table}",
+        query_name=f"{catalog}.{schema}.{table}",
+        label=table,
+        type_label=table_type,
+        children=column_catalog_items(catalog, schema, table, columns),
+    )
+
+
+def _run_bounds(table: pa.Table, keys: list[str]) -> list[int]:
+    """Return the row offsets where runs of equal `keys` start, plus the table length.
+
+    `table` must already be sorted by `keys`. The boundaries are found in one vectorized pass by
+    comparing each row's keys with those of the previous row, so consecutive offsets in the result
+    delimit the zero-copy slices `table.slice(start, stop - start)` of each group.
+    """
+
+    num_rows = table.num_rows
+    if num_rows == 0:
+        return [0]
+    if num_rows == 1:
+        # comparing the empty slices of a one-row table gives a chunked array with no chunks,
+        # which crashes `pc.indices_nonzero()`:
+        return [0, 1]
+
+    changed = None
+    for key in keys:
+        values = table[key].fill_null("")
+        key_changed = pc.not_equal(values.slice(1), values.slice(0, num_rows - 1))
+        changed = key_changed if changed is None else pc.or_(changed, key_changed)
+
+    assert changed is not None
+    starts = pc.add(pc.indices_nonzero(changed), 1).to_pylist()
+    return [0, *starts, num_rows]
+
+
+def _column_runs(
+    columns: pa.Table, keys: list[str], *, compact: bool = False
+) -> tuple[
+    list[str], list[str], dict[tuple[str, ...], tuple[int, int]], ColumnStore | None
+]:
+    """Sort columns metadata by table and ordinal position, and find the run of each table.
+
+    Returns the column names and types in that order, a map from each table's `keys` values to
+    the (start, stop) offsets of its run of columns, and None. If `compact` is True, the names and
+    types are left in Arrow instead: empty lists are returned for them, with a ColumnStore.
+    """
+
+    columns = columns.sort_by(
+        [*((key, "ascending") for key in keys), ("ordinal_position", "ascending")]
+    )
+    bounds = _run_bounds(columns, keys)
+    # only convert the keys of the first row of each run to Python, not of every column:
+    run_keys = zip(
+        *(
+            columns[key].take(pa.array(bounds[:-1], pa.int64())).to_pylist()
+            for key in keys
+        ),
+        strict=True,
+    )
+    runs = dict(zip(run_keys, pairwise(bounds), strict=True))
+    if compact:
+        return [], [], runs, ColumnStore(columns["column_name"], columns["data_type"])
+    return (
+        columns["column_name"].to_pylist(),
+        columns["data_type"].to_pylist(),
+        runs,
+        None,
+    )
+
+
+def build_unity_catalog_items(
+    all_tables: pa.Table,
+    all_cols: pa.Table | None,
+    connection: HarlequinDatabricksConnection | None = None,
+    *,
+    compact: bool = False,
+) -> tuple[list[CatalogItem], list[str]]:
+    """Build the Unity Catalog tree from `system.information_schema` tables & columns metadata.
+
+    `all_tables` needs the columns `table_catalog`, `table_schema`, `table_name` & `table_type`,
+    and `all_cols` needs `table_catalog`, `table_schema`, `table_name`, `column_name`,
+    `ordinal_position` & `data_type`. If `connection` is given, the tables are built as
+    LazyTableCatalogItems that fetch their columns through `connection` on expansion, and
+    `all_cols` may be None. Otherwise, if `compact` is True, the tables are built as
+    CompactTableCatalogItems backed by one ColumnStore of all the columns.
+
+    Each input is sorted once, then split into (catalog, schema, table) groups using run
+    boundaries, so the cost is linear in the number of tables plus columns (after the sorts),
+    rather than filtering all columns once per table.
+
+    Returns the CatalogItems for each catalog, and the catalog names, in alphabetical order.
+    """
+
+    all_tables = all_tables.sort_by(
+        [
+            ("table_catalog", "ascending"),
+            ("table_schema", "ascending"),
+            ("table_name", "ascending"),
+        ]
+    )
+
+    col_names: list[str] = []
+    col_types: list[str] = []
+    col_runs: dict[tuple[str, ...], tuple[int, int]] = {}
+    column_store = None
+    if connection is None:
+        assert all_cols is not None
+        col_names, col_types, col_runs, column_store = _column_runs(
+            all_cols, ["table_catalog", "table_schema", "table_name"], compact=compact
+        )
+
+    table_catalogs = all_tables["table_catalog"].to_pylist()
+    table_schemas = all_tables["table_schema"].to_pylist()
+    table_names = all_tables["table_name"].to_pylist()
+    table_types = all_tables["table_type"].to_pylist()
+    schema_bounds = _run_bounds(all_tables, ["table_catalog", "table_schema"])
+
+    catalog_items: list[CatalogItem] = []
+    catalogs: list[str] = []
+    schema_items: list[CatalogItem] = []
+
+    for schema_start, schema_stop in pairwise(schema_bounds):
+        catalog = table_catalogs[schema_start]
+        schema = table_schemas[schema_start]
+
+        if not catalogs or catalogs[-1] != catalog:
+            schema_items = []
+            catalogs.append(catalog)
+            catalog_items.append(
+                CatalogItem(
+                    qualified_identifier=catalog,
+                    query_name=catalog,
+                    label=catalog,
+                    type_label="catalog",
+                    children=schema_items,
+                )
+            )
+
+        table_items: list[CatalogItem] = []
+        for i in range(schema_start, schema_stop):
+            table = table_names[i]
+            col_start, col_stop = col_runs.get((catalog, schema, table), (0, 0))
+            table_items.append(
+                table_catalog_item(
+                    catalog,
+                    schema,
+                    table,
+                    table_types[i],
+                    zip(
+                        col_names[col_start:col_stop],
+                        col_types[col_start:col_stop],
+                        strict=True,
+                    ),
+                    connection=connection,
+                    column_store=column_store,
+                    column_range=(col_start, col_stop),
+                )
+            )
+
+        schema_items.append(
+            CatalogItem(
+                qualified_identifier=f"{catalog}.{schema}",
+                query_name=f"{catalog}.{schema}",
+                label=schema,
+                type_label="s",
+                children=table_items,
+            )
+        )
+
+    return catalog_items, catalogs
+
+
+def build_legacy_catalog_item(
+    catalog: str,
+    schemas: list[str],
+    tables: pa.Table | None,
+    columns: pa.Table | None,
+    connection: HarlequinDatabricksConnection | None = None,
+    *,
+    compact: bool = False,
+) -> CatalogItem:
+    """Build the tree of a legacy metastore catalog from catalog-wide metadata call results.
+
+    `schemas` lists the catalog's schemas in order, including those with no tables. `tables` needs
+    the columns `table_schema`, `table_name` & `table_type`, and `columns` needs `table_schema`,
+    `table_name`, `column_name`, `ordinal_position` & `data_type`; either may be None if the
+    catalog has no tables listed. If `connection` is given, the tables are built as
+    LazyTableCatalogItems that fetch their columns through `connection` on expansion, or if
+    `compact` is True, as CompactTableCatalogItems backed by a ColumnStore.
+
+    As with `build_unity_catalog_items()`, each input is sorted once and split into groups using
+    run boundaries, rather than listing the tables and columns of each schema and table in turn.
+    """
+
+    table_runs: dict[tuple[str, ...], tuple[int, int]] = {}
+    table_names: list[str] = []
+    table_types: list[str] = []
+    if tables is not None:
+        tables = tables.sort_by(
+            [("table_schema", "ascending"), ("table_name", "ascending")]
+        )
+        table_schemas = tables["table_schema"].to_pylist()
+        table_names = tables["table_name"].to_pylist()
+        table_types = tables["table_type"].to_pylist()
+        table_runs = {
+            (table_schemas[start],): (start, stop)
+            for start, stop in pairwise(_run_bounds(tables, ["table_schema"]))
+        }
+
+    col_names: list[str] = []
+    col_types: list[str] = []
+    col_runs: dict[tuple[str, ...], tuple[int, int]] = {}
+    column_store = None
+    if connection is None and columns is not None:
+        col_names, col_types, col_runs, column_store = _column_runs(
+            columns, ["table_schema", "table_name"], compact=compact
+        )
+
+    schema_items: list[CatalogItem] = []
+    for schema in schemas:
+        table_start, table_stop = table_runs.get((schema,), (0, 0))
+        table_items: list[CatalogItem] = []
+        for i in range(table_start, table_stop):
+            table = table_names[i]
+            col_start, col_stop = col_runs.get((schema, table), (0, 0))
+            table_items.append(
+                table_catalog_item(
+                    catalog,
+                    schema,
+                    table,
+                    table_types[i],
+                    zip(
+                        col_names[col_start:col_stop],
+                        col_types[col_start:col_stop],
+                        strict=True,
+                    ),
+                    connection=connection,
+                    column_store=column_store,
+                    column_range=(col_start, col_stop),
+                )
+            )
+        schema_items.append(
+            CatalogItem(
+                qualified_identifier=f"{catalog}.{schema}",
+                query_name=f"{catalog}.{schema}",
+                label=schema,
+                type_label="s",
+                children=table_items,
+            )
+        )
+    return CatalogItem(
+        qualified_identifier=catalog,
+        query_name=catalog,
+        label=catalog,
+        type_label="catalog",
+        children=schema_items,
+    )
+
+
+def patch_unity_catalog_items(
+    catalog_items: list[CatalogItem],
+    all_tables: pa.Table,
+    changed_tables: pa.Table,
+    changed_cols: pa.Table | None,
+    connection: HarlequinDatabricksConnection | None = None,
+    *,
+    compact: bool = False,
+) -> tuple[list[CatalogItem], list[str]]:
+    """Patch a Unity Catalog tree, rather than rebuilding it from scratch.
+
+    `catalog_items` is a tree built by `build_unity_catalog_items()`. `all_tables` holds the
+    (catalog, schema, table) keys of every table that exists now, which is used to remove the
+    tables that have been dropped. `changed_tables` & `changed_cols` hold the full metadata of the
+    tables that were created or altered since `catalog_items` was built (`changed_cols` may be None
+    if there are none, or if `connection` is given to build lazy tables); these tables are inserted
+    into, or replace their counterparts in, the tree. Schemas & catalogs left with no tables are
+    removed, so the result matches what `build_unity_catalog_items()` would build from scratch.
+
+    `catalog_items` is left as it is, as a Catalog returned earlier (or the catalog cache) may
+    still hold it: its catalog & schema items are copied, and only its table items are shared.
+
+    Returns the patched tree and the names of its catalogs, in alphabetical order.
+    """
+
+    existing_keys = set(
+        zip(
+            all_tables["table_catalog"].to_pylist(),
+            all_tables["table_schema"].to_pylist(),
+            all_tables["table_name"].to_pylist(),
+            strict=True,
+        )
+    )
+    patched_items = [
+        _with_children(
+            catalog_item,
+            [
+                _with_children(
+                    schema_item,
+                    [
+                        table_item
+                        for table_item in schema_item.children
+                        if (catalog_item.label, schema_item.label, table_item.label)
+                        in existing_keys
+                    ],
+                )
+                for schema_item in catalog_item.children
+            ],
+        )
+        for catalog_item in catalog_items
+    ]
+
+    changed_items = (
+        build_unity_catalog_items(
+            changed_tables, changed_cols, connection, compact=compact
+        )[0]
+        if changed_tables.num_rows > 0
+        else []
+    )
+    for changed_catalog in changed_items:
+        catalog_item = _find_or_insert(patched_items, changed_catalog)
+        for changed_schema in changed_catalog.children:
+            schema_item = _find_or_insert(catalog_item.children, changed_schema)
+            for changed_table in changed_schema.children:
+                _find_or_insert(schema_item.children, changed_table, replace=True)
+
+    for catalog_item in patched_items:
+        catalog_item.children[:] = [
+            schema_item for schema_item in catalog_item.children if schema_item.children
+        ]
+    patched_items = [
+        catalog_item for catalog_item in patched_items if catalog_item.children
+    ]
+    return patched_items, [catalog_item.label for catalog_item in patched_items]
+
+
+def _with_children(item: CatalogItem, children: list[CatalogItem]) -> CatalogItem:
+    """Return a shallow copy of `item` with `children`."""
+
+    copied = copy.copy(item)
+    copied.children = children
+    return copied
+
+
+def _find_or_insert(
+    items: list[CatalogItem], item: CatalogItem, replace: bool = False
+) -> CatalogItem:
+    """Return the item in sorted `items` with the label of `item`, inserting `item` if absent.
+
+    If `replace` is True, an existing item with the same label is replaced by `item`.
+    """
+
+    index = bisect_left(items, item.label, key=lambda existing: existing.label)
+    if index < len(items) and items[index].label == item.label:
+        if not replace:
+            return items[index]
+        items[index] = item
+        return item
+    items.insert(index, item)
+    return item
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from harlequin.catalog import Catalog, CatalogItem
+from platformdirs import user_cache_dir
+
+from harlequin_databricks.catalog import (
+    ColumnStore,
+    CompactTableCatalogItem,
+    LazyTableCatalogItem,
+)
+
+if TYPE_CHECKING:
+    from harlequin_databricks.adapter import HarlequinDatabricksConnection
+
+CACHE_VERSION = b"2"
+CACHE_SCHEMA = pa.schema(
+    [
+        ("parent", pa.int32()),
+        ("qualified_identifier", pa.string()),
+        ("query_name", pa.string()),
+        ("label", pa.string()),
+        ("type_label", pa.dictionary(pa.int32(), pa.string())),
+        ("lazy", pa.bool_()),
+    ],
+    metadata={"harlequin_databricks_cache_version": CACHE_VERSION},
+)
+
+# the depths of table & column rows in the flattened catalog tree, under catalogs and schemas:
+TABLE_DEPTH = 2
+COLUMN_DEPTH = 3
+
+
+def catalog_cache_key(server_hostname: str, http_path: str, identity: str) -> str:
+    """Hash the connection details into a key, so secrets never appear in cache file names."""
+
+    key = f"{server_hostname}\x1f{http_path}\x1f{identity}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class CatalogCache:
+    """An on-disk cache of a connection's Data Catalog, stored as a compressed Arrow IPC file.
+
+    The catalog tree is flattened in pre-order into one row per CatalogItem, with each row storing
+    the index of its parent row (-1 for catalogs), so it can be rebuilt in a single pass. Rows for
+    LazyTableCatalogItems are flagged, so they can be rebuilt to fetch their columns on expansion.
+    The columns of CompactTableCatalogItems are stored like any others, and are loaded back into a
+    ColumnStore if the connection holds its catalog compactly.
+
+    Cached catalogs older than `ttl` seconds are ignored. After each save, the least recently
+    written cache files are deleted until the cache directory holds at most `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        ttl: float,
+        max_bytes: int,
+        cache_dir: Path | None = None,
+    ) -> None:
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_dir = (
+            cache_dir
+            if cache_dir is not None
+            else Path(user_cache_dir(appname="harlequin-databricks")) / "catalogs"
+        )
+        self.path = self.cache_dir / f"{key}.arrow"
+
+    def load(
+        self,
+        connection: HarlequinDatabricksConnection | None = None,
+        *,
+        compact: bool = False,
+    ) -> Catalog | None:
+        """Load the cached catalog, or return None if it is missing, expired or unusable.
+
+        `connection` is needed to rebuild LazyTableCatalogItems: a cached catalog with lazily
+        loaded columns is unusable without it. If `compact` is True, tables are rebuilt as
+        CompactTableCatalogItems holding their cached columns in a ColumnStore.
+        """
+
+        try:
+            if time.time() - self.path.stat().st_mtime > self.ttl:
+                return None
+            with pa.memory_map(str(self.path), "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (OSError, pa.ArrowInvalid):
+            return None
+        if (table.schema.metadata or {}).get(
+            b"harlequin_databricks_cache_version"
+        ) != CACHE_VERSION:
+            return None
+        if connection is None and pc.any(table["lazy"]).as_py():
+            return None
+        return _table_to_catalog(table, connection, compact=compact)
+
+    def save(self, catalog: Catalog) -> None:
+        table = _catalog_to_table(catalog)
+        try:
+            # the cached data is only readable by the user, like the OAuth token cache:
+            self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            self.cache_dir.chmod(0o700)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.unlink(missing_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            options = pa.ipc.IpcWriteOptions(compression="zstd")
+            with (
+                os.fdopen(fd, "wb") as sink,
+                pa.ipc.new_file(sink, table.schema, options=options) as writer,
+            ):
+                writer.write_table(table)
+            if tmp_path.stat().st_size > self.max_bytes:
+                tmp_path.unlink()
+                return
+            tmp_path.replace(self.path)
+            self._evict()
+        except OSError:
+            return
+
+    def _evict(self) -> None:
+        cache_files = sorted(
+            self.cache_dir.glob("*.arrow"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        total_bytes = 0
+        for path in cache_files:
+            total_bytes += path.stat().st_size
+            if total_bytes > self.max_bytes:
+                path.unlink()
+
+
+def _catalog_to_table(catalog: Catalog) -> pa.Table:
+    columns: dict[str, list[object]] = {name: [] for name in CACHE_SCHEMA.names}
+
+    def add(items: list[CatalogItem], parent: int) -> None:
+        for item in items:
+            index = len(columns["parent"])
+            columns["parent"].append(parent)
+            columns["qualified_identifier"].append(item.qualified_identifier)
+            columns["query_name"].append(item.query_name)
+            columns["label"].append(item.label)
+            columns["type_label"].append(item.type_label)
+            columns["lazy"].append(isinstance(item, LazyTableCatalogItem))
+            children = item.children
+            if isinstance(item, CompactTableCatalogItem) and not children:
+                children = item.fetch_children()
+            add(children, index)
+
+    add(catalog.items, -1)
+    return pa.table(columns, schema=CACHE_SCHEMA)
+
+
+def _table_to_catalog(
+    table: pa.Table,
+    connection: HarlequinDatabricksConnection | None,
+    *,
+    compact: bool = False,
+) -> Catalog:
+    # columns (the rows three levels down) are left in the table's arrays if the catalog is held
+    # compactly, as their tables' runs of a ColumnStore:
+    column_store = ColumnStore(table["label"], table["type_label"]) if compact else None
+    roots: list[CatalogItem] = []
+    items: list[CatalogItem] = []
+    depths: list[int] = []
+    parents: list[int] = table["parent"].to_pylist()
+    for i, (
+        parent,
+        qualified_identifier,
+        query_name,
+        label,
+        type_label,
+        lazy,
+    ) in enumerate(
+        zip(
+            parents,
+            table["qualified_identifier"].to_pylist(),
+            table["query_name"].to_pylist(),
+            table["label"].to_pylist(),
+            table["type_label"].to_pylist(),
+            table["lazy"].to_pylist(),
+            strict=True,
+        )
+    ):
+        depth = 0 if parent < 0 else depths[parent] + 1
+        depths.append(depth)
+        item: CatalogItem
+        if column_store is not None and depth == COLUMN_DEPTH:
+            table_item = items[parent]
+            assert isinstance(table_item, CompactTableCatalogItem)
+            table_item.column_range = (table_item.column_range[0], i + 1)
+            items.append(table_item)  # a placeholder, as columns are never parents
+            continue
+        if lazy or (column_store is not None and depth == TABLE_DEPTH):
+            schema_item = items[parent]
+            catalog_item = items[parents[parent]]
+            table_key = (catalog_item.label, schema_item.label, label)
+            item = (
+                LazyTableCatalogItem(
+                    qualified_identifier=qualified_identifier,
+                    query_name=query_name,
+                    label=label,
+                    type_label=type_label,
+                    connection=connection,
+                    table_key=table_key,
+                )
+                if lazy
+                else CompactTableCatalogItem(
+                    qualified_identifier=qualified_identifier,
+                    query_name=query_name,
+                    label=label,
+                    type_label=type_label,
+                    table_key=table_key,
+                    column_store=column_store,
+                    column_range=(i + 1, i + 1),
+                )
+            )
+        else:
+            item = CatalogItem(
+                qualified_identifier=qualified_identifier,
+                query_name=query_name,
+                label=label,
+                type_label=type_label,
+            )
+        items.append(item)
+        (roots if parent < 0 else items[parent].children).append(item)
+    return Catalog(items=roots)
@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Literal
+
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from harlequin_databricks.catalog import (
+    CompactTableCatalogItem,
+    LazyTableCatalogItem,
+    column_catalog_items,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+    from harlequin.catalog import Catalog, CatalogItem
+
+    from harlequin_databricks.catalog import ColumnStore
+
+# Catalogs are at depth 0 of the Data Catalog, schemas at 1 and relations at 2, with the columns
+# of each relation below it:
+RELATION_DEPTH = 2
+TRIGRAM = 3
+
+# A separator which cannot be part of a search term, between the labels of a haystack:
+_SEPARATOR = "\n"
+
+
+class _Haystack:
+    """Lowercased labels joined into one UTF-8 string, so a term is found in all by one scan.
+
+    The labels are lowercased & joined by Arrow kernels, so no Python string is made per label,
+    and `bytes.find()` scans the joined string in C, which is an order of magnitude faster than
+    testing each label in turn, without the memory a trigram index over every column would take.
+    """
+
+    def __init__(self, labels: pa.ChunkedArray) -> None:
+        def scalar(value: str) -> pa.Scalar:
+            return pa.scalar(value, pa.large_string())
+
+        lines = pc.binary_join_element_wise(
+            pc.utf8_lower(labels.cast(pa.large_string())),
+            scalar(""),
+            scalar(_SEPARATOR),
+        ).combine_chunks()
+        _, offsets_buffer, data = lines.buffers()
+        offsets = array("q")
+        offsets.frombytes(offsets_buffer.to_pybytes()[: 8 * (len(lines) + 1)])
+        self.text = data.to_pybytes()[: offsets[-1]]
+        # the byte offset of each label in the text:
+        self.starts = offsets[:-1]
+
+    def find(self, term: str) -> Iterator[int]:
+        """Yield the position of each label containing `term` (lowercased), once, in order."""
+
+        needle = term.encode("utf-8")
+        pos = self.text.find(needle, self.starts[0]) if self.starts else -1
+        while pos != -1:
+            entry = bisect_right(self.starts, pos) - 1
+            yield entry
+            if entry + 1 == len(self.starts):
+                return
+            pos = self.text.find(needle, self.starts[entry + 1])
+
+
+class _LabelChunks:
+    """Collects labels into Arrow chunks, from lists of strings or runs of ColumnStore names.
+
+    Adjacent runs of the same ColumnStore are merged into one slice, so the names of compact
+    tables are never copied into Python strings.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[pa.Array] = []
+        self.num_labels = 0
+        self._labels: list[str] = []
+        self._run: tuple[ColumnStore, int, int] | None = None
+
+    def extend(self, labels: list[str]) -> None:
+        self._flush_run()
+        self._labels.extend(labels)
+        self.num_labels += len(labels)
+
+    def extend_from_store(self, store: ColumnStore, start: int, stop: int) -> None:
+        self._flush_labels()
+        if self._run is not None and self._run[0] is store and self._run[2] == start:
+            self._run = (store, self._run[1], stop)
+        else:
+            self._flush_run()
+            self._run = (store, start, stop)
+        self.num_labels += stop - start
+
+    def to_array(self) -> pa.ChunkedArray:
+        self._flush_labels()
+        self._flush_run()
+        # (the cast also decodes the dictionary-encoded names of ColumnStores)
+        return pa.chunked_array(
+            [chunk.cast(pa.large_string()) for chunk in self.chunks], pa.large_string()
+        )
+
+    def _flush_labels(self) -> None:
+        if self._labels:
+            self.chunks.append(pa.array(self._labels, pa.string()))
+            self._labels = []
+
+    def _flush_run(self) -> None:
+        if self._run is not None:
+            store, start, stop = self._run
+            self.chunks.extend(store.names.slice(start, stop - start).chunks)
+            self._run = None
+
+
+class CatalogIndex:
+    """A search index over the labels of a Data Catalog, built as a by-product of indexing it.
+
+    Catalogs, schemas and relations are indexed by the trigrams of their lowercased labels, so a
+    search only checks the relations sharing the term's rarest trigram rather than walking the
+    whole catalog. Terms shorter than a trigram, and columns (which outnumber relations by far),
+    are instead matched by scanning a haystack of their labels.
+
+    The columns of lazily loaded tables are not known when indexing, so are not searched. Those of
+    compact tables are read from their ColumnStore, and CatalogItems are only built for the
+    columns a search finds.
+    """
+
+    def __init__(self, catalog: Catalog) -> None:
+        self.items: list[CatalogItem] = []
+        self.parents: list[tuple[str, ...]] = []
+        self.depths = array("B")
+        self.labels: list[str] = []
+        self.trigrams: dict[str, array[int]] = {}
+        # the relations with columns, and the position of the first of their columns:
+        self.column_tables = array("I")
+        self.column_starts = array("q")
+        column_labels = _LabelChunks()
+
+        stack: list[tuple[CatalogItem, tuple[str, ...]]] = [
+            (item, ()) for item in reversed(catalog.items)
+        ]
+        while stack:
+            item, parents = stack.pop()
+            entry = len(self.items)
+            self._add(entry, item, parents)
+            if len(parents) < RELATION_DEPTH:
+                path = (*parents, item.label)
+                stack.extend((child, path) for child in reversed(item.children))
+                continue
+            start = column_labels.num_labels
+            if isinstance(item, CompactTableCatalogItem):
+                if item.column_store is not None:
+                    column_labels.extend_from_store(
+                        item.column_store, *item.column_range
+                    )
+            elif not isinstance(item, LazyTableCatalogItem):
+                column_labels.extend([column.label for column in item.children])
+            if column_labels.num_labels > start:
+                self.column_tables.append(entry)
+                self.column_starts.append(start)
+
+        self.num_columns = column_labels.num_labels
+        self._relation_haystack = _Haystack(
+            pa.chunked_array([pa.array(self.labels, pa.string())])
+        )
+        self._column_haystack = _Haystack(column_labels.to_array())
+
+    def _add(self, entry: int, item: CatalogItem, parents: tuple[str, ...]) -> None:
+        label = item.label.lower()
+        self.items.append(item)
+        self.parents.append(parents)
+        self.depths.append(len(parents))
+        self.labels.append(label)
+        trigrams = self.trigrams
+        for trigram in {
+            label[i : i + TRIGRAM] for i in range(len(label) - TRIGRAM + 1)
+        }:
+            posting = trigrams.get(trigram)
+            if posting is None:
+                trigrams[trigram] = array("I", [entry])
+            else:
+                posting.append(entry)
+
+    def search(
+        self,
+        term: str,
+        kind: Literal["relations", "columns", "all"] = "all",
+    ) -> list[tuple[CatalogItem, tuple[str, ...]]]:
+        """Return each item whose label contains `term` (case-insensitively), with its parents.
+
+        `kind` is "relations" (tables and views), "columns", or "all" (every level, including
+        catalogs and schemas). The parents of an item are the labels of its ancestors, outermost
+        first. Relations are returned in catalog order, followed by columns.
+        """
+
+        term = term.lower()
+        if _SEPARATOR in term:
+            return []
+        results: list[tuple[CatalogItem, tuple[str, ...]]] = []
+        if kind != "columns":
+            results.extend(
+                (self.items[entry], self.parents[entry])
+                for entry in self._find_relations(term)
+                if kind == "all" or self.depths[entry] == RELATION_DEPTH
+            )
+        if kind != "relations":
+            results.extend(self._columns(self._column_haystack.find(term)))
+        return results
+
+    def _find_relations(self, term: str) -> Iterator[int]:
+        if len(term) < TRIGRAM:
+            yield from self._relation_haystack.find(term)
+            return
+        postings: list[array[int]] = []
+        for i in range(len(term) - TRIGRAM + 1):
+            posting = self.trigrams.get(term[i : i + TRIGRAM])
+            if posting is None:
+                return
+            postings.append(posting)
+        labels = self.labels
+        yield from (entry for entry in min(postings, key=len) if term in labels[entry])
+
+    def _columns(
+        self, columns: Iterable[int]
+    ) -> list[tuple[CatalogItem, tuple[str, ...]]]:
+        """Return the CatalogItems and parents of columns, building those of compact tables."""
+
+        results: list[tuple[CatalogItem, tuple[str, ...]]] = []
+        # the results to build from each ColumnStore, and the positions of their columns in it:
+        compact: dict[int, tuple[ColumnStore, list[int], list[int]]] = {}
+        owner_parents: dict[int, tuple[str, ...]] = {}
+        for column in columns:
+            table_index = bisect_right(self.column_starts, column) - 1
+            owner = self.column_tables[table_index]
+            table = self.items[owner]
+            parents = owner_parents.get(owner)
+            if parents is None:
+                parents = owner_parents[owner] = (*self.parents[owner], table.label)
+            position = column - self.column_starts[table_index]
+            if isinstance(table, CompactTableCatalogItem):
+                assert table.column_store is not None
+                _, slots, indices = compact.setdefault(
+                    id(table.column_store), (table.column_store, [], [])
+                )
+                slots.append(len(results))
+                indices.append(table.column_range[0] + position)
+                results.append((table, parents))  # (until its column is built, below)
+            else:
+                results.append((table.children[position], parents))
+
+        for store, slots, indices in compact.values():
+            for slot, name_and_type in zip(slots, store.take(indices), strict=True):
+                table, parents = results[slot]
+                assert isinstance(table, CompactTableCatalogItem)
+                [item] = column_catalog_items(*table.table_key, [name_and_type])
+                results[slot] = (item, parents)
+        return results
@@ -1,6 +1,37 @@
 from pathlib import Path
 
-from harlequin.options import FlagOption, PathOption, SelectOption, TextOption
+from harlequin.options import (
+    FlagOption,
+    ListOption,
+    PathOption,
+    SelectOption,
+    TextOption,
+)
+
+
+def _positive_int_validator(s: str | None) -> tuple[bool, str]:
+    if s is None:
+        return True, ""
+    try:
+        value = int(s)
+    except ValueError:
+        return False, "Must be an integer."
+    if value < 1:
+        return False, "Must be a positive integer."
+    return True, ""
+
+
+def _non_negative_float_validator(s: str | None) -> tuple[bool, str]:
+    if s is None:
+        return True, ""
+    try:
+        value = float(s)
+    except ValueError:
+        return False, "Must be a number."
+    if value < 0:
+        return False, "Must not be negative."
+    return True, ""
+
 
 server_hostname = TextOption(
     name="server-hostname",
@@ -96,6 +127,227 @@ no_init = FlagOption(
     description="Start Harlequin without executing the initialization script.",
 )
 
+metadata_concurrency = TextOption(
+    name="metadata-concurrency",
+    description=(
+        "The number of connections used to fetch legacy metastore (e.g. `hive_metastore`) "
+        "metadata concurrently while indexing the Data Catalog. Defaults to 1. Higher values "
+        "open extra connections to your Databricks instance while indexing, but can make the "
+        "indexing of large legacy metastores much faster."
+    ),
+    validator=_positive_int_validator,
+)
+
+catalog_cache_ttl = TextOption(
+    name="catalog-cache-ttl",
+    description=(
+        "How long, in seconds, a Data Catalog cached on disk stays valid (default 3600, i.e. one "
+        "hour). On startup a valid cached catalog is shown straight away while the catalog is "
+        "re-indexed in the background; the fresh catalog is shown on the next refresh. Set to 0 "
+        "to disable the cache."
+    ),
+    validator=_non_negative_float_validator,
+)
+
+catalog_cache_max_mb = TextOption(
+    name="catalog-cache-max-mb",
+    description=(
+        "The maximum size, in megabytes, of all Data Catalogs cached on disk (default 256). The "
+        "least recently refreshed catalogs are deleted first when the cache outgrows this size."
+    ),
+    validator=_positive_int_validator,
+)
+
+rebuild_catalog_cache = FlagOption(
+    name="rebuild-catalog-cache",
+    description=(
+        "Ignore any Data Catalog cached on disk and index the catalog from scratch on startup, "
+        "replacing the cached catalog."
+    ),
+)
+
+incremental_catalog_refresh = FlagOption(
+    name="incremental-catalog-refresh",
+    description=(
+        "When refreshing the Data Catalog, only fetch the column metadata of Unity Catalog tables "
+        "created or altered since the last refresh (according to `system.information_schema`), "
+        "and patch the existing catalog rather than re-indexing it from scratch."
+    ),
+)
+
+lazy_column_loading = FlagOption(
+    name="lazy-column-loading",
+    description=(
+        "Only index catalogs, schemas and tables up front, and fetch the columns of each table "
+        "when its node is expanded in the Data Catalog pane. Makes indexing much faster on large "
+        "Databricks instances, at the cost of a short wait when a table is first expanded."
+    ),
+)
+
+compact_catalog = FlagOption(
+    name="compact-catalog",
+    description=(
+        "Hold the indexed columns of each table in compact Arrow arrays, building their Data "
+        "Catalog nodes only when the table is expanded (or named in the query editor). Cuts the "
+        "memory used by the Data Catalog of workspaces with millions of columns."
+    ),
+)
+
+include_catalogs = ListOption(
+    name="include-catalogs",
+    description=(
+        "Only index catalogs matching these glob patterns (e.g. `sales_*`) in the Data Catalog "
+        "pane. Filters are applied in the metadata queries, so excluded catalogs are never "
+        "downloaded."
+    ),
+)
+
+exclude_catalogs = ListOption(
+    name="exclude-catalogs",
+    description="Do not index catalogs matching these glob patterns in the Data Catalog pane.",
+)
+
+include_schemas = ListOption(
+    name="include-schemas",
+    description=(
+        "Only index schemas matching these glob patterns in the Data Catalog pane. Patterns "
+        "match either the schema name (e.g. `dim_*`) or `catalog.schema` (e.g. `sales.dim_*`)."
+    ),
+)
+
+exclude_schemas = ListOption(
+    name="exclude-schemas",
+    description=(
+        "Do not index schemas matching these glob patterns in the Data Catalog pane. Patterns "
+        "match either the schema name or `catalog.schema`."
+    ),
+)
+
+max_result_mb = TextOption(
+    name="max-result-mb",
+    description=(
+        "The maximum size, in megabytes, of a query result fetched into memory (default 0, i.e. "
+        "no limit). Results are streamed from Databricks in batches and truncated once they "
+        "reach this size; the truncation is reported in Harlequin's log only, not in the results "
+        "viewer."
+    ),
+    validator=_non_negative_float_validator,
+)
+
+spill_threshold_mb = TextOption(
+    name="spill-threshold-mb",
+    description=(
+        "Spill query results larger than this many megabytes to a temporary Arrow file on disk, "
+        "and memory-map them from there, so they do not stay resident in memory (default 0, "
+        "i.e. never spill), to scroll through very large results."
+    ),
+    validator=_non_negative_float_validator,
+)
+
+no_token_cache = FlagOption(
+    name="no-token-cache",
+    description=(
+        "Do not cache OAuth tokens on disk. By default OAuth M2M access tokens (and OAuth U2M "
+        "refresh tokens) are cached in a file readable only by you, keyed by workspace and client "
+        "id, so connecting reuses an unexpired token instead of exchanging a new one."
+    ),
+)
+
+warm_standby = FlagOption(
+    name="warm-standby",
+    description=(
+        "Keep a spare Databricks session open and initialized in the background, and promote it "
+        "instantly whenever the active session has to be replaced (e.g. when cancelling a query "
+        "fails, or the session expires). Off by default, as the spare is a second session held "
+        "open on the warehouse."
+    ),
+)
+
+result_cache = FlagOption(
+    name="result-cache",
+    description=(
+        "Cache the results of queries on disk, and serve re-runs of the same query in the same "
+        "catalog & schema from the cache instead of Databricks. Only read-only queries without "
+        "non-deterministic functions (e.g. `now()` or `rand()`) are cached."
+    ),
+)
+
+result_cache_ttl = TextOption(
+    name="result-cache-ttl",
+    description=(
+        "How long, in seconds, a cached query result stays valid when --result-cache is set "
+        "(default 3600, i.e. one hour)."
+    ),
+    validator=_non_negative_float_validator,
+)
+
+result_cache_max_mb = TextOption(
+    name="result-cache-max-mb",
+    description=(
+        "The maximum size, in megabytes, of all query results cached on disk (default 1024). The "
+        "least recently used results are deleted first when the cache outgrows this size."
+    ),
+    validator=_positive_int_validator,
+)
+
+async_execution = FlagOption(
+    name="async-execution",
+    description=(
+        "Submit queries asynchronously and poll their state, logging whether each query is "
+        "pending or running and for how long. Cancelling then stops polling at once and cancels "
+        "the query's exact operation on Databricks."
+    ),
+)
+
+concurrent_statements = TextOption(
+    name="concurrent-statements",
+    description=(
+        "When running several statements at once, submit up to this many read-only statements "
+        "(e.g. `SELECT`s) to run concurrently on the warehouse (default 1, i.e. one at a time). "
+        "Other statements, which may write data or change the session, wait for all statements "
+        "before them to finish. Results are shown in the original order."
+    ),
+    validator=_positive_int_validator,
+)
+
+limit_pushdown = FlagOption(
+    name="limit-pushdown",
+    description=(
+        "Push Harlequin's row limit down to the warehouse for plain `SELECT` and `WITH` "
+        "queries, so it stops once the rows to show are computed, rather than computing (and "
+        "staging) the whole result. Such queries are then only run when their result is fetched, "
+        "so their errors are reported then too."
+    ),
+)
+
+metrics_log = PathOption(
+    name="metrics-log",
+    description=(
+        "Append the timings of each query (execute, fetch & Arrow conversion) and of each "
+        "indexing of the Data Catalog (per phase) to this file, as JSON lines."
+    ),
+    exists=False,
+    file_okay=True,
+    dir_okay=False,
+    resolve_path=True,
+    path_type=Path,
+)
+
+profile_dir = PathOption(
+    name="profile-dir",
+    description=(
+        "Profile each indexing of the Data Catalog and each fetch of a query result, writing a "
+        "timestamped cProfile `.pstats` file and a collapsed-stack (flame graph) file per "
+        "operation to this directory. Can also be set with the "
+        "HARLEQUIN_DATABRICKS_PROFILE_DIR environment variable."
+    ),
+    exists=False,
+    file_okay=False,
+    dir_okay=True,
+    resolve_path=True,
+    path_type=Path,
+)
+
 DATABRICKS_ADAPTER_OPTIONS = [
     server_hostname,
     http_path,
@@ -108,4 +360,27 @@ DATABRICKS_ADAPTER_OPTIONS = [
     client_secret,
     init_path,
     no_init,
+    metadata_concurrency,
+    catalog_cache_ttl,
+    catalog_cache_max_mb,
+    rebuild_catalog_cache,
+    incremental_catalog_refresh,
+    lazy_column_loading,
+    compact_catalog,
+    include_catalogs,
+    exclude_catalogs,
+    include_schemas,
+    exclude_schemas,
+    max_result_mb,
+    spill_threshold_mb,
+    warm_standby,
+    no_token_cache,
+    result_cache,
+    result_cache_ttl,
+    result_cache_max_mb,
+    async_execution,
+    concurrent_statements,
+    limit_pushdown,
+    metrics_log,
+    profile_dir,
 ]
@@ -1,41 +1,33 @@
 from __future__ import annotations
 
-import csv
-from pathlib import Path
+from functools import cache
 
 from harlequin import HarlequinCompletion
 
+from harlequin_databricks.completion_data import FUNCTIONS, KEYWORDS
+
+
+@cache
+def _completions() -> tuple[HarlequinCompletion, ...]:
+    return tuple(
+        HarlequinCompletion(
+            label=name,
+            type_label=type_label,
+            value=name,
+            priority=1000,
+            context=None,
+        )
+        for type_label, names in (("kw", KEYWORDS), ("fn", FUNCTIONS))
+        for name in names
+    )
+
 
 def load_completions() -> list[HarlequinCompletion]:
-    completions: list[HarlequinCompletion] = []
-
-    keywords_path = Path(__file__).parent / "keywords.csv"
-    with keywords_path.open("r", encoding="utf-8") as file:
-        reader = csv.reader(file, dialect="unix")
-        for row in reader:
-            completions.append(
-                HarlequinCompletion(
-                    label=row[0].lower(),
-                    type_label="kw",
-                    value=row[0].lower(),
-                    priority=1000,
-                    context=None,
-                )
-            )
-
-    functions_path = Path(__file__).parent / "functions.csv"
-    with functions_path.open("r", encoding="utf-8") as file:
-        reader = csv.reader(file, dialect="unix")
-        next(reader)  # Skip header row
-        for name, _, _ in reader:
-            completions.append(
-                HarlequinCompletion(
-                    label=name.lower(),
-                    type_label="fn",
-                    value=name.lower(),
-                    priority=1000,
-                    context=None,
-                )
-            )
-
-    return completions
+    """Return completions for Databricks SQL keywords & functions.
+
+    The completions are built once per process from the precompiled `completion_data` module
+    (generated from `keywords.csv` & `functions.csv` by `scripts/compile_completions.py`), so
+    calls after the first only copy a list.
+    """
+
+    return list(_completions())
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+    from databricks.sql.client import Cursor as DatabricksCursor
+
+
+class CursorRegistry:
+    """Tracks the cursors of a connection while they run queries, so they can be cancelled.
+
+    The Databricks Python SQL Connector's `Cursor.cancel()` can be called from another thread, and
+    cancels the cursor's command with a single RPC. Cursors cancelled by `cancel_all()` are
+    remembered (weakly), so the errors or partial results of their queries can be discarded.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # notified whenever cursors are cancelled, to wake the threads polling their queries:
+        self._cancelled_changed = threading.Condition(self._lock)
+        # the number of holds on each live cursor, from `track()` blocks and `hold()` calls:
+        self._live: Counter[DatabricksCursor] = Counter()
+        self._cancelled: weakref.WeakSet[DatabricksCursor] = weakref.WeakSet()
+
+    @contextmanager
+    def track(self, cursor: DatabricksCursor) -> Iterator[None]:
+        """Track `cursor` as live for the duration of the block."""
+
+        self.hold(cursor)
+        try:
+            yield
+        finally:
+            self.release(cursor)
+
+    def hold(self, cursor: DatabricksCursor) -> None:
+        """Track `cursor` as live until a matching call to `release()`."""
+
+        with self._lock:
+            self._live[cursor] += 1
+
+    def release(self, cursor: DatabricksCursor) -> None:
+        with self._lock:
+            self._live[cursor] -= 1
+            if self._live[cursor] <= 0:
+                del self._live[cursor]
+
+    def cancelled(self, cursor: DatabricksCursor) -> bool:
+        with self._lock:
+            return cursor in self._cancelled
+
+    def wait_cancelled(self, cursor: DatabricksCursor, timeout: float) -> bool:
+        """Wait up to `timeout` seconds for `cursor` to be cancelled, returning if it was."""
+
+        with self._cancelled_changed:
+            return self._cancelled_changed.wait_for(
+                lambda: cursor in self._cancelled, timeout
+            )
+
+    def cancel_all(self) -> bool:
+        """Cancel the commands of all live cursors.
+
+        Returns False if any live cursor has not yet been assigned a command to cancel, in which
+        case its query can only be stopped by closing the connection. Raises if a cancel RPC fails.
+        """
+
+        with self._lock:
+            cursors = list(self._live)
+            self._cancelled.update(cursors)
+            self._cancelled_changed.notify_all()
+        cancellable = True
+        for cursor in cursors:
+            if getattr(cursor, "active_command_id", None) is None:
+                cancellable = False
+                continue
+            cursor.cancel()
+        return cancellable
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+    import pyarrow as pa
+
+
+def sql_string(value: str) -> str:
+    """Quote `value` as a Databricks SQL string literal."""
+
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'")
+    return f"'{escaped}'"
+
+
+def glob_to_like(pattern: str) -> str | None:
+    """Translate a glob into an equivalent SQL `LIKE` pattern, or None if there isn't one.
+
+    `*` and `?` translate to `%` and `_`, and literal `%`, `_` & backslashes are escaped. Globs
+    using `[...]` character classes have no `LIKE` equivalent.
+    """
+
+    if "[" in pattern:
+        return None
+    escaped = re.sub(r"([%_\\])", r"\\\1", pattern)
+    return escaped.replace("*", "%").replace("?", "_")
+
+
+def _matches(name: str, patterns: Iterable[str]) -> bool:
+    return any(fnmatchcase(name.lower(), pattern.lower()) for pattern in patterns)
+
+
+@dataclass(frozen=True)
+class CatalogFilter:
+    """Include & exclude glob patterns selecting which catalogs and schemas to index.
+
+    A catalog or schema is indexed if it matches any include pattern (or there are none), and no
+    exclude pattern. Schema patterns match either the schema name or `catalog.schema`. Patterns
+    are matched case-insensitively.
+    """
+
+    include_catalogs: tuple[str, ...] = ()
+    exclude_catalogs: tuple[str, ...] = ()
+    include_schemas: tuple[str, ...] = ()
+    exclude_schemas: tuple[str, ...] = ()
+
+    def __bool__(self) -> bool:
+        """Return True if the filter has any patterns."""
+        return any(
+            (
+                self.include_catalogs,
+                self.exclude_catalogs,
+                self.include_schemas,
+                self.exclude_schemas,
+            )
+        )
+
+    def catalog_allowed(self, catalog: str) -> bool:
+        if self.include_catalogs and not _matches(catalog, self.include_catalogs):
+            return False
+        return not _matches(catalog, self.exclude_catalogs)
+
+    def schema_allowed(self, catalog: str, schema: str) -> bool:
+        if not self.catalog_allowed(catalog):
+            return False
+        names = (schema, f"{catalog}.{schema}")
+        if self.include_schemas and not any(
+            _matches(name, self.include_schemas) for name in names
+        ):
+            return False
+        return not any(_matches(name, self.exclude_schemas) for name in names)
+
+    def filter_table(
+        self,
+        table: pa.Table,
+        catalog_column: str = "table_catalog",
+        schema_column: str = "table_schema",
+    ) -> pa.Table:
+        """Drop the rows of an Arrow table in catalogs or schemas this filter excludes."""
+
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        if not self or table.num_rows == 0:
+            return table
+        keys = pc.binary_join_element_wise(
+            table[catalog_column], table[schema_column], "\x1f"
+        )
+        unique_keys = pc.unique(keys).to_pylist()
+        allowed_keys = [
+            key for key in unique_keys if self.schema_allowed(*key.split("\x1f", 1))
+        ]
+        if len(allowed_keys) == len(unique_keys):
+            return table
+        return table.filter(pc.is_in(keys, value_set=pa.array(allowed_keys)))
+
+    def sql_where(
+        self, catalog_column: str = "table_catalog", schema_column: str = "table_schema"
+    ) -> str:
+        """Build a SQL `WHERE` clause (or "") pushing as much of this filter as possible down.
+
+        Patterns without a `LIKE` equivalent are left out of the clause, so the clause may select
+        more than the filter allows: results still need checking with `schema_allowed()`.
+        """
+
+        qualified_schema = f"concat({catalog_column}, '.', {schema_column})"
+        conditions = [
+            _like_any(self.include_catalogs, [catalog_column]),
+            _like_any(self.include_schemas, [schema_column, qualified_schema]),
+        ]
+        conditions += [
+            f"NOT {_like_any((pattern,), [catalog_column])}"
+            for pattern in self.exclude_catalogs
+            if glob_to_like(pattern) is not None
+        ]
+        conditions += [
+            f"NOT {_like_any((pattern,), [schema_column, qualified_schema])}"
+            for pattern in self.exclude_schemas
+            if glob_to_like(pattern) is not None
+        ]
+        conditions = [condition for condition in conditions if condition]
+        return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _like_any(patterns: tuple[str, ...], columns: list[str]) -> str:
+    """Build a condition that any of `columns` matches any of `patterns`, or "" if it can't be."""
+
+    like_patterns = [glob_to_like(pattern) for pattern in patterns]
+    if not like_patterns or None in like_patterns:
+        return ""
+    return "({})".format(
+        " OR ".join(
+            f"{column} ILIKE {sql_string(like_pattern)}"
+            for like_pattern in like_patterns
+            if like_pattern is not None
+            for column in columns
+        )
+    )
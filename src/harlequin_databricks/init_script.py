@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+
+from harlequin_databricks.sql import split_statements, strip_comments
+
+_IDENTIFIER = r"(?:`(?:[^`]|``)*`|[A-Za-z0-9_$]+)"
+_SET = re.compile(
+    r"SET\s+(?!VAR\b|VARIABLE\b|TIME\s+ZONE\b)([A-Za-z0-9_.$-]+)\s*=\s*(.*)",
+    re.IGNORECASE | re.DOTALL,
+)
+_SET_TIME_ZONE = re.compile(
+    r"SET\s+TIME\s+ZONE\s+('(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")", re.IGNORECASE
+)
+_USE = re.compile(
+    rf"USE(?:\s+(CATALOG|SCHEMA|DATABASE))?\s+({_IDENTIFIER}(?:\.{_IDENTIFIER})?)",
+    re.IGNORECASE,
+)
+# the session configuration parameters of Databricks SQL, which are folded into the connection;
+# other keys stay statements of the script, so a misspelled or unsupported key fails as such:
+_SESSION_CONFIGURATION_KEYS = frozenset(
+    {
+        "ANSI_MODE",
+        "LEGACY_TIME_PARSER_POLICY",
+        "MAX_FILE_PARTITION_BYTES",
+        "READ_ONLY_EXTERNAL_METASTORE",
+        "STATEMENT_TIMEOUT",
+        "TIMEZONE",
+        "USE_CACHED_RESULT",
+    }
+)
+# statements which only change the state of the session they run in:
+_SESSION_STATEMENT = re.compile(
+    r"(?:SET|RESET|USE|DECLARE)\b"
+    r"|CREATE\s+(?:OR\s+REPLACE\s+)?TEMP(?:ORARY)?\s+(?:VIEW|FUNCTION)\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class InitScriptPlan:
+    """An initialization script split into session settings and statements to execute.
+
+    `session_configuration`, `catalog` and `schema` are passed to `databricks_sql.connect()`, so
+    they are applied when the session opens, without a round trip each. `statements` are the
+    remaining statements of the script, to execute in order once connected. The first
+    `session_statement_count` of them only change the state of the session (e.g. `SET VAR` or
+    `CREATE TEMP VIEW`), so can run on a spare session before it is needed.
+    """
+
+    session_configuration: dict[str, str] = field(default_factory=dict)
+    catalog: str | None = None
+    schema: str | None = None
+    statements: list[str] = field(default_factory=list)
+    folded_count: int = 0
+
+    @property
+    def command_count(self) -> int:
+        """The number of commands in the script, whether folded into the connection or not."""
+
+        return self.folded_count + len(self.statements)
+
+    @property
+    def session_statement_count(self) -> int:
+        """The number of leading `statements` which only change the state of the session."""
+
+        for index, statement in enumerate(self.statements):
+            if not _SESSION_STATEMENT.match(strip_comments(statement)):
+                return index
+        return len(self.statements)
+
+
+def _unquote_identifier(identifier: str) -> str:
+    if identifier.startswith("`"):
+        return identifier[1:-1].replace("``", "`")
+    return identifier
+
+
+def _unquote_value(value: str) -> str:
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in "'\"":
+        return re.sub(r"\\(.)", r"\1", value[1:-1])
+    return value
+
+
+def plan_init_script(script: str) -> InitScriptPlan:
+    """Plan the execution of an initialization script.
+
+    The leading run of `SET key = value` (of session configuration parameters),
+    `SET TIME ZONE 'zone'`, `USE CATALOG`, `USE SCHEMA` (or `USE DATABASE`) and `USE` statements is
+    folded into the session configuration and initial namespace of the connection. Folding stops
+    at the first other statement, so statements that depend on the order of the session settings
+    still see them applied in order.
+    """
+
+    plan = InitScriptPlan()
+    statements = split_statements(script)
+    for index, statement in enumerate(statements):
+        code = strip_comments(statement)
+        set_match = _SET.fullmatch(code)
+        if set_match and set_match.group(1).upper() in _SESSION_CONFIGURATION_KEYS:
+            key, value = set_match.groups()
+            plan.session_configuration[key] = _unquote_value(value)
+        elif time_zone_match := _SET_TIME_ZONE.fullmatch(code):
+            plan.session_configuration["TIMEZONE"] = _unquote_value(
+                time_zone_match.group(1)
+            )
+        elif use_match := _USE.fullmatch(code):
+            kind, name = use_match.groups()
+            parts = [
+                _unquote_identifier(part) for part in re.findall(_IDENTIFIER, name)
+            ]
+            if kind is not None and kind.upper() == "CATALOG":
+                if len(parts) != 1:
+                    plan.statements = statements[index:]
+                    break
+                plan.catalog, plan.schema = parts[0], None
+            elif len(parts) == 2:  # noqa: PLR2004 - `USE catalog.schema`
+                plan.catalog, plan.schema = parts
+            else:
+                plan.schema = parts[0]
+        else:
+            plan.statements = statements[index:]
+            break
+        plan.folded_count += 1
+    return plan
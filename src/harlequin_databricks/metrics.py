@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterator
+    from contextlib import AbstractContextManager
+    from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OperationMetrics:
+    """The timings & counters of one query, or one indexing of the Data Catalog.
+
+    `phases` accumulates the seconds spent in each named phase of the operation (e.g. `execute`,
+    `fetch` & `arrow` for queries), and `counters` counts e.g. rows, bytes, Arrow batches and
+    `rpcs` (calls through the connector to Databricks). `attributes` describe the operation, and
+    gain a `status` of "ok", "cancelled" or "error" when it finishes.
+    """
+
+    operation: str
+    attributes: dict[str, Any] = field(default_factory=dict)
+    phases: dict[str, float] = field(default_factory=dict)
+    counters: Counter[str] = field(default_factory=Counter)
+    recorder: MetricsRecorder | None = field(default=None, repr=False)
+    started_at: float = field(default_factory=time.time)
+    duration: float | None = None
+    _start: float = field(default_factory=time.perf_counter, repr=False)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to phase `name`."""
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, counter: str, n: int = 1) -> None:
+        self.counters[counter] += n
+
+    def finish(self, status: str = "ok") -> None:
+        """Mark the operation finished, and report it to its recorder (only the first time)."""
+
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._start
+        self.attributes.setdefault("status", status)
+        if self.recorder is not None:
+            self.recorder.report(self)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "started_at": datetime.fromtimestamp(
+                self.started_at, tz=timezone.utc
+            ).isoformat(),
+            "duration": self.duration,
+            **self.attributes,
+            "phases": dict(self.phases),
+            "counters": dict(self.counters),
+        }
+
+
+def phase(metrics: OperationMetrics | None, name: str) -> AbstractContextManager[None]:
+    """Time the block as phase `name` of `metrics`, if there are metrics to record to."""
+
+    return metrics.phase(name) if metrics is not None else nullcontext()
+
+
+class MetricsRecorder:
+    """Reports the metrics of finished operations to hooks, a logger and a JSON-lines file.
+
+    Each finished operation is reported as a dict (see `OperationMetrics.to_dict()`): it is passed
+    to every hook added with `add_hook()`, logged at DEBUG level by the
+    `harlequin_databricks.metrics` logger (with the dict as the `metrics` attribute of the log
+    record), and appended as a line of JSON to `log_path` if set.
+    """
+
+    def __init__(self, log_path: Path | None = None) -> None:
+        self.log_path = log_path
+        self.hooks: list[Callable[[dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Callable[[dict[str, Any]], None]) -> None:
+        self.hooks.append(hook)
+
+    def start(self, operation: str, **attributes: Any) -> OperationMetrics:
+        return OperationMetrics(operation, attributes, recorder=self)
+
+    @contextmanager
+    def operation(
+        self, operation: str, **attributes: Any
+    ) -> Iterator[OperationMetrics]:
+        """Record the block as an operation, finishing it with status "error" if it raises."""
+
+        metrics = self.start(operation, **attributes)
+        try:
+            yield metrics
+        except BaseException:
+            metrics.finish("error")
+            raise
+        metrics.finish()
+
+    def report(self, metrics: OperationMetrics) -> None:
+        if (
+            not self.hooks
+            and self.log_path is None
+            and not logger.isEnabledFor(logging.DEBUG)
+        ):
+            return
+        record = metrics.to_dict()
+        logger.debug(
+            "%s finished in %.3fs: %s",
+            metrics.operation,
+            metrics.duration,
+            record,
+            extra={"metrics": record},
+        )
+        for hook in list(self.hooks):
+            try:
+                hook(record)
+            except Exception:  # noqa: PERF203
+                # a broken hook must not break queries or indexing:
+                logger.exception("Metrics hook %r failed", hook)
+        if self.log_path is not None:
+            line = json.dumps(record, default=str)
+            try:
+                with self._lock, self.log_path.open("a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            except OSError:
+                logger.warning(
+                    "Could not write metrics to %s", self.log_path, exc_info=True
+                )
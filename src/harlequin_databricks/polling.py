@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from harlequin.exception import HarlequinQueryError
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from databricks.sql.client import Cursor as DatabricksCursor
+
+    from harlequin_databricks.cursors import CursorRegistry
+    from harlequin_databricks.metrics import OperationMetrics
+
+# The state of a query submitted asynchronously is polled first after this many seconds, then at
+# intervals growing by POLL_BACKOFF up to POLL_MAX_INTERVAL, so short queries return promptly
+# without long queries costing a status RPC every fraction of a second:
+POLL_INITIAL_INTERVAL = 0.05
+POLL_BACKOFF = 1.25
+POLL_MAX_INTERVAL = 1.0
+
+_PENDING_STATES = frozenset({"PENDING", "RUNNING"})
+_CANCELLED_STATES = frozenset({"CANCELLED", "CLOSED"})
+
+
+@dataclass(frozen=True)
+class QueryProgress:
+    """The state of a running query, reported after each poll (e.g. "PENDING" or "RUNNING")."""
+
+    query_id: str | None
+    state: str
+    elapsed: float
+
+
+def wait_for_query(
+    cursor: DatabricksCursor,
+    cursors: CursorRegistry,
+    on_progress: Callable[[QueryProgress], None],
+    metrics: OperationMetrics | None = None,
+) -> bool:
+    """Poll a query submitted with `cursor.execute_async()` until it finishes.
+
+    The state of the query and the time elapsed since polling started are passed to `on_progress`
+    after each poll. Between polls the thread waits on `cursors`, so it wakes as soon as the cursor
+    is cancelled rather than at the next poll. Errors of failed queries are raised by the connector
+    when polling their state.
+
+    Returns False if the query was cancelled, and True once the first batch of its result has been
+    fetched, ready for `fetchall()`.
+    """
+
+    start = time.perf_counter()
+    interval = POLL_INITIAL_INTERVAL
+    while True:
+        if metrics is not None:
+            metrics.count("rpcs")
+            metrics.count("polls")
+        state = cursor.get_query_state().name
+        on_progress(QueryProgress(cursor.query_id, state, time.perf_counter() - start))
+        if state not in _PENDING_STATES:
+            break
+        if cursors.wait_cancelled(cursor, interval):
+            return False  # user pressed `Cancel Query` button
+        interval = min(interval * POLL_BACKOFF, POLL_MAX_INTERVAL)
+    if state in _CANCELLED_STATES:
+        return False
+    if metrics is not None:
+        # polls the state once more, then fetches the first batch of the result:
+        metrics.count("rpcs", 2)
+    cursor.get_async_execution_result()  # type: ignore[no-untyped-call]
+    return True
+
+
+class PendingQuery:
+    """A query submitted with `cursor.execute_async()`, which may still be running on Databricks.
+
+    The cursor is held live in `cursors` (so `cancel()` reaches it) from submission until
+    `wait()` returns. `wait()` polls the query until it finishes, once: later calls return (or
+    raise) the same outcome straight away.
+    """
+
+    def __init__(
+        self,
+        cursor: DatabricksCursor,
+        cursors: CursorRegistry,
+        on_progress: Callable[[QueryProgress], None],
+        metrics: OperationMetrics | None = None,
+    ) -> None:
+        self.cursor = cursor
+        self.cursors = cursors
+        self.on_progress = on_progress
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._finished: bool | None = None
+        self._error: HarlequinQueryError | None = None
+        cursors.hold(cursor)
+
+    def wait(self) -> bool:
+        """Wait for the query to finish, returning False if it was cancelled.
+
+        Raises HarlequinQueryError if the query failed.
+        """
+
+        from databricks import sql as databricks_sql
+
+        with self._lock:
+            if self._finished is None:
+                try:
+                    self._finished = wait_for_query(
+                        self.cursor, self.cursors, self.on_progress, self.metrics
+                    )
+                except databricks_sql.Error as e:
+                    self._finished = False
+                    if not self.cursors.cancelled(self.cursor):
+                        self._error = HarlequinQueryError(
+                            msg=repr(e),
+                            title="Harlequin encountered an error while querying Databricks.",
+                        )
+                finally:
+                    self.cursors.release(self.cursor)
+            if self._error is not None:
+                raise self._error
+            return self._finished
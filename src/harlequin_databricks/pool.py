@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, suppress
+from queue import LifoQueue
+from typing import TYPE_CHECKING, TypeVar
+
+from harlequin_databricks.cursors import CursorRegistry
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from databricks.sql.client import Connection as DatabricksConnection
+    from databricks.sql.client import Cursor as DatabricksCursor
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class ConnectionPool:
+    """A bounded pool of Databricks connections for issuing metadata calls concurrently.
+
+    Databricks connections cannot be shared between threads, so each concurrent metadata call
+    gets its own connection. The pool starts with the connection passed in (if any), and lazily
+    opens extra connections using `connect` as they are needed, up to `size` connections in all.
+    Only the extra connections are closed by `close()`. The cursors making calls are tracked in
+    `cursors`, so a call in flight on the connection passed in can be cancelled too.
+    """
+
+    def __init__(
+        self,
+        conn: DatabricksConnection | None,
+        connect: Callable[[], DatabricksConnection],
+        size: int,
+        cursors: CursorRegistry | None = None,
+    ) -> None:
+        self.size = max(size, 1)
+        self.cursors = cursors if cursors is not None else CursorRegistry()
+        self.closed = False
+        self._connect = connect
+        self._idle: LifoQueue[DatabricksConnection] = LifoQueue()
+        self._max_extra_conns = self.size
+        if conn is not None:
+            self._idle.put(conn)
+            self._max_extra_conns -= 1
+        self._extra_conns: list[DatabricksConnection] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> DatabricksConnection:
+        with self._lock:
+            can_grow = (
+                self._idle.empty() and len(self._extra_conns) < self._max_extra_conns
+            )
+            if can_grow:
+                conn = self._connect()
+                self._extra_conns.append(conn)
+                return conn
+        return self._idle.get()
+
+    @contextmanager
+    def cursor(self) -> Iterator[DatabricksCursor]:
+        conn = self._acquire()
+        try:
+            with conn.cursor() as cursor, self.cursors.track(cursor):
+                yield cursor
+        finally:
+            self._idle.put(conn)
+
+    def map(
+        self,
+        fn: Callable[[DatabricksCursor, T], R | None],
+        items: Iterable[T],
+    ) -> list[R] | None:
+        """Call `fn(cursor, item)` for each item, spread over the pool's connections.
+
+        Results are returned in the same order as `items`, however the calls were scheduled. If any
+        call returns None (e.g. because the user pressed the `Cancel Query` button), or fails
+        after the pool was closed, this method returns None.
+        """
+
+        def call(item: T) -> R | None:
+            if self.closed:
+                return None
+            try:
+                with self.cursor() as cursor:
+                    return fn(cursor, item)
+            except Exception:
+                if self.closed:  # connection was closed under us by `cancel()`
+                    return None
+                raise
+
+        items = list(items)
+        if self.size == 1 or len(items) <= 1:
+            results = [call(item) for item in items]
+        else:
+            with ThreadPoolExecutor(max_workers=self.size) as executor:
+                results = list(executor.map(call, items))
+
+        if any(result is None for result in results):
+            return None
+        return [result for result in results if result is not None]
+
+    def close(self) -> None:
+        self.closed = True
+        with self._lock:
+            extra_conns, self._extra_conns = self._extra_conns, []
+        for conn in extra_conns:
+            with suppress(Exception):
+                conn.close()
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import cProfile
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from itertools import count
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+    from contextlib import AbstractContextManager
+    from types import FrameType
+
+# Environment variable naming a directory to write profiles to, as an alternative to the
+# `--profile-dir` CLI option:
+PROFILE_DIR_ENV_VAR = "HARLEQUIN_DATABRICKS_PROFILE_DIR"
+
+# Seconds between samples of the profiled thread's call stack, for the collapsed-stack file:
+SAMPLE_INTERVAL = 0.001
+
+logger = logging.getLogger(__name__)
+
+
+class _StackSampler(threading.Thread):
+    """Samples the call stack of one thread at a fixed interval, counting each distinct stack."""
+
+    def __init__(self, thread_id: int, interval: float) -> None:
+        super().__init__(name="harlequin-databricks-profiler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)  # noqa: SLF001
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+
+
+def _collapse(frame: FrameType | None) -> str:
+    """Return a call stack as `outermost;...;innermost`, each frame as `function (file:line)`."""
+
+    frames: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        label = f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+        frames.append(label.replace(";", ":"))
+        frame = frame.f_back
+    return ";".join(reversed(frames))
+
+
+class Profiler:
+    """Captures profiles of slow operations, for attaching to performance bug reports.
+
+    Each profiled operation writes two files to `directory`, named after the time it started and
+    the operation (e.g. `20261018T091203.512-0-get_catalog`):
+
+    - a `.pstats` file from the deterministic `cProfile` profiler, which can be explored with
+      `python -m pstats` or tools like `snakeviz`;
+    - a `.collapsed` file of call stacks sampled every `interval` seconds, in the collapsed-stack
+      format read by flame graph tools like `flamegraph.pl` or speedscope.
+
+    Only the thread running the operation is profiled, and only one operation at a time: an
+    operation starting while another is profiled runs unprofiled.
+    """
+
+    def __init__(self, directory: Path, interval: float = SAMPLE_INTERVAL) -> None:
+        self.directory = directory
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._sequence = count()
+
+    @contextmanager
+    def profile(self, operation: str) -> Iterator[None]:
+        if not self._lock.acquire(blocking=False):
+            yield
+            return
+        try:
+            started_at = time.time()
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:  # another profiler is active on this thread
+                yield
+                return
+            sampler = _StackSampler(threading.get_ident(), self.interval)
+            sampler.start()
+            try:
+                yield
+            finally:
+                profile.disable()
+                sampler.stop()
+                self._write(operation, started_at, profile, sampler.stacks)
+        finally:
+            self._lock.release()
+
+    def _write(
+        self,
+        operation: str,
+        started_at: float,
+        profile: cProfile.Profile,
+        stacks: Counter[str],
+    ) -> None:
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(started_at))
+        milliseconds = int(started_at % 1 * 1000)
+        # the sequence number keeps the names of operations started in the same millisecond apart:
+        stem = f"{stamp}.{milliseconds:03d}-{next(self._sequence)}-{operation}"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            profile.dump_stats(self.directory / f"{stem}.pstats")
+            with (self.directory / f"{stem}.collapsed").open(
+                "w", encoding="utf-8"
+            ) as f:
+                f.writelines(
+                    f"{stack} {samples}\n" for stack, samples in stacks.items()
+                )
+        except OSError:
+            logger.warning(
+                "Could not write profile of %s to %s",
+                operation,
+                self.directory,
+                exc_info=True,
+            )
+            return
+        logger.info("Wrote profile of %s to %s", operation, self.directory / stem)
+
+
+def profile(profiler: Profiler | None, operation: str) -> AbstractContextManager[None]:
+    """Profile the block as `operation`, if profiling is on."""
+
+    return profiler.profile(operation) if profiler is not None else nullcontext()
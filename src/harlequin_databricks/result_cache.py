@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+
+import pyarrow as pa
+from platformdirs import user_cache_dir
+
+CACHE_VERSION = b"1"
+
+
+def result_cache_key(
+    identity: str, catalog: str, schema: str, normalized_sql: str
+) -> str:
+    """Hash a query and the session it runs in into a key for the result cache."""
+
+    key = f"{identity}\x1f{catalog}\x1f{schema}\x1f{normalized_sql}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CachedResult:
+    """A query result served from the result cache.
+
+    `complete` is False if the result was fetched under a row limit it reached, so it may be
+    missing rows beyond that limit.
+    """
+
+    table: pa.Table
+    columns: list[tuple[str, str]]
+    complete: bool
+
+
+class ResultCache:
+    """An on-disk cache of query results, stored as compressed Arrow IPC files.
+
+    Results older than `ttl` seconds are ignored. Reading a result marks it as recently used, and
+    after each save the least recently used results are deleted until the cache directory holds
+    at most `max_bytes`.
+
+    `clear()` deletes every result and bumps `generation`; a result saved with an older generation
+    (i.e. fetched from a query run before the cache was cleared) is discarded.
+    """
+
+    def __init__(
+        self, ttl: float, max_bytes: int, cache_dir: Path | None = None
+    ) -> None:
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_dir = (
+            cache_dir
+            if cache_dir is not None
+            else Path(user_cache_dir(appname="harlequin-databricks")) / "results"
+        )
+        self.generation = 0
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.arrow"
+
+    def load(self, key: str) -> CachedResult | None:
+        path = self._path(key)
+        try:
+            with pa.memory_map(str(path), "r") as source:
+                table = pa.ipc.open_file(source).read_all()
+            metadata = table.schema.metadata or {}
+            if metadata.get(b"harlequin_databricks_cache_version") != CACHE_VERSION:
+                return None
+            if time.time() - float(metadata[b"created_at"]) > self.ttl:
+                path.unlink()
+                return None
+            columns = [
+                (str(name), str(type_label))
+                for name, type_label in json.loads(metadata[b"columns"])
+            ]
+            complete = metadata[b"complete"] == b"1"
+            os.utime(path)  # mark as recently used
+        except (OSError, KeyError, ValueError, pa.ArrowInvalid):
+            return None
+        return CachedResult(
+            table=table.replace_schema_metadata(None),
+            columns=columns,
+            complete=complete,
+        )
+
+    def save(
+        self,
+        key: str,
+        table: pa.Table,
+        columns: list[tuple[str, str]],
+        *,
+        complete: bool,
+        generation: int | None = None,
+    ) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        table = table.replace_schema_metadata(
+            {
+                "harlequin_databricks_cache_version": CACHE_VERSION,
+                "created_at": str(time.time()),
+                "columns": json.dumps(columns),
+                "complete": "1" if complete else "0",
+            }
+        )
+        path = self._path(key)
+        try:
+            # the cached data is only readable by the user, like the OAuth token cache:
+            self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            self.cache_dir.chmod(0o700)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.unlink(missing_ok=True)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            options = pa.ipc.IpcWriteOptions(compression="zstd")
+            with (
+                os.fdopen(fd, "wb") as sink,
+                pa.ipc.new_file(sink, table.schema, options=options) as writer,
+            ):
+                writer.write_table(table)
+            if tmp_path.stat().st_size > self.max_bytes:
+                tmp_path.unlink()
+                return
+            tmp_path.replace(path)
+            self._evict()
+        except OSError:
+            return
+
+    def clear(self) -> None:
+        """Delete every cached result, e.g. once a statement may have changed the data."""
+
+        self.generation += 1
+        for path in self.cache_dir.glob("*.arrow"):
+            with suppress(OSError):
+                path.unlink()
+
+    def _evict(self) -> None:
+        cache_files = sorted(
+            self.cache_dir.glob("*.arrow"),
+            key=lambda path: path.stat().st_mtime,
+            reverse=True,
+        )
+        total_bytes = 0
+        for path in cache_files:
+            total_bytes += path.stat().st_size
+            if total_bytes > self.max_bytes:
+                path.unlink()
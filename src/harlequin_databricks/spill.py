@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import atexit
+import os
+import tempfile
+from contextlib import suppress
+from pathlib import Path
+
+import pyarrow as pa
+
+
+def _remove(path: Path) -> None:
+    with suppress(OSError):
+        path.unlink()
+
+
+class SpillFile:
+    """A temporary Arrow IPC file that fetched record batches are spilled to.
+
+    Batches are appended with `write()`, then `read()` returns the whole result as a table that is
+    memory-mapped from the file, without copying: its pages are read from disk as they are
+    accessed, and can be evicted by the OS again, so a result larger than the memory budget can
+    still be scrolled in full.
+
+    The file is deleted as soon as it is mapped (the mapping keeps its data readable until the
+    table is garbage collected), or at exit on platforms which cannot delete mapped files. `close()`
+    deletes it if the result is abandoned instead (e.g. the query was cancelled).
+    """
+
+    def __init__(self, schema: pa.Schema, directory: Path | None = None) -> None:
+        fd, name = tempfile.mkstemp(
+            prefix="harlequin-databricks-", suffix=".arrow", dir=directory
+        )
+        os.close(fd)
+        self.path = Path(name)
+        self.num_bytes = 0
+        self._writer: pa.ipc.RecordBatchFileWriter | None = pa.ipc.new_file(
+            str(self.path), schema
+        )
+
+    def write(self, batch: pa.RecordBatch) -> None:
+        assert self._writer is not None
+        self._writer.write_batch(batch)
+        self.num_bytes += batch.nbytes
+
+    def read(self) -> pa.Table:
+        """Finish the file, and return its batches as a memory-mapped, zero-copy table."""
+
+        assert self._writer is not None
+        self._writer.close()
+        self._writer = None
+        with pa.memory_map(str(self.path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        try:
+            self.path.unlink()
+        except OSError:  # e.g. Windows, where mapped files cannot be deleted
+            atexit.register(_remove, self.path)
+        return table
+
+    def close(self) -> None:
+        """Delete the file, unless it has already been read."""
+
+        if self._writer is None:
+            return
+        with suppress(Exception):
+            self._writer.close()
+        self._writer = None
+        _remove(self.path)
+
+
+class ResultBuffer:
+    """Collects the record batches of a query result, spilling them to disk past `spill_bytes`.
+
+    Batches are held in memory, and assembled into a chunked table without copying them, until
+    more than `spill_bytes` have been appended (if given). From then on all batches are written to
+    a SpillFile instead, and the table is memory-mapped from it.
+    """
+
+    def __init__(self, spill_bytes: int | None = None) -> None:
+        self.spill_bytes = spill_bytes
+        self.batches: list[pa.RecordBatch] = []
+        self.spill: SpillFile | None = None
+        self.num_rows = 0
+        self.num_bytes = 0
+        self.num_batches = 0
+
+    def append(self, batch: pa.RecordBatch) -> None:
+        self.num_rows += batch.num_rows
+        self.num_bytes += batch.nbytes
+        self.num_batches += 1
+        if (
+            self.spill is None
+            and self.spill_bytes is not None
+            and self.num_bytes > self.spill_bytes
+        ):
+            self.spill = SpillFile(batch.schema)
+            for spilled_batch in self.batches:
+                self.spill.write(spilled_batch)
+            self.batches = []
+        if self.spill is not None:
+            self.spill.write(batch)
+        else:
+            self.batches.append(batch)
+
+    def to_table(self, schema: pa.Schema | None = None) -> pa.Table:
+        if self.spill is not None:
+            return self.spill.read()
+        return pa.Table.from_batches(self.batches, schema=schema)
+
+    def close(self) -> None:
+        """Delete the spill file, unless the table has been read from it."""
+
+        if self.spill is not None:
+            self.spill.close()
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+# Statements which only read data, so can run concurrently and (if deterministic) be served from
+# the result cache:
+READ_ONLY_STATEMENTS = frozenset({"select", "with", "values", "table", "from"})
+
+# Read-only statements whose row limit can be pushed down to the warehouse:
+LIMIT_PUSHDOWN_STATEMENTS = frozenset({"select", "with"})
+
+# Functions whose results differ between runs of the same query:
+NON_DETERMINISTIC_FUNCTIONS = frozenset(
+    {
+        "current_date",
+        "current_time",
+        "current_timestamp",
+        "current_timezone",
+        "curdate",
+        "getdate",
+        "localtimestamp",
+        "now",
+        "rand",
+        "randn",
+        "random",
+        "randstr",
+        "shuffle",
+        "try_reflect",
+        "reflect",
+        "java_method",
+        "uniform",
+        "unix_timestamp",
+        "uuid",
+        "monotonically_increasing_id",
+        "spark_partition_id",
+        "input_file_name",
+        "input_file_block_length",
+        "input_file_block_start",
+        "current_user",
+        "session_user",
+        "user",
+        "is_member",
+        "is_account_group_member",
+        "ai_query",
+    }
+)
+
+# Keywords of statements that write data or change the schema, which may be nested in a `WITH`:
+WRITE_KEYWORDS = frozenset(
+    {"insert", "update", "delete", "merge", "create", "drop", "alter", "truncate"}
+)
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def _tokens(sql: str) -> Iterator[tuple[str, str]]:
+    """Split SQL into (kind, text) tokens, where kind is "quoted", "comment", "space" or "code".
+
+    Quoted tokens are string literals or quoted identifiers, including their quotes. Databricks
+    escapes quotes inside string literals with backslashes, and inside backtick-quoted identifiers
+    by doubling them.
+    """
+
+    i, n = 0, len(sql)
+    while i < n:
+        char = sql[i]
+        if char in "'\"`":
+            j = i + 1
+            while j < n:
+                if sql[j] == "\\" and char != "`":
+                    j += 2
+                    continue
+                if sql[j] == char:
+                    if char == "`" and sql[j + 1 : j + 2] == "`":
+                        j += 2
+                        continue
+                    break
+                j += 1
+            yield "quoted", sql[i : j + 1]
+            i = j + 1
+        elif sql.startswith("--", i):
+            j = sql.find("\n", i)
+            j = n if j < 0 else j
+            yield "comment", sql[i:j]
+            i = j
+        elif sql.startswith("/*", i):
+            j = sql.find("*/", i + 2)
+            j = n if j < 0 else j + 2
+            yield "comment", sql[i:j]
+            i = j
+        elif char.isspace():
+            j = i + 1
+            while j < n and sql[j].isspace():
+                j += 1
+            yield "space", sql[i:j]
+            i = j
+        else:
+            j = i + 1
+            while (
+                j < n
+                and sql[j] not in "'\"`"
+                and not sql[j].isspace()
+                and not sql.startswith(("--", "/*"), j)
+            ):
+                j += 1
+            yield "code", sql[i:j]
+            i = j
+
+
+def normalize_sql(sql: str) -> str:
+    """Normalize SQL text, so trivially different spellings of a query compare equal.
+
+    Comments are dropped, runs of whitespace collapse to a single space, unquoted text is
+    lower-cased (Databricks SQL keywords and identifiers are case-insensitive) and trailing
+    semicolons are removed. String literals and quoted identifiers are left untouched.
+    """
+
+    parts: list[str] = []
+    for kind, text in _tokens(sql):
+        if kind in {"space", "comment"}:
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+        elif kind == "quoted":
+            parts.append(text)
+        else:
+            parts.append(text.lower())
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def _read_only_words(sql: str) -> list[str] | None:
+    """Return the words of the code of `sql` if it is a single read-only query, else None."""
+
+    code = " ".join(text for kind, text in _tokens(sql) if kind == "code").lower()
+    words = _WORD.findall(code)
+    if not words or words[0] not in READ_ONLY_STATEMENTS:
+        return None
+    if ";" in code.rstrip().rstrip(";"):
+        return None  # more than one statement
+    if not WRITE_KEYWORDS.isdisjoint(words):
+        return None
+    return words
+
+
+def is_read_only(sql: str) -> bool:
+    """Return True if `sql` is a single query which neither writes data nor changes the session."""
+
+    return _read_only_words(sql) is not None
+
+
+def is_cacheable(sql: str) -> bool:
+    """Return True if `sql` is a single read-only query without non-deterministic functions."""
+
+    words = _read_only_words(sql)
+    return words is not None and NON_DETERMINISTIC_FUNCTIONS.isdisjoint(words)
+
+
+def supports_limit_pushdown(sql: str) -> bool:
+    """Return True if `sql` is a single read-only `SELECT` or `WITH` query."""
+
+    words = _read_only_words(sql)
+    return words is not None and words[0] in LIMIT_PUSHDOWN_STATEMENTS
+
+
+def split_statements(sql: str) -> list[str]:
+    """Split a SQL script into its statements, on semicolons outside quotes and comments.
+
+    Statements are stripped of surrounding whitespace, and statements containing nothing but
+    comments are dropped.
+    """
+
+    statements: list[str] = []
+    parts: list[str] = []
+    has_code = False
+    for kind, text in _tokens(sql):
+        if kind != "code" or ";" not in text:
+            parts.append(text)
+            has_code = has_code or kind in {"code", "quoted"}
+            continue
+        *ends, rest = text.split(";")
+        for end in ends:
+            parts.append(end)
+            if has_code or end:
+                statements.append("".join(parts).strip())
+            parts, has_code = [], False
+        parts.append(rest)
+        has_code = bool(rest)
+    if has_code:
+        statements.append("".join(parts).strip())
+    return statements
+
+
+def strip_comments(sql: str) -> str:
+    """Drop the comments from SQL text, and collapse runs of whitespace into single spaces."""
+
+    parts = [
+        " " if kind in {"space", "comment"} else text for kind, text in _tokens(sql)
+    ]
+    return re.sub(" +", " ", "".join(parts)).strip()
+
+
+def statement_type(sql: str) -> str:
+    """Return the lower-cased first keyword of a SQL statement (e.g. "select"), or ""."""
+
+    for kind, text in _tokens(sql):
+        if kind == "code" and text.strip():
+            word = _WORD.search(text)
+            return word.group(0).lower() if word else ""
+        if kind == "quoted":
+            return ""
+    return ""
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from databricks.sql.experimental.oauth_persistence import OAuthPersistence, OAuthToken
+from platformdirs import user_cache_dir
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+# Cached M2M tokens are refreshed in the background once they are this many seconds from expiry,
+# so connecting never waits on a token exchange while the cached token is still valid:
+TOKEN_REFRESH_MARGIN = 300.0
+
+
+def token_cache_key(host: str, client_id: str) -> str:
+    """Hash a workspace host and OAuth client id into a key, so neither appears in file names."""
+
+    key = f"{host}\x1f{client_id}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedToken:
+    """An OAuth access token, with its expiry as a Unix timestamp (0 if unknown)."""
+
+    access_token: str
+    expiry: float = 0.0
+    refresh_token: str | None = None
+
+    def expires_within(self, seconds: float) -> bool:
+        return self.expiry > 0 and self.expiry - time.time() <= seconds
+
+
+class TokenCache:
+    """An on-disk cache of OAuth tokens, stored as one JSON file per host & client id.
+
+    The cache directory is restricted to its owner, and each token file is written with mode 0600
+    to a temporary file which is then moved into place, so a token is never readable by other
+    users, nor seen half-written.
+    """
+
+    def __init__(self, cache_dir: Path | None = None) -> None:
+        self.cache_dir = (
+            cache_dir
+            if cache_dir is not None
+            else Path(user_cache_dir(appname="harlequin-databricks")) / "tokens"
+        )
+
+    def _path(self, host: str, client_id: str) -> Path:
+        return self.cache_dir / f"{token_cache_key(host, client_id)}.json"
+
+    def load(self, host: str, client_id: str) -> CachedToken | None:
+        try:
+            data = json.loads(self._path(host, client_id).read_text(encoding="utf-8"))
+            refresh_token = data.get("refresh_token")
+            return CachedToken(
+                access_token=str(data["access_token"]),
+                expiry=float(data.get("expiry", 0.0)),
+                refresh_token=str(refresh_token) if refresh_token is not None else None,
+            )
+        except (OSError, KeyError, ValueError, TypeError, AttributeError):
+            return None
+
+    def save(self, host: str, client_id: str, token: CachedToken) -> None:
+        path = self._path(host, client_id)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+            self.cache_dir.chmod(0o700)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(asdict(token), f)
+            tmp_path.replace(path)
+        except OSError:
+            logger.debug(
+                "Could not cache OAuth token in %s", self.cache_dir, exc_info=True
+            )
+            tmp_path.unlink(missing_ok=True)
+
+
+class CachedTokenSource:
+    """Serve an OAuth M2M access token, minting new tokens with `fetch` only when needed.
+
+    Tokens are kept in memory and in `cache` (if given), so reconnecting, in this process or the
+    next, reuses an unexpired token rather than exchanging the client secret for a new one. A
+    token within `refresh_margin` seconds of expiry is still served while a new one is fetched in
+    a background thread: only a missing or expired token is fetched before returning.
+    """
+
+    def __init__(
+        self,
+        cache: TokenCache | None,
+        host: str,
+        client_id: str,
+        fetch: Callable[[], CachedToken],
+        refresh_margin: float = TOKEN_REFRESH_MARGIN,
+    ) -> None:
+        self.cache = cache
+        self.host = host
+        self.client_id = client_id
+        self.fetch = fetch
+        self.refresh_margin = refresh_margin
+        self._lock = threading.Lock()
+        self._token: CachedToken | None = None
+        self._refresh: threading.Thread | None = None
+
+    def token(self) -> CachedToken:
+        with self._lock:
+            if self._token is None and self.cache is not None:
+                self._token = self.cache.load(self.host, self.client_id)
+            token = self._token
+            if token is None or token.expires_within(0):
+                token = self.fetch()
+                self._store(token)
+            elif token.expires_within(self.refresh_margin) and (
+                self._refresh is None or not self._refresh.is_alive()
+            ):
+                self._refresh = threading.Thread(
+                    target=self._refresh_token, daemon=True
+                )
+                self._refresh.start()
+            return token
+
+    def headers(self) -> dict[str, str]:
+        """Return the HTTP headers authenticating a request, for the connector to add."""
+
+        return {"Authorization": f"Bearer {self.token().access_token}"}
+
+    def _refresh_token(self) -> None:
+        try:
+            token = self.fetch()
+        except Exception:
+            # the cached token is still served, then fetched in the foreground once expired:
+            logger.warning(
+                "Could not refresh the OAuth token in the background", exc_info=True
+            )
+            return
+        with self._lock:
+            self._store(token)
+
+    def _store(self, token: CachedToken) -> None:
+        self._token = token
+        if self.cache is not None:
+            self.cache.save(self.host, self.client_id, token)
+
+
+class TokenCachePersistence(OAuthPersistence):
+    """Persist the connector's OAuth U2M tokens in a TokenCache, keyed by host & `client_id`.
+
+    The connector refreshes the access token itself once it expires, using the refresh token, so
+    a cached refresh token spares a browser login each time Harlequin connects.
+    """
+
+    def __init__(self, cache: TokenCache, client_id: str) -> None:
+        self.cache = cache
+        self.client_id = client_id
+
+    def persist(self, hostname: str, oauth_token: OAuthToken) -> None:
+        self.cache.save(
+            hostname,
+            self.client_id,
+            CachedToken(
+                access_token=oauth_token.access_token,
+                refresh_token=oauth_token.refresh_token,
+            ),
+        )
+
+    def read(self, hostname: str) -> OAuthToken | None:
+        token = self.cache.load(hostname, self.client_id)
+        if token is None or token.refresh_token is None:
+            return None
+        return OAuthToken(token.access_token, token.refresh_token)  # type: ignore[no-untyped-call]
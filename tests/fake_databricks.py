@@ -0,0 +1,738 @@
+from __future__ import annotations
+
+import math
+import random
+import re
+import threading
+import time
+import uuid
+import weakref
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import pyarrow as pa
+import pyarrow.compute as pc
+from databricks import sql as databricks_sql
+from databricks.sql.backend.types import CommandState
+
+from harlequin_databricks.adapter import (
+    HarlequinDatabricksAdapter,
+    HarlequinDatabricksConnection,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+UNITY_TABLE_TYPES = ("MANAGED", "EXTERNAL", "VIEW")
+LEGACY_TABLE_TYPES = ("TABLE", "TABLE", "VIEW")
+DATA_TYPES = (
+    "STRING",
+    "BIGINT",
+    "DOUBLE",
+    "TIMESTAMP",
+    "DATE",
+    "BOOLEAN",
+    "DECIMAL(38,6)",
+)
+
+TABLES_SCHEMA = pa.schema(
+    [
+        ("table_catalog", pa.string()),
+        ("table_schema", pa.string()),
+        ("table_name", pa.string()),
+        ("table_type", pa.string()),
+        ("last_altered", pa.timestamp("us", tz="Etc/UTC")),
+    ]
+)
+COLUMNS_SCHEMA = pa.schema(
+    [
+        ("table_catalog", pa.string()),
+        ("table_schema", pa.string()),
+        ("table_name", pa.string()),
+        ("column_name", pa.string()),
+        ("ordinal_position", pa.int64()),
+        ("data_type", pa.string()),
+    ]
+)
+
+# 2024-01-01T00:00:00Z, the `last_altered` timestamp of the first generated table:
+_EPOCH_US = 1_704_067_200_000_000
+
+_INFORMATION_SCHEMA = re.compile(
+    r"FROM\s+system\.information_schema\.(tables|columns)", re.IGNORECASE
+)
+_STRING = r"'((?:[^'\\]|\\.)*)'"
+_KEY_TUPLE = re.compile(rf"\(\s*{_STRING}\s*,\s*{_STRING}\s*,\s*{_STRING}\s*\)")
+_RANGE = re.compile(r"\brange\(\s*(\d+)\s*\)", re.IGNORECASE)
+_EXECUTION_TIME = re.compile(r"/\*\s*execution_time\s*=\s*([0-9.]+)\s*\*/")
+_NAMESPACE = re.compile(
+    r"SELECT\s+current_catalog\(\)\s*,\s*current_schema\(\)", re.IGNORECASE
+)
+_FROM = re.compile(r"\bFROM\s+([\w.]+)", re.IGNORECASE)
+_USE = re.compile(
+    r"^\s*USE\s+(?:(CATALOG|SCHEMA|DATABASE)\s+)?([\w`.]+)\s*$", re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class MetastoreShape:
+    """The shape of a synthetic metastore.
+
+    Every catalog has `num_schemas` schemas, every schema `num_tables` tables and every table
+    `num_cols` columns. Catalogs are named `{catalog_prefix}{i}`, with zero-padded indexes so the
+    names sort in the order they were generated.
+    """
+
+    num_catalogs: int
+    num_schemas: int
+    num_tables: int
+    num_cols: int
+    catalog_prefix: str = "cat"
+
+    @property
+    def total_tables(self) -> int:
+        return self.num_catalogs * self.num_schemas * self.num_tables
+
+    @property
+    def total_cols(self) -> int:
+        return self.total_tables * self.num_cols
+
+
+# Metastores from 1k to 1M columns, in two flavors: "wide" trees are a few schemas of wide tables,
+# and "deep" trees fan out over many catalogs, schemas & tables of a handful of columns each.
+SHAPES: dict[str, MetastoreShape] = {
+    "wide-1k": MetastoreShape(1, 1, 2, 500),
+    "deep-1k": MetastoreShape(5, 5, 10, 4),
+    "wide-10k": MetastoreShape(1, 2, 10, 500),
+    "deep-10k": MetastoreShape(10, 10, 25, 4),
+    "wide-100k": MetastoreShape(1, 4, 50, 500),
+    "deep-100k": MetastoreShape(20, 25, 50, 4),
+    "wide-1m": MetastoreShape(2, 10, 100, 500),
+    "deep-1m": MetastoreShape(50, 50, 100, 4),
+}
+
+
+@dataclass(frozen=True)
+class NetworkProfile:
+    """The simulated latency and failures of the network & warehouse behind a FakeMetastore.
+
+    Every RPC takes `rtt` seconds, and opening a session takes `connect_round_trips` of them.
+    Queries run for `execution_time` seconds on the warehouse (or the seconds given by an
+    `/* execution_time=N */` comment in the query) before they return, and the metadata calls
+    listing schemas, tables & columns for `metadata_time` seconds. Results are delivered in batches
+    of `batch_rows` rows, one round trip per batch, at `rows_per_second` (or instantly if None). A
+    `failure_rate` fraction of queries fail with a DatabaseError of `failure_message` (e.g.
+    "Invalid SessionHandle" to simulate expired sessions). Cancelling a query takes `cancel_time`
+    seconds on the warehouse on top of its round trip, or fails if `cancel_fails`. With
+    `late_command_ids`, cursors only get the command id of a call once it returns (as with some
+    connector backends), so a call in flight can only be stopped by closing its connection.
+    """
+
+    rtt: float = 0.0
+    connect_round_trips: int = 3
+    execution_time: float = 0.0
+    metadata_time: float = 0.0
+    batch_rows: int = 100_000
+    rows_per_second: float | None = None
+    failure_rate: float = 0.0
+    failure_message: str = "Simulated failure"
+    cancel_time: float = 0.0
+    cancel_fails: bool = False
+    late_command_ids: bool = False
+    seed: int = 0
+
+    def transfer_time(self, start: int, stop: int) -> float:
+        """Return how long it takes to deliver rows `start` to `stop` of a result."""
+
+        round_trips = math.ceil(stop / self.batch_rows) - math.ceil(
+            start / self.batch_rows
+        )
+        rate_time = (stop - start) / self.rows_per_second if self.rows_per_second else 0
+        return round_trips * self.rtt + rate_time
+
+
+def _operation_cancelled() -> databricks_sql.DatabaseError:
+    # the error the Databricks Python SQL Connector raises for queries cancelled mid-flight:
+    return databricks_sql.DatabaseError(  # type: ignore[no-untyped-call]
+        "Invalid OperationHandle: the operation was cancelled"
+    )
+
+
+def _type_name(data_type: pa.DataType) -> str:
+    """Return the Databricks name of an Arrow type, as in a cursor's `description`."""
+
+    if pa.types.is_int64(data_type):
+        return "bigint"
+    if pa.types.is_int32(data_type):
+        return "int"
+    if pa.types.is_string(data_type) or pa.types.is_large_string(data_type):
+        return "string"
+    if pa.types.is_boolean(data_type):
+        return "boolean"
+    if pa.types.is_timestamp(data_type):
+        return "timestamp"
+    return str(data_type)
+
+
+def _remainder(values: pa.Array, divisor: int) -> pa.Array:
+    return pc.subtract(values, pc.multiply(pc.divide(values, divisor), divisor))
+
+
+def _names(prefix: str, indexes: pa.Array, count: int) -> pa.Array:
+    width = len(str(max(count - 1, 0)))
+    digits = pc.utf8_lpad(pc.cast(indexes, pa.string()), width=width, padding="0")
+    return pc.binary_join_element_wise(prefix, digits, "")
+
+
+def _cycle(values: tuple[str, ...], indexes: pa.Array) -> pa.Array:
+    return pa.array(values).take(_remainder(indexes, len(values)))
+
+
+def information_schema(
+    shape: MetastoreShape,
+    *,
+    table_types: tuple[str, ...] = UNITY_TABLE_TYPES,
+    seed: int | None = 0,
+) -> tuple[pa.Table, pa.Table]:
+    """Generate the `system.information_schema` tables & columns metadata of a metastore.
+
+    The names and types are generated with vectorized Arrow kernels. Rows come back in a random
+    order fixed by `seed` (as the information schema does not sort its results), or in sorted
+    order if `seed` is None.
+    """
+
+    if shape.total_tables == 0:
+        return TABLES_SCHEMA.empty_table(), COLUMNS_SCHEMA.empty_table()
+
+    table_index = pa.array(range(shape.total_tables), pa.int64())
+    tables_per_catalog = shape.num_schemas * shape.num_tables
+    tables = pa.table(
+        {
+            "table_catalog": _names(
+                shape.catalog_prefix,
+                pc.divide(table_index, tables_per_catalog),
+                shape.num_catalogs,
+            ),
+            "table_schema": _names(
+                "schema",
+                pc.divide(
+                    _remainder(table_index, tables_per_catalog), shape.num_tables
+                ),
+                shape.num_schemas,
+            ),
+            "table_name": _names(
+                "table", _remainder(table_index, shape.num_tables), shape.num_tables
+            ),
+            "table_type": _cycle(table_types, table_index),
+            "last_altered": pc.cast(
+                pc.add(pc.multiply(table_index, 1_000_000), _EPOCH_US),
+                pa.timestamp("us", tz="Etc/UTC"),
+            ),
+        },
+        schema=TABLES_SCHEMA,
+    )
+
+    col_index = pa.array(range(shape.total_cols), pa.int64())
+    col_table = pc.divide(col_index, shape.num_cols)
+    ordinal = _remainder(col_index, shape.num_cols)
+    cols = pa.table(
+        {
+            "table_catalog": tables["table_catalog"].take(col_table),
+            "table_schema": tables["table_schema"].take(col_table),
+            "table_name": tables["table_name"].take(col_table),
+            "column_name": _names("col", ordinal, shape.num_cols),
+            "ordinal_position": ordinal,
+            "data_type": _cycle(DATA_TYPES, col_index),
+        },
+        schema=COLUMNS_SCHEMA,
+    )
+
+    if seed is not None:
+        rng = random.Random(seed)  # noqa: S311 - not used for cryptography
+        table_order = list(range(tables.num_rows))
+        rng.shuffle(table_order)
+        col_order = list(range(cols.num_rows))
+        rng.shuffle(col_order)
+        tables, cols = tables.take(table_order), cols.take(col_order)
+    return tables, cols
+
+
+class FakeMetastore:
+    """A fake Databricks workspace, serving synthetic metadata through fake connections.
+
+    `unity` is the shape of the metastore served from `system.information_schema`, and `legacy`
+    the shape of the legacy metastore (e.g. `hive_metastore`) served by the cursor metadata calls
+    `catalogs()`, `schemas()`, `tables()` & `columns()`. Queries selecting `FROM` a table named
+    in `results` return that table, those selecting `FROM range(N)` return N rows of an `id`
+    column, and other queries return empty results. `network` simulates latency & failures (none
+    by default).
+
+    `connections` lists the connections opened, in order, `queries` the queries run or submitted
+    on any of them, and `rpc_counts` counts the calls made to the workspace, by name.
+    `result_rows` records the number of rows of each query result (cut short at the row limit of
+    its cursor, as by the warehouse).
+
+    Pass `metastore.connect` in place of `databricks.sql.connect` (see `patch_connect()`).
+    """
+
+    def __init__(
+        self,
+        unity: MetastoreShape | None = None,
+        legacy: MetastoreShape | None = None,
+        *,
+        network: NetworkProfile | None = None,
+        results: dict[str, pa.Table] | None = None,
+        seed: int | None = 0,
+    ) -> None:
+        self.network = network or NetworkProfile()
+        self.results = {name.lower(): table for name, table in (results or {}).items()}
+        self.unity = unity or MetastoreShape(0, 0, 0, 0)
+        self.legacy = legacy or MetastoreShape(0, 0, 0, 0, "legacy")
+        self.unity_tables, self.unity_cols = information_schema(self.unity, seed=seed)
+        self.legacy_tables, self.legacy_cols = information_schema(
+            self.legacy, table_types=LEGACY_TABLE_TYPES, seed=None
+        )
+        self.unity_catalogs = sorted(
+            set(self.unity_tables["table_catalog"].to_pylist())
+        )
+
+        # the legacy metadata is sorted, so every catalog, schema & table is a run of rows:
+        self._legacy_runs: dict[tuple[str, ...], tuple[int, int]] = {}
+        keys = zip(
+            self.legacy_tables["table_catalog"].to_pylist(),
+            self.legacy_tables["table_schema"].to_pylist(),
+            self.legacy_tables["table_name"].to_pylist(),
+            strict=True,
+        )
+        for row, (catalog, schema, table) in enumerate(keys):
+            for key in ((catalog,), (catalog, schema)):
+                start, _ = self._legacy_runs.get(key, (row, row))
+                self._legacy_runs[key] = (start, row + 1)
+            self._legacy_runs[catalog, schema, table] = (row, row + 1)
+        self.legacy_catalogs = [key[0] for key in self._legacy_runs if len(key) == 1]
+
+        self.connections: list[FakeConnection] = []
+        self.queries: list[str] = []
+        self.rpc_counts: Counter[str] = Counter()
+        # the number of rows of each query result returned by the warehouse:
+        self.result_rows: list[int] = []
+        self._lock = threading.Lock()
+        self._random = random.Random(self.network.seed)  # noqa: S311 - not cryptographic
+
+    def count(self, rpc: str) -> None:
+        with self._lock:
+            self.rpc_counts[rpc] += 1
+
+    def connect(self, **options: Any) -> FakeConnection:
+        self.count("connect")
+        time.sleep(self.network.connect_round_trips * self.network.rtt)
+        connection = FakeConnection(self, options)
+        with self._lock:
+            self.connections.append(connection)
+        return connection
+
+    def record(self, operation: str) -> None:
+        with self._lock:
+            self.queries.append(operation)
+
+    def execution_time(self, operation: str) -> float:
+        match = _EXECUTION_TIME.search(operation)
+        return float(match.group(1)) if match else self.network.execution_time
+
+    def maybe_fail(self) -> None:
+        """Raise a DatabaseError for a `network.failure_rate` fraction of calls."""
+
+        with self._lock:
+            failed = self._random.random() < self.network.failure_rate
+        if failed:
+            raise databricks_sql.DatabaseError(  # type: ignore[no-untyped-call]
+                self.network.failure_message
+            )
+
+    def legacy_rows(
+        self, catalog: str, schema: str | None = None, table: str | None = None
+    ) -> tuple[int, int]:
+        """Return the run of rows of `legacy_tables` in a legacy catalog, schema or table.
+
+        A `schema` or `table` of None, "%" or "*" matches everything, as in the connector's
+        metadata calls.
+        """
+
+        key: tuple[str, ...] = (catalog,)
+        if schema not in {None, "%", "*"}:
+            key = (catalog, schema or "")
+            if table not in {None, "%", "*"}:
+                key = (catalog, schema or "", table or "")
+        return self._legacy_runs.get(key, (0, 0))
+
+    def query(self, operation: str) -> pa.Table:
+        """Return the result of running `operation` against the fake workspace.
+
+        Queries of `system.information_schema.tables` & `.columns` return the whole Unity Catalog
+        metadata (the adapter applies catalog filters to the results client-side too), or just the
+        columns of the tables listed in a `(table_catalog, table_schema, table_name) IN (...)`
+        clause. Queries selecting `FROM` a table named in `results` return it, those selecting
+        `FROM range(N)` N rows of an `id` column, and other queries an empty result.
+        """
+
+        match = _INFORMATION_SCHEMA.search(operation)
+        if match is None:
+            from_match = _FROM.search(operation)
+            if from_match is not None and from_match.group(1).lower() in self.results:
+                return self.results[from_match.group(1).lower()]
+            range_match = _RANGE.search(operation)
+            if range_match is None:
+                return pa.table({})
+            return pa.table(
+                {"id": pa.array(range(int(range_match.group(1))), pa.int64())}
+            )
+        if match.group(1).lower() == "tables":
+            return self.unity_tables
+        key_tuples = _KEY_TUPLE.findall(operation)
+        if not key_tuples:
+            return self.unity_cols
+        keys = pa.array(
+            [
+                "\x1f".join(re.sub(r"\\(.)", r"\1", part) for part in key)
+                for key in key_tuples
+            ]
+        )
+        col_keys = pc.binary_join_element_wise(
+            self.unity_cols["table_catalog"],
+            self.unity_cols["table_schema"],
+            self.unity_cols["table_name"],
+            "\x1f",
+        )
+        return self.unity_cols.filter(pc.is_in(col_keys, value_set=keys))
+
+
+class FakeCursor:
+    """Stand-in for a `databricks.sql.client.Cursor`, serving a FakeMetastore."""
+
+    def __init__(
+        self, connection: FakeConnection, row_limit: int | None = None
+    ) -> None:
+        self.connection = connection
+        self.metastore = connection.metastore
+        self.row_limit = row_limit
+        self.active_command_id: object | None = None
+        self.description: list[tuple[Any, ...]] | None = None
+        self._result: pa.Table | None = None
+        self._offset = 0
+        # the number of rows asked for by each fetch:
+        self.fetch_sizes: list[int] = []
+        self._cancelled = threading.Event()
+        # the operation submitted by `execute_async()`, when it finishes & the error it fails with:
+        self._async_operation = ""
+        self._async_finishes_at = 0.0
+        self._async_error: databricks_sql.DatabaseError | None = None
+        connection.cursors.add(self)
+
+    def __enter__(self) -> FakeCursor:  # noqa: PYI034, D105
+        return self
+
+    def __exit__(self, *_: object) -> None:  # noqa: D105
+        self.close()
+
+    def _call(self, rpc: str, server_seconds: float = 0.0) -> None:
+        """Make an RPC, which takes a round trip plus `server_seconds` on the warehouse."""
+
+        if not self.connection.open:
+            msg = "Cannot use a cursor of a closed connection"
+            raise RuntimeError(msg)
+        network = self.metastore.network
+        self._cancelled.clear()
+        self.active_command_id = None if network.late_command_ids else uuid.uuid4()
+        # counted once the command can be cancelled, for callers waiting to cancel it:
+        self.metastore.count(rpc)
+        if self._cancelled.wait(network.rtt + server_seconds):
+            raise _operation_cancelled()
+        self.active_command_id = self.active_command_id or uuid.uuid4()
+
+    def _run(self, operation: str) -> pa.Table:
+        """Return the result of a query, cut short at the cursor's row limit by the warehouse.
+
+        The current catalog & schema are those of the cursor's session, as set by `USE`.
+        """
+
+        if _NAMESPACE.search(operation):
+            result = pa.table(
+                {
+                    "current_catalog()": [self.connection.catalog],
+                    "current_schema()": [self.connection.schema],
+                }
+            )
+        else:
+            self.connection.use(operation)
+            result = self.metastore.query(operation)
+        if self.row_limit is not None:
+            result = result.slice(0, self.row_limit)
+        self.metastore.result_rows.append(result.num_rows)
+        return result
+
+    def _set_result(self, result: pa.Table) -> None:
+        self.description = [
+            (field.name, _type_name(field.type), None, None, None, None, None)
+            for field in result.schema
+        ]
+        self._result, self._offset = result, 0
+
+    def execute(self, operation: str, parameters: object = None) -> FakeCursor:
+        self.metastore.record(operation)
+        self._call("execute", self.metastore.execution_time(operation))
+        self.metastore.maybe_fail()
+        self._set_result(self._run(operation))
+        return self
+
+    def execute_async(self, operation: str, parameters: object = None) -> FakeCursor:
+        """Submit a query, which runs for its execution time on the warehouse in the background."""
+
+        self.metastore.record(operation)
+        self._call("execute_async")
+        self._async_operation = operation
+        self._async_finishes_at = time.monotonic() + self.metastore.execution_time(
+            operation
+        )
+        self._async_error = None
+        try:
+            self.metastore.maybe_fail()
+        except databricks_sql.DatabaseError as e:
+            self._async_error = e
+        return self
+
+    def get_query_state(self) -> CommandState:
+        """Poll the state of the query submitted by `execute_async()`.
+
+        As with the connector, polling a failed query raises its error.
+        """
+
+        if self.active_command_id is None:
+            msg = "No active command to get state for"
+            raise databricks_sql.Error(msg)  # type: ignore[no-untyped-call]
+        self.metastore.count("get_query_state")
+        time.sleep(self.metastore.network.rtt)
+        if self._cancelled.is_set():
+            return CommandState.CANCELLED
+        if time.monotonic() < self._async_finishes_at:
+            return CommandState.RUNNING
+        if self._async_error is not None:
+            raise self._async_error
+        return CommandState.SUCCEEDED
+
+    def get_async_execution_result(self) -> FakeCursor:
+        state = self.get_query_state()
+        if state != CommandState.SUCCEEDED:
+            msg = f"get_execution_result failed with Operation status {state}"
+            raise databricks_sql.OperationalError(msg)  # type: ignore[no-untyped-call]
+        self.metastore.count("get_execution_result")
+        time.sleep(self.metastore.network.rtt)
+        self._set_result(self._run(self._async_operation))
+        return self
+
+    @property
+    def query_id(self) -> str | None:
+        return str(self.active_command_id) if self.active_command_id else None
+
+    def catalogs(self) -> FakeCursor:
+        names = sorted(
+            {*self.metastore.unity_catalogs, *self.metastore.legacy_catalogs}
+        )
+        self._call("catalogs")
+        self._set_result(pa.table({"TABLE_CAT": names}))
+        return self
+
+    def schemas(
+        self, catalog_name: str | None = None, schema_name: str | None = None
+    ) -> FakeCursor:
+        start, stop = self.metastore.legacy_rows(catalog_name or "", schema_name)
+        tables = self.metastore.legacy_tables.slice(start, stop - start)
+        schemas = pc.unique(tables["table_schema"])
+        self._call("schemas", self.metastore.network.metadata_time)
+        self._set_result(
+            pa.table(
+                {
+                    "TABLE_SCHEM": schemas,
+                    "TABLE_CATALOG": pa.repeat(catalog_name or "", len(schemas)),
+                }
+            ),
+        )
+        return self
+
+    def tables(
+        self,
+        catalog_name: str | None = None,
+        schema_name: str | None = None,
+        table_name: str | None = None,
+        table_types: list[str] | None = None,
+    ) -> FakeCursor:
+        start, stop = self.metastore.legacy_rows(
+            catalog_name or "", schema_name, table_name
+        )
+        tables = self.metastore.legacy_tables.slice(start, stop - start)
+        self._call("tables", self.metastore.network.metadata_time)
+        self._set_result(
+            pa.table(
+                {
+                    "TABLE_CAT": tables["table_catalog"],
+                    "TABLE_SCHEM": tables["table_schema"],
+                    "TABLE_NAME": tables["table_name"],
+                    "TABLE_TYPE": tables["table_type"],
+                }
+            ),
+        )
+        return self
+
+    def columns(
+        self,
+        catalog_name: str | None = None,
+        schema_name: str | None = None,
+        table_name: str | None = None,
+        column_name: str | None = None,
+    ) -> FakeCursor:
+        start, stop = self.metastore.legacy_rows(
+            catalog_name or "", schema_name, table_name
+        )
+        num_cols = self.metastore.legacy.num_cols
+        cols = self.metastore.legacy_cols.slice(
+            start * num_cols, (stop - start) * num_cols
+        )
+        self._call("columns", self.metastore.network.metadata_time)
+        self._set_result(
+            pa.table(
+                {
+                    "TABLE_CAT": cols["table_catalog"],
+                    "TABLE_SCHEM": cols["table_schema"],
+                    "TABLE_NAME": cols["table_name"],
+                    "COLUMN_NAME": cols["column_name"],
+                    "TYPE_NAME": cols["data_type"],
+                    "ORDINAL_POSITION": cols["ordinal_position"],
+                }
+            ),
+        )
+        return self
+
+    def fetchmany_arrow(self, size: int) -> pa.Table:
+        assert self._result is not None
+        # (clamped, as slicing a table without columns past its end does not shorten it)
+        batch = self._result.slice(
+            self._offset, min(size, self._result.num_rows - self._offset)
+        )
+        self.fetch_sizes.append(size)
+        start, stop = self._offset, self._offset + batch.num_rows
+        transfer_time = self.metastore.network.transfer_time(start, stop)
+        if self._cancelled.is_set() or self._cancelled.wait(transfer_time):
+            raise _operation_cancelled()
+        self._offset = stop
+        return batch
+
+    def fetchall_arrow(self) -> pa.Table:
+        assert self._result is not None
+        return self.fetchmany_arrow(self._result.num_rows)
+
+    def fetchone(self) -> tuple[Any, ...] | None:
+        batch = self.fetchmany_arrow(1)
+        if batch.num_rows == 0:
+            return None
+        return tuple(column[0].as_py() for column in batch.columns)
+
+    def fetchall(self) -> list[tuple[Any, ...]]:
+        batch = self.fetchall_arrow()
+        return list(zip(*(column.to_pylist() for column in batch.columns), strict=True))
+
+    def cancel(self) -> None:
+        """Cancel the cursor's command, which can be called from another thread."""
+
+        if self.active_command_id is None:
+            return
+        network = self.metastore.network
+        self.metastore.count("cancel")
+        time.sleep(network.rtt + network.cancel_time)
+        if network.cancel_fails:
+            msg = "Simulated failure to cancel the operation"
+            raise databricks_sql.DatabaseError(msg)  # type: ignore[no-untyped-call]
+        self._cancelled.set()
+
+    def close(self) -> None:
+        if self.active_command_id is not None and self.connection.open:
+            self.metastore.count("close_operation")
+            time.sleep(self.metastore.network.rtt)
+        self.active_command_id = None
+
+
+class FakeConnection:
+    """Stand-in for a `databricks.sql.client.Connection` to a FakeMetastore.
+
+    `options` are the keyword arguments the connection was opened with. The session's current
+    catalog & schema start as those options' `catalog` & `schema` (or `main.default`), and are
+    changed by `USE` statements. Closing the connection cancels the commands of all its cursors,
+    as with Databricks.
+    """
+
+    def __init__(
+        self, metastore: FakeMetastore, options: dict[str, Any] | None = None
+    ) -> None:
+        self.metastore = metastore
+        self.options = options or {}
+        self.catalog = str(self.options.get("catalog") or "main")
+        self.schema = str(self.options.get("schema") or "default")
+        self.open = True
+        self.cursors: weakref.WeakSet[FakeCursor] = weakref.WeakSet()
+
+    def use(self, operation: str) -> None:
+        """Change the session's current catalog or schema if `operation` is a `USE` statement."""
+
+        match = _USE.match(operation)
+        if match is None:
+            return
+        kind = (match.group(1) or "").upper()
+        names = [name.strip("`") for name in match.group(2).split(".")]
+        if kind == "CATALOG":
+            self.catalog = names[-1]
+        elif len(names) > 1:
+            self.catalog, self.schema = names[-2], names[-1]
+        else:
+            self.schema = names[0]
+
+    def cursor(self, *_: Any, row_limit: int | None = None, **__: Any) -> FakeCursor:
+        return FakeCursor(self, row_limit)
+
+    def close(self) -> None:
+        if not self.open:
+            return
+        self.metastore.count("close_session")
+        time.sleep(self.metastore.network.rtt)
+        self.open = False
+        for cursor in list(self.cursors):
+            cursor._cancelled.set()  # noqa: SLF001
+
+
+@contextmanager
+def patch_connect(metastore: FakeMetastore) -> Iterator[FakeMetastore]:
+    """Point `databricks.sql.connect` at `metastore` for the duration of the block."""
+
+    original_connect = databricks_sql.connect
+    databricks_sql.connect = metastore.connect  # type: ignore[assignment]
+    try:
+        yield metastore
+    finally:
+        databricks_sql.connect = original_connect
+
+
+def connect_adapter(**options: Any) -> HarlequinDatabricksConnection:
+    """Connect the adapter to whatever `databricks.sql.connect` currently points at.
+
+    `options` are adapter options overriding the defaults, which skip the initialization script
+    & catalog cache.
+    """
+
+    options = {
+        "server_hostname": "example.cloud.databricks.com",
+        "http_path": "/sql/1.0/warehouses/benchmark",
+        "access_token": "benchmark",
+        "no_init": True,
+        "catalog_cache_ttl": 0,
+        **options,
+    }
+    return HarlequinDatabricksAdapter(**options).connect()
@@ -0,0 +1,306 @@
+import json
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from databricks import sql as databricks_sql
+
+from benchmarks import latency
+from benchmarks.catalog_indexing import count_items, main, run_benchmark
+from harlequin_databricks.adapter import HarlequinDatabricksAdapter
+from tests.fake_databricks import (
+    SHAPES,
+    FakeMetastore,
+    MetastoreShape,
+    NetworkProfile,
+    information_schema,
+    patch_connect,
+)
+
+
+def test_information_schema() -> None:
+    shape = MetastoreShape(2, 3, 4, 5)
+    tables, cols = information_schema(shape)
+
+    assert tables.num_rows == shape.total_tables == 24
+    assert cols.num_rows == shape.total_cols == 120
+    assert sorted(set(tables["table_catalog"].to_pylist())) == ["cat0", "cat1"]
+    assert sorted(set(cols["column_name"].to_pylist())) == [f"col{i}" for i in range(5)]
+    # rows come back unsorted, but the same for the same seed:
+    assert tables["table_name"].to_pylist() != sorted(tables["table_name"].to_pylist())
+    assert information_schema(shape)[0].equals(tables)
+
+    sorted_tables, _ = information_schema(shape, seed=None)
+    assert sorted_tables["table_name"].to_pylist()[:5] == [
+        "table0",
+        "table1",
+        "table2",
+        "table3",
+        "table0",
+    ]
+
+
+@pytest.mark.parametrize("shape_name", sorted(SHAPES))
+def test_shapes(shape_name: str) -> None:
+    shape = SHAPES[shape_name]
+    assert 1_000 <= shape.total_cols <= 1_000_000
+
+
+def test_fake_metastore_legacy_metadata_calls() -> None:
+    metastore = FakeMetastore(
+        unity=MetastoreShape(1, 1, 1, 1), legacy=MetastoreShape(2, 2, 3, 4, "hive")
+    )
+    cursor = metastore.connect().cursor()
+
+    assert cursor.catalogs().fetchall_arrow()["TABLE_CAT"].to_pylist() == [
+        "cat0",
+        "hive0",
+        "hive1",
+    ]
+    assert cursor.schemas("hive1").fetchall_arrow()["TABLE_SCHEM"].to_pylist() == [
+        "schema0",
+        "schema1",
+    ]
+    assert cursor.tables("hive1", "schema0").fetchall_arrow().num_rows == 3
+    columns = cursor.columns("hive1", "schema0", "table2").fetchall_arrow()
+    assert columns["COLUMN_NAME"].to_pylist() == ["col0", "col1", "col2", "col3"]
+    assert set(columns["TABLE_NAME"].to_pylist()) == {"table2"}
+    # omitted schema & table patterns match everything in the catalog:
+    assert cursor.columns("hive0").fetchall_arrow().num_rows == 24
+    assert cursor.columns("hive0", "%", "%").fetchall_arrow().num_rows == 24
+    assert metastore.rpc_counts["columns"] == 3
+
+
+def test_fake_metastore_changed_columns_query() -> None:
+    metastore = FakeMetastore(unity=MetastoreShape(1, 2, 3, 4))
+    cursor = metastore.connect().cursor()
+    cursor.execute(
+        "SELECT * FROM system.information_schema.columns "
+        "WHERE (table_catalog, table_schema, table_name) IN "
+        "(('cat0', 'schema1', 'table2'), ('cat0', 'schema0', 'table0'))"
+    )
+    cols = cursor.fetchall_arrow()
+
+    assert cols.num_rows == 8
+    keys = zip(
+        cols["table_schema"].to_pylist(), cols["table_name"].to_pylist(), strict=True
+    )
+    assert set(keys) == {("schema1", "table2"), ("schema0", "table0")}
+
+
+def test_get_catalog_against_fake_metastore() -> None:
+    metastore = FakeMetastore(
+        unity=MetastoreShape(2, 2, 3, 4), legacy=MetastoreShape(1, 2, 2, 3, "hive")
+    )
+    with patch_connect(metastore):
+        conn = HarlequinDatabricksAdapter(
+            server_hostname="example.cloud.databricks.com",
+            no_init=True,
+            catalog_cache_ttl=0,
+        ).connect()
+        catalog = conn.get_catalog()
+
+    assert [item.label for item in catalog.items] == ["cat0", "cat1", "hive0"]
+    assert count_items(catalog.items) == (12 + 4, 48 + 12)
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+@pytest.mark.parametrize("shape_name", ["wide-1k", "deep-1k", "wide-10k", "deep-10k"])
+def test_catalog_indexing_benchmark(shape_name: str, legacy: bool) -> None:
+    results = run_benchmark(shape_name, SHAPES[shape_name], legacy=legacy, repeat=1)
+
+    assert [result.operation for result in results] == (
+        ["get_catalog"] if legacy else ["get_catalog", "_get_unity_catalogs", "refresh"]
+    )
+    for result in results:
+        # generous budgets, to catch gross regressions without flaking on slow CI runners:
+        assert result.seconds < 5
+        assert result.peak_python_mb < 50
+        assert result.peak_arrow_mb < 50
+    if legacy:
+        # two information schema queries (plus closing them), then catalogs(), and one schemas(),
+        # tables() & columns() call per catalog however many tables it holds (and each cursor is
+        # closed after its call):
+        num_catalogs = SHAPES[shape_name].num_catalogs
+        assert results[0].rpcs == 2 + 1 + 2 * (1 + 3 * num_catalogs)
+    else:
+        # Unity Catalog is indexed in two queries of the information schema (plus closing them):
+        assert results[1].rpcs == 2 + 1
+
+
+def test_catalog_indexing_benchmark_lazy_columns() -> None:
+    results = run_benchmark(
+        "deep-1k", SHAPES["deep-1k"], legacy=True, repeat=1, lazy_column_loading=True
+    )
+    # an information schema query, then catalogs(), 5 schemas() & 5 tables() calls, but no
+    # columns() calls (and each cursor is closed after its call):
+    assert results[0].rpcs == 2 * (1 + 1 + 5 + 5)
+
+
+@pytest.mark.parametrize("legacy", [False, True])
+def test_catalog_indexing_benchmark_compact_catalog(legacy: bool) -> None:
+    full = run_benchmark("wide-10k", SHAPES["wide-10k"], legacy=legacy, repeat=1)
+    compact = run_benchmark(
+        "wide-10k", SHAPES["wide-10k"], legacy=legacy, repeat=1, compact_catalog=True
+    )
+
+    for full_result, compact_result in zip(full, compact, strict=True):
+        if full_result.operation == "refresh":
+            continue  # an unchanged metastore is not rebuilt either way
+        # no CatalogItem is built per column, so the catalog takes a fraction of the memory:
+        assert compact_result.peak_python_mb < full_result.peak_python_mb / 10
+
+
+def test_catalog_indexing_benchmark_main(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    json_path = tmp_path / "results.jsonl"
+    main(["--shapes", "deep-1k", "--repeat", "1", "--json", str(json_path)])
+
+    assert "deep-1k" in capsys.readouterr().out
+    results = [json.loads(line) for line in json_path.read_text().splitlines()]
+    assert [result["operation"] for result in results] == [
+        "get_catalog",
+        "_get_unity_catalogs",
+        "refresh",
+    ]
+    assert results[0]["columns"] == 1_000
+
+
+def test_catalog_indexing_benchmark_fails_on_regressions(
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    args = ["--shapes", "deep-1k", "--repeat", "1"]
+    main([*args, "--max-seconds", "60", "--max-peak-mb", "1000"])
+
+    with pytest.raises(SystemExit) as exc_info:
+        main([*args, "--max-peak-mb", "0"])
+    assert exc_info.value.code == 1
+    assert (
+        "Regression: get_catalog of deep-1k (unity) peaked at"
+        in capsys.readouterr().err
+    )
+
+
+def test_network_profile_transfer_time() -> None:
+    network = NetworkProfile(rtt=0.01, batch_rows=100, rows_per_second=1000)
+
+    assert network.transfer_time(0, 0) == 0
+    assert network.transfer_time(0, 100) == pytest.approx(0.01 + 0.1)
+    assert network.transfer_time(0, 250) == pytest.approx(3 * 0.01 + 0.25)
+    assert network.transfer_time(50, 150) == pytest.approx(0.01 + 0.1)
+
+
+def test_fake_cursor_simulates_latency() -> None:
+    metastore = FakeMetastore(
+        network=NetworkProfile(rtt=0.01, connect_round_trips=2, execution_time=0.03)
+    )
+    start = time.perf_counter()
+    cursor = metastore.connect().cursor()
+    assert time.perf_counter() - start >= 0.02
+
+    start = time.perf_counter()
+    cursor.execute("SELECT * FROM range(10)")
+    assert time.perf_counter() - start >= 0.04
+    assert cursor.fetchall_arrow()["id"].to_pylist() == list(range(10))
+
+    start = time.perf_counter()
+    cursor.execute("/* execution_time=0.1 */ SELECT 1")
+    assert time.perf_counter() - start >= 0.11
+
+
+def test_fake_cursor_cancel_from_another_thread() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(rtt=0.001))
+    cursor = metastore.connect().cursor()
+    errors: list[Exception] = []
+
+    def execute() -> None:
+        try:
+            cursor.execute("/* execution_time=10 */ SELECT 1")
+        except databricks_sql.DatabaseError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=execute)
+    thread.start()
+    while metastore.rpc_counts["execute"] == 0:
+        time.sleep(0.001)
+    cursor.cancel()
+    thread.join(1)
+
+    assert not thread.is_alive()
+    assert str(errors[0]).startswith("Invalid OperationHandle:")
+
+
+def test_fake_cursor_failures() -> None:
+    metastore = FakeMetastore(
+        network=NetworkProfile(failure_rate=1, failure_message="Invalid SessionHandle")
+    )
+    cursor = metastore.connect().cursor()
+    with pytest.raises(databricks_sql.DatabaseError, match="Invalid SessionHandle"):
+        cursor.execute("SELECT 1")
+
+
+def test_percentile() -> None:
+    assert latency.percentile([3.0, 1.0, 2.0], 0.5) == 2.0
+    assert latency.percentile([1.0, 2.0], 0.95) == pytest.approx(1.95)
+    assert latency.percentile([5.0], 0.95) == 5.0
+
+
+def test_latency_benchmark() -> None:
+    network = NetworkProfile(rtt=0.002, execution_time=0.01, cancel_time=0.002)
+    results = latency.run_latency_benchmark(network, rows=1000, iterations=3)
+
+    assert [result.operation for result in results] == list(latency.OPERATIONS)
+    by_operation = {result.operation: result for result in results}
+    for result in results:
+        assert (result.samples, result.failures) == (3, 0)
+        assert result.p50_ms <= result.p95_ms <= result.max_ms
+    assert by_operation["connect"].p50_ms >= 3 * 2
+    assert by_operation["execute"].p50_ms >= 2 + 10
+    # the cancelled query would have run for a minute:
+    assert by_operation["cancel"].max_ms < 1000
+
+
+def test_latency_benchmark_cancel_falls_back_to_reconnecting() -> None:
+    network = NetworkProfile(rtt=0.002, cancel_fails=True)
+    results = latency.run_latency_benchmark(
+        network, iterations=2, operations=["cancel"]
+    )
+
+    assert (results[0].samples, results[0].failures) == (2, 0)
+    assert results[0].max_ms < 1000
+
+
+def test_latency_benchmark_failures() -> None:
+    network = NetworkProfile(failure_rate=1)
+    results = latency.run_latency_benchmark(
+        network, iterations=2, operations=["execute", "fetchall"]
+    )
+
+    assert [(result.samples, result.failures) for result in results] == [(0, 2), (0, 2)]
+
+
+def test_latency_benchmark_main(
+    tmp_path: Path, capsys: pytest.CaptureFixture[str]
+) -> None:
+    json_path = tmp_path / "results.jsonl"
+    latency.main(
+        [
+            "--rtt-ms",
+            "1",
+            "--execution-ms",
+            "1",
+            "--iterations",
+            "2",
+            "--operations",
+            "execute",
+            "cancel",
+            "--json",
+            str(json_path),
+        ]
+    )
+
+    assert "p95 (ms)" in capsys.readouterr().out
+    results = [json.loads(line) for line in json_path.read_text().splitlines()]
+    assert [result["operation"] for result in results] == ["execute", "cancel"]
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from databricks import sql as databricks_sql
+
+from tests.fake_databricks import (
+    FakeCursor,
+    FakeMetastore,
+    MetastoreShape,
+    NetworkProfile,
+    connect_adapter,
+    patch_connect,
+)
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import pytest
+
+    from harlequin_databricks.adapter import HarlequinDatabricksConnection
+
+
+QUERY = "SELECT * FROM big_table /* execution_time=60 */"
+
+
+def _cancel_running_query(
+    connection: HarlequinDatabricksConnection, metastore: FakeMetastore
+) -> Any:
+    result: list[Any] = []
+    thread = threading.Thread(target=lambda: result.append(connection.execute(QUERY)))
+    thread.start()
+    _wait_for(lambda: metastore.rpc_counts["execute"] == 1)
+    connection.cancel()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    return result[0]
+
+
+def _wait_for(condition: Callable[[], bool]) -> None:
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert condition()
+
+
+def test_cancel_cancels_cursors_in_place() -> None:
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        connection = connect_adapter()
+        assert _cancel_running_query(connection, metastore) is None
+    assert metastore.rpc_counts["cancel"] == 1
+    assert len(metastore.connections) == 1  # no reconnect
+    assert metastore.connections[0].open
+
+
+def test_cancel_falls_back_to_reconnecting() -> None:
+    for network in (
+        NetworkProfile(cancel_fails=True),
+        NetworkProfile(late_command_ids=True),
+    ):
+        metastore = FakeMetastore(network=network)
+        with patch_connect(metastore):
+            connection = connect_adapter()
+            assert _cancel_running_query(connection, metastore) is None
+        assert len(metastore.connections) == 2
+        assert not metastore.connections[0].open
+        assert connection.conn is metastore.connections[1]  # type: ignore[comparison-overlap]
+
+
+def test_cancel_without_running_queries_keeps_connection() -> None:
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        connection = connect_adapter()
+        connection.cancel()
+    assert len(metastore.connections) == 1
+    assert metastore.connections[0].open
+
+
+def test_cancel_promotes_warm_standby() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(cancel_fails=True))
+    with patch_connect(metastore):
+        connection = connect_adapter(warm_standby=True)
+        standby = connection._standby  # noqa: SLF001
+        assert standby is not None
+        standby.result(timeout=5)
+        assert len(metastore.connections) == 2
+
+        assert _cancel_running_query(connection, metastore) is None
+        assert not metastore.connections[0].open
+        assert connection.conn is metastore.connections[1]  # type: ignore[comparison-overlap]
+
+        # a replacement standby is prepared in the background, and closed with the connection:
+        standby = connection._standby  # noqa: SLF001
+        assert standby is not None
+        standby.result(timeout=5)
+        assert len(metastore.connections) == 3
+        connection.close()
+    assert not any(conn.open for conn in metastore.connections)
+
+
+def test_execute_reconnects_when_session_is_lost(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    metastore = FakeMetastore()
+    execute = FakeCursor.execute
+
+    def execute_on_expired_session(
+        self: FakeCursor, operation: str, parameters: object = None
+    ) -> FakeCursor:
+        if self.connection is metastore.connections[0]:
+            msg = "Invalid SessionHandle: expired"
+            raise databricks_sql.DatabaseError(msg)  # type: ignore[no-untyped-call]
+        return execute(self, operation, parameters)
+
+    monkeypatch.setattr(FakeCursor, "execute", execute_on_expired_session)
+    with patch_connect(metastore):
+        connection = connect_adapter()
+        assert connection.execute("SELECT 1") is not None
+    assert len(metastore.connections) == 2
+    assert not metastore.connections[0].open
+
+
+def test_cancel_stops_legacy_indexing_in_flight() -> None:
+    metastore = FakeMetastore(
+        legacy=MetastoreShape(1, 1, 1, 1, "hive_metastore"),
+        network=NetworkProfile(metadata_time=30),
+    )
+    with patch_connect(metastore):
+        connection = connect_adapter(metadata_concurrency=1)
+        thread = threading.Thread(target=connection.get_catalog)
+        thread.start()
+        _wait_for(lambda: metastore.rpc_counts["schemas"] == 1)
+
+        # the metadata call on the connection is cancelled, rather than waited for:
+        connection.cancel()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    assert metastore.rpc_counts["cancel"] == 1
+    assert metastore.rpc_counts["tables"] == 0
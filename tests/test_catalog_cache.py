@@ -0,0 +1,340 @@
+import os
+import stat
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import pyarrow as pa
+import pytest
+from harlequin.catalog import Catalog, CatalogItem
+
+from harlequin_databricks import catalog_cache
+from harlequin_databricks.adapter import HarlequinDatabricksConnection
+from harlequin_databricks.catalog import (
+    ColumnStore,
+    CompactTableCatalogItem,
+    LazyTableCatalogItem,
+)
+from harlequin_databricks.catalog_cache import CatalogCache, catalog_cache_key
+from tests.fake_databricks import (
+    FakeMetastore,
+    MetastoreShape,
+    connect_adapter,
+    patch_connect,
+)
+
+
+def _catalog(name: str = "main") -> Catalog:
+    columns = [
+        CatalogItem(
+            qualified_identifier=f"{name}.default.events.{column}",
+            query_name=column,
+            label=column,
+            type_label="STRING",
+        )
+        for column in ("id", "ts")
+    ]
+    table = CatalogItem(
+        qualified_identifier=f"{name}.default.events",
+        query_name=f"{name}.default.events",
+        label="events",
+        type_label="MANAGED",
+        children=columns,
+    )
+    schema = CatalogItem(
+        qualified_identifier=f"{name}.default",
+        query_name=f"{name}.default",
+        label="default",
+        type_label="s",
+        children=[table],
+    )
+    return Catalog(
+        items=[
+            CatalogItem(
+                qualified_identifier=name,
+                query_name=name,
+                label=name,
+                type_label="catalog",
+                children=[schema],
+            )
+        ]
+    )
+
+
+def test_cache_key_hides_secrets() -> None:
+    key = catalog_cache_key("host", "/sql/1.0/warehouses/abc", "dapi-secret-token")
+    assert "secret" not in key
+    assert key != catalog_cache_key("host", "/sql/1.0/warehouses/abc", "other-token")
+
+
+def test_cache_round_trip(tmp_path: Path) -> None:
+    cache = CatalogCache("key", ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    assert cache.load() is None
+    cache.save(_catalog())
+    assert cache.load() == _catalog()
+
+
+def test_cache_is_private(tmp_path: Path) -> None:
+    cache_dir = tmp_path / "catalogs"
+    cache = CatalogCache("key", ttl=60, max_bytes=1024 * 1024, cache_dir=cache_dir)
+    cache.save(_catalog())
+
+    (path,) = cache_dir.glob("*.arrow")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert stat.S_IMODE(cache_dir.stat().st_mode) == 0o700
+
+
+def test_cache_round_trip_compact_tables(tmp_path: Path) -> None:
+    import pyarrow as pa
+
+    catalog = _catalog()
+    schema_item = catalog.items[0].children[0]
+    schema_item.children = [
+        CompactTableCatalogItem(
+            qualified_identifier="main.default.events",
+            query_name="main.default.events",
+            label="events",
+            type_label="MANAGED",
+            table_key=("main", "default", "events"),
+            column_store=ColumnStore(
+                pa.chunked_array([["id", "ts"]]), pa.chunked_array([["STRING"] * 2])
+            ),
+            column_range=(0, 2),
+        )
+    ]
+    cache = CatalogCache("key", ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    cache.save(catalog)
+
+    # the compact table's columns are cached like any others:
+    assert cache.load() == _catalog()
+    cached = cache.load(compact=True)
+    assert cached is not None
+    table_item = cached.items[0].children[0].children[0]
+    assert isinstance(table_item, CompactTableCatalogItem)
+    assert table_item.children == []
+    assert (
+        table_item.fetch_children()
+        == _catalog().items[0].children[0].children[0].children
+    )
+
+
+def test_cache_round_trip_lazy_tables(tmp_path: Path) -> None:
+    catalog = _catalog()
+    schema_item = catalog.items[0].children[0]
+    schema_item.children = [
+        LazyTableCatalogItem(
+            qualified_identifier="main.default.events",
+            query_name="main.default.events",
+            label="events",
+            type_label="MANAGED",
+            table_key=("main", "default", "events"),
+        )
+    ]
+    cache = CatalogCache("key", ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    cache.save(catalog)
+
+    # lazy tables cannot fetch their columns without a connection:
+    assert cache.load() is None
+    connection: Any = object()
+    cached = cache.load(connection)
+    assert cached is not None
+    table_item = cached.items[0].children[0].children[0]
+    assert isinstance(table_item, LazyTableCatalogItem)
+    assert table_item.connection is connection
+    assert table_item.table_key == ("main", "default", "events")
+
+
+def test_cache_expires_after_ttl(tmp_path: Path) -> None:
+    cache = CatalogCache("key", ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    cache.save(_catalog())
+    an_hour_ago = time.time() - 3600
+    os.utime(cache.path, (an_hour_ago, an_hour_ago))
+    assert cache.load() is None
+
+
+def test_cache_evicts_oldest_catalogs(tmp_path: Path) -> None:
+    old = CatalogCache("old", ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    old.save(_catalog("old"))
+    an_hour_ago = time.time() - 3600
+    os.utime(old.path, (an_hour_ago, an_hour_ago))
+    size = old.path.stat().st_size
+
+    new = CatalogCache("new", ttl=60, max_bytes=size * 3 // 2, cache_dir=tmp_path)
+    new.save(_catalog("new"))
+    assert new.path.exists()
+    assert not old.path.exists()
+
+    too_small = CatalogCache("too_small", ttl=60, max_bytes=10, cache_dir=tmp_path)
+    too_small.save(_catalog())
+    assert too_small.load() is None
+    assert new.path.exists()
+
+
+def test_cache_ignores_corrupt_file(tmp_path: Path) -> None:
+    cache = CatalogCache("key", ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    cache.path.write_bytes(b"not an arrow file")
+    assert cache.load() is None
+
+
+def _connect(**options: Any) -> HarlequinDatabricksConnection:
+    # the adapter's default TTL, which enables the catalog cache, unless overridden:
+    options.setdefault("catalog_cache_ttl", None)
+    with patch_connect(FakeMetastore()):
+        return connect_adapter(**options)
+
+
+def _stub_indexing(
+    monkeypatch: pytest.MonkeyPatch,
+    conn: HarlequinDatabricksConnection,
+    name: str,
+    release: threading.Event | None = None,
+) -> None:
+    """Replace the Databricks queries of `conn._build_catalog()` with a fixed catalog."""
+
+    def build_catalog() -> Catalog:
+        if release is not None:
+            release.wait(timeout=5)
+        return conn._store_catalog(_catalog(name))  # noqa: SLF001
+
+    monkeypatch.setattr(conn, "_build_catalog", build_catalog)
+
+
+def test_get_catalog_serves_cache_then_refreshes(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(catalog_cache, "user_cache_dir", lambda **_: str(tmp_path))
+    first = _connect()
+    _stub_indexing(monkeypatch, first, "old")
+    assert first.get_catalog() == _catalog("old")  # cache miss indexes synchronously
+
+    second = _connect()
+    refreshed = threading.Event()
+    _stub_indexing(monkeypatch, second, "new", refreshed)
+    assert second.get_catalog() == _catalog("old")  # served from cache, stale
+    refreshed.set()
+    assert second.get_catalog() == _catalog("new")  # background refresh swapped in
+
+    third = _connect()
+    _stub_indexing(monkeypatch, third, "built")
+    assert third.get_catalog() == _catalog("new")
+
+
+def test_get_catalog_rebuild_and_disable_skip_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(catalog_cache, "user_cache_dir", lambda **_: str(tmp_path))
+    first = _connect()
+    _stub_indexing(monkeypatch, first, "old")
+    first.get_catalog()
+
+    for options in ({"rebuild_catalog_cache": True}, {"catalog_cache_ttl": "0"}):
+        conn = _connect(**options)
+        _stub_indexing(monkeypatch, conn, "built")
+        assert conn.get_catalog() == _catalog("built")
+
+
+def _table_labels(catalog: Catalog) -> list[str]:
+    return [
+        table.qualified_identifier
+        for catalog_item in catalog.items
+        for schema in catalog_item.children
+        for table in schema.children
+    ]
+
+
+def test_get_catalog_discards_refresh_predating_ddl(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(catalog_cache, "user_cache_dir", lambda **_: str(tmp_path))
+    metastore = FakeMetastore(unity=MetastoreShape(1, 1, 2, 1))
+    with patch_connect(metastore):
+        connect_adapter(catalog_cache_ttl=3600).get_catalog()
+
+        conn = connect_adapter(catalog_cache_ttl=3600)
+        cached = conn.get_catalog()
+        assert conn._catalog_refresh is not None  # noqa: SLF001
+        conn._catalog_refresh.join()  # noqa: SLF001
+
+        # the refresh finished before the DDL ran, so is stale:
+        metastore.unity_tables = metastore.unity_tables.filter(
+            pa.compute.field("table_name") != "table1"
+        )
+        conn.execute("DROP TABLE cat0.schema0.table1")
+        assert _table_labels(cached) == ["cat0.schema0.table0", "cat0.schema0.table1"]
+        assert _table_labels(conn.get_catalog()) == ["cat0.schema0.table0"]
+
+
+def test_background_refresh_runs_on_its_own_connection(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(catalog_cache, "user_cache_dir", lambda **_: str(tmp_path))
+    metastore = FakeMetastore(unity=MetastoreShape(1, 1, 2, 1))
+    with patch_connect(metastore):
+        connect_adapter(catalog_cache_ttl=3600).get_catalog()
+
+        conn = connect_adapter(catalog_cache_ttl=3600)
+        opened = len(metastore.connections)
+
+        def cursor(*_: Any, **__: Any) -> None:
+            # the connection of the user's queries, which must not be shared between threads:
+            msg = "The background refresh used the connection of the user's queries"
+            raise AssertionError(msg)
+
+        monkeypatch.setattr(conn.conn, "cursor", cursor)
+        conn.get_catalog()
+        assert conn._catalog_refresh is not None  # noqa: SLF001
+        conn._catalog_refresh.join()  # noqa: SLF001
+
+    assert conn._refreshed_catalog is not None  # noqa: SLF001
+    (refresh_conn,) = metastore.connections[opened:]
+    assert not refresh_conn.open
+
+
+def test_incremental_refresh_after_tables_are_dropped() -> None:
+    conn = _connect(catalog_cache_ttl="0", incremental_catalog_refresh=True)
+    tables = pa.table(
+        {
+            "table_catalog": ["main", "main"],
+            "table_schema": ["default", "default"],
+            "table_name": ["events", "users"],
+            "table_type": ["MANAGED", "MANAGED"],
+            "last_altered": [
+                datetime(2026, 1, 1, tzinfo=timezone.utc),
+                datetime(2026, 1, 2, tzinfo=timezone.utc),
+            ],
+        }
+    )
+    # the state of the last indexing:
+    conn._unity_catalog_items = []  # noqa: SLF001
+    conn._unity_table_keys = {  # noqa: SLF001
+        ("main", "default", "events"),
+        ("main", "default", "users"),
+    }
+    conn._unity_watermark = datetime(2026, 1, 2, tzinfo=timezone.utc)  # noqa: SLF001
+
+    # the newest table is selected again, as its timestamp is the watermark:
+    changed = conn._get_changed_unity_tables(tables)  # noqa: SLF001
+    assert changed is not None
+    assert changed["table_name"].to_pylist() == ["users"]
+
+    # once it is dropped, no table is:
+    changed = conn._get_changed_unity_tables(tables.slice(0, 1))  # noqa: SLF001
+    assert changed is not None
+    assert changed.num_rows == 0
+
+
+def test_incremental_refresh_leaves_earlier_catalog_unchanged() -> None:
+    metastore = FakeMetastore(unity=MetastoreShape(1, 1, 2, 1))
+    with patch_connect(metastore):
+        conn = connect_adapter(incremental_catalog_refresh=True)
+        earlier = conn.get_catalog()
+
+        metastore.unity_tables = metastore.unity_tables.filter(
+            pa.compute.field("table_name") != "table1"
+        )
+        refreshed = conn.get_catalog()
+
+    assert _table_labels(refreshed) == ["cat0.schema0.table0"]
+    assert _table_labels(earlier) == ["cat0.schema0.table0", "cat0.schema0.table1"]
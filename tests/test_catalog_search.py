@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from typing import Any
+
+import pyarrow as pa
+from harlequin.catalog import Catalog, CatalogItem
+
+from harlequin_databricks.adapter import HarlequinDatabricksAdapter
+from harlequin_databricks.catalog import build_unity_catalog_items
+from harlequin_databricks.catalog_search import CatalogIndex
+from tests.fake_databricks import (
+    FakeMetastore,
+    MetastoreShape,
+    connect_adapter,
+    information_schema,
+    patch_connect,
+)
+
+
+def _paths(results: list[tuple[CatalogItem, tuple[str, ...]]]) -> list[str]:
+    return [".".join((*parents, item.label)) for item, parents in results]
+
+
+def _index(**options: Any) -> CatalogIndex:
+    tables, cols = information_schema(MetastoreShape(2, 2, 3, 2))
+    catalog_items, _ = build_unity_catalog_items(tables, cols, **options)
+    return CatalogIndex(Catalog(items=catalog_items))
+
+
+def test_search_relations() -> None:
+    index = _index()
+    assert _paths(index.search("TABLE1", "relations")) == [
+        "cat0.schema0.table1",
+        "cat0.schema1.table1",
+        "cat1.schema0.table1",
+        "cat1.schema1.table1",
+    ]
+    assert _paths(index.search("schema1", "relations")) == []
+    assert _paths(index.search("schema1", "all")) == [
+        "cat0.schema1",
+        "cat1.schema1",
+    ]
+    assert _paths(index.search("1", "all"))[:3] == [
+        "cat0.schema0.table1",
+        "cat0.schema1",
+        "cat0.schema1.table1",
+    ]
+    assert index.search("missing") == []
+
+
+def test_search_columns() -> None:
+    for index in (_index(), _index(compact=True)):
+        results = index.search("col1", "columns")
+        assert len(results) == 12
+        item, parents = results[0]
+        assert parents == ("cat0", "schema0", "table0")
+        assert item == CatalogItem(
+            qualified_identifier="cat0.schema0.table0.col1",
+            query_name="col1",
+            label="col1",
+            type_label="BIGINT",
+        )
+        # every table and column label contains an "l":
+        assert len(index.search("l", "all")) == 12 + 24
+        assert index.search("table", "columns") == []
+
+
+def test_search_skips_lazily_loaded_columns() -> None:
+    tables, _ = information_schema(MetastoreShape(1, 1, 2, 2))
+    catalog_items, _ = build_unity_catalog_items(tables, None, object())  # type: ignore[arg-type]
+    index = CatalogIndex(Catalog(items=catalog_items))
+    assert _paths(index.search("table")) == [
+        "cat0.schema0.table0",
+        "cat0.schema0.table1",
+    ]
+    assert index.num_columns == 0
+
+
+def test_search_empty_catalog() -> None:
+    index = CatalogIndex(Catalog(items=[]))
+    assert index.search("") == []
+    assert index.search("table") == []
+
+
+def test_connection_search_catalog() -> None:
+    assert HarlequinDatabricksAdapter.IMPLEMENTS_CATALOG_SEARCH
+    metastore = FakeMetastore(
+        unity=MetastoreShape(1, 2, 3, 2),
+        legacy=MetastoreShape(1, 1, 2, 2, "legacy"),
+    )
+    with patch_connect(metastore):
+        conn = connect_adapter()
+        # the catalog is indexed on the first search:
+        results = conn.search_catalog("table1", "relations")
+        assert [(result.parents, result.item.label) for result in results] == [
+            (("cat0", "schema0"), "table1"),
+            (("cat0", "schema1"), "table1"),
+            (("legacy0", "schema0"), "table1"),
+        ]
+        executed = metastore.rpc_counts["execute"]
+        assert len(conn.search_catalog("col", "columns")) == 16
+        assert metastore.rpc_counts["execute"] == executed
+
+        # the index follows the catalog as it is refreshed:
+        metastore.unity_tables = metastore.unity_tables.filter(
+            pa.compute.field("table_schema") != "schema1"
+        )
+        conn.get_catalog()
+        assert [
+            (result.parents, result.item.label)
+            for result in conn.search_catalog("table1", "relations")
+        ] == [
+            (("cat0", "schema0"), "table1"),
+            (("legacy0", "schema0"), "table1"),
+        ]
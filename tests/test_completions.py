@@ -0,0 +1,58 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from harlequin_databricks import completions
+from harlequin_databricks.completions import load_completions
+
+SCRIPTS_DIR = Path(__file__).parents[1] / "scripts"
+PACKAGE_DIR = Path(__file__).parents[1] / "src" / "harlequin_databricks"
+
+
+def test_completion_data_is_up_to_date() -> None:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    try:
+        from compile_completions import compile_completions
+    finally:
+        sys.path.remove(str(SCRIPTS_DIR))
+    compiled = (PACKAGE_DIR / "completion_data.py").read_text(encoding="utf-8")
+    assert compile_completions() == compiled, (
+        "rerun `python scripts/compile_completions.py`"
+    )
+
+
+def test_load_completions() -> None:
+    loaded = load_completions()
+    labels = {(completion.label, completion.type_label) for completion in loaded}
+    assert ("select", "kw") in labels
+    assert ("date_trunc", "fn") in labels
+    assert all(completion.priority == 1000 for completion in loaded)
+
+    # callers get their own list, so cannot corrupt the memoized completions:
+    loaded.clear()
+    assert load_completions()
+
+
+def test_load_completions_cold_and_warm_times() -> None:
+    # cold: the first call in a fresh interpreter builds the completions
+    code = (
+        "import time; from harlequin_databricks.completions import load_completions;"
+        "start = time.perf_counter(); load_completions();"
+        "print(time.perf_counter() - start)"
+    )
+    cold = float(
+        subprocess.run(  # noqa: S603
+            [sys.executable, "-c", code], capture_output=True, check=True, text=True
+        ).stdout
+    )
+    assert cold < 0.05
+
+    # warm: memoized for the rest of the process
+    completions._completions.cache_clear()  # noqa: SLF001
+    load_completions()
+    start = time.perf_counter()
+    for _ in range(100):
+        load_completions()
+    warm = (time.perf_counter() - start) / 100
+    assert warm < 0.001
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+from harlequin.exception import HarlequinConfigError, HarlequinQueryError
+
+from harlequin_databricks.adapter import HarlequinDatabricksAdapter
+from harlequin_databricks.sql import is_read_only
+from tests.fake_databricks import (
+    FakeMetastore,
+    NetworkProfile,
+    connect_adapter,
+    patch_connect,
+)
+
+
+@pytest.mark.parametrize(
+    ("query", "read_only"),
+    [
+        ("SELECT * FROM t", True),
+        ("with x AS (select 1) select * from x", True),
+        ("select now()", True),
+        ("VALUES (1), (2)", True),
+        ("with x as (select 1) insert into t select * from x", False),
+        ("USE SCHEMA sales", False),
+        ("SET spark.sql.ansi.enabled = true", False),
+        ("CREATE TEMP VIEW v AS SELECT 1", False),
+        ("select 1; drop table t", False),
+        ("", False),
+    ],
+)
+def test_is_read_only(query: str, read_only: bool) -> None:
+    assert is_read_only(query) == read_only
+
+
+def _query(seconds: float, rows: int) -> str:
+    return f"/* execution_time={seconds} */ SELECT * FROM range({rows})"  # noqa: S608
+
+
+def test_read_only_statements_run_concurrently() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(rtt=0.001))
+    with patch_connect(metastore):
+        conn = connect_adapter(concurrent_statements=3)
+        start = time.perf_counter()
+        cursors = [conn.execute(_query(0.3, rows)) for rows in (1, 2, 3)]
+        submitted = time.perf_counter() - start
+        results = [cursor.fetchall() if cursor else None for cursor in cursors]
+        elapsed = time.perf_counter() - start
+
+    assert submitted < 0.2
+    assert 0.3 <= elapsed < 0.6
+    assert [result.num_rows for result in results] == [1, 2, 3]  # type: ignore[union-attr]
+    assert metastore.rpc_counts["execute_async"] == 3
+    assert metastore.rpc_counts["execute"] == 0
+
+
+def test_concurrent_statements_are_bounded() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(rtt=0.001))
+    with patch_connect(metastore):
+        conn = connect_adapter(concurrent_statements=2)
+        start = time.perf_counter()
+        cursors = [conn.execute(_query(0.2, 1)) for _ in range(3)]
+        # the third statement waited for the first to finish before it was submitted:
+        assert 0.2 <= time.perf_counter() - start < 0.35
+        assert all(cursor is not None and cursor.fetchall() for cursor in cursors)
+
+
+def test_other_statements_are_serial_barriers() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(rtt=0.001))
+    with patch_connect(metastore):
+        conn = connect_adapter(concurrent_statements=4)
+        select = conn.execute(_query(0.2, 5))
+        start = time.perf_counter()
+        conn.execute("CREATE TABLE t AS SELECT 1")
+        # the write waited for the select before it, and ran on its own:
+        assert time.perf_counter() - start >= 0.15
+        assert metastore.rpc_counts["execute"] == 1
+        assert select is not None
+        assert [name for name, _ in select.columns()] == ["id"]
+        assert select.fetchall().num_rows == 5  # type: ignore[union-attr]
+
+
+def test_errors_of_concurrent_statements_are_raised_on_fetch() -> None:
+    metastore = FakeMetastore(
+        network=NetworkProfile(failure_rate=1, failure_message="Table not found")
+    )
+    with patch_connect(metastore):
+        conn = connect_adapter(concurrent_statements=2)
+        cursor = conn.execute("SELECT * FROM missing")
+        assert cursor is not None
+        with pytest.raises(HarlequinQueryError, match="Table not found"):
+            cursor.fetchall()
+
+
+def test_cancel_concurrent_statements() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(rtt=0.001))
+    with patch_connect(metastore):
+        conn = connect_adapter(concurrent_statements=2)
+        cursors = [conn.execute(_query(60, 1)) for _ in range(2)]
+        conn.cancel()
+        start = time.perf_counter()
+        assert [cursor.fetchall() if cursor else None for cursor in cursors] == [
+            None,
+            None,
+        ]
+
+    assert time.perf_counter() - start < 1
+    assert metastore.rpc_counts["cancel"] == 2
+    assert metastore.rpc_counts["close_session"] == 0
+
+
+def test_concurrent_statements_must_be_positive() -> None:
+    with pytest.raises(HarlequinConfigError, match="concurrent_statements"):
+        HarlequinDatabricksAdapter(concurrent_statements="0")
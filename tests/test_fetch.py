@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import tempfile
+from typing import TYPE_CHECKING, Any
+
+import pyarrow as pa
+import pytest
+from databricks import sql as databricks_sql
+from harlequin.exception import HarlequinQueryError
+
+from harlequin_databricks import adapter
+from harlequin_databricks.adapter import HarlequinDatabricksCursor
+from harlequin_databricks.metrics import MetricsRecorder
+from harlequin_databricks.spill import ResultBuffer
+from tests.fake_databricks import (
+    FakeCursor,
+    FakeMetastore,
+    connect_adapter,
+    patch_connect,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def _result(num_rows: int) -> pa.Table:
+    return pa.table({"id": pa.array(range(num_rows), pa.int64())})
+
+
+def _fake_cursor(num_rows: int) -> FakeCursor:
+    """Return a fake cursor which ran a query with a result of `num_rows` rows."""
+
+    query = f"SELECT * FROM range({num_rows})"  # noqa: S608
+    return FakeMetastore().connect().cursor().execute(query)
+
+
+def _cursor(fake: FakeCursor, **kwargs: Any) -> HarlequinDatabricksCursor:
+    return HarlequinDatabricksCursor(fake, **kwargs)  # type: ignore[arg-type]
+
+
+def test_fetchall_streams_batches_without_copying(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(adapter, "FETCH_BATCH_ROWS", 100)
+    fake = _fake_cursor(250)
+    rows = _cursor(fake).fetchall()
+
+    assert isinstance(rows, pa.Table)
+    assert rows.equals(_result(250))
+    assert rows["id"].num_chunks == 3
+    assert fake.fetch_sizes == [100, 100, 100, 100]
+
+
+def test_fetchall_respects_row_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(adapter, "FETCH_BATCH_ROWS", 100)
+    fake = _fake_cursor(250)
+    cursor = _cursor(fake).set_limit(150)
+    rows = cursor.fetchall()
+
+    assert isinstance(rows, pa.Table)
+    assert rows.equals(_result(150))
+    assert fake.fetch_sizes == [100, 50]
+    assert cursor.notice is None
+
+
+def test_fetchall_truncates_at_byte_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(adapter, "FETCH_BATCH_ROWS", 100)
+    fake = _fake_cursor(1000)
+    cursor = _cursor(fake, max_result_bytes=250 * 8)  # 250 int64 values
+    rows = cursor.fetchall()
+
+    assert isinstance(rows, pa.Table)
+    assert rows.equals(_result(250))
+    assert fake.fetch_sizes == [100, 100, 100]
+    assert cursor.notice is not None
+    assert cursor.notice.startswith("Results truncated at 0.00190735 MB (250 rows)")
+
+
+def test_byte_budget_is_announced_on_connect() -> None:
+    with patch_connect(FakeMetastore()):
+        assert "truncated at" not in connect_adapter().init_message
+        conn = connect_adapter(max_result_mb="64")
+    assert conn.init_message.endswith(
+        "Query results are truncated at 64 MB (--max-result-mb), "
+        "without being marked as incomplete."
+    )
+
+
+def test_fetchall_empty_result_keeps_schema() -> None:
+    rows = _cursor(_fake_cursor(0)).fetchall()
+    assert isinstance(rows, pa.Table)
+    assert rows.num_rows == 0
+    assert rows.schema == _result(0).schema
+
+
+def test_fetchall_limit_zero_keeps_schema() -> None:
+    # Harlequin fetches with a limit of 0 for the header of a result only:
+    rows = _cursor(_fake_cursor(10)).set_limit(0).fetchall()
+    assert isinstance(rows, pa.Table)
+    assert rows.num_rows == 0
+    assert rows.schema == _result(0).schema
+
+
+def test_fetchall_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = _fake_cursor(1)
+    fake.cancel()
+    assert _cursor(fake).fetchall() is None
+
+    fake = _fake_cursor(1)
+    failed = databricks_sql.DatabaseError("Query failed")  # type: ignore[no-untyped-call]
+
+    def fetchmany_arrow(_: int) -> pa.Table:
+        raise failed
+
+    monkeypatch.setattr(fake, "fetchmany_arrow", fetchmany_arrow)
+    with pytest.raises(HarlequinQueryError):
+        _cursor(fake).fetchall()
+
+
+def test_fetchall_spills_large_results_to_disk(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(adapter, "FETCH_BATCH_ROWS", 100)
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    metrics = MetricsRecorder().start("query")
+    allocated = pa.total_allocated_bytes()
+    rows = _cursor(_fake_cursor(1000), spill_bytes=250 * 8, metrics=metrics).fetchall()
+
+    assert isinstance(rows, pa.Table)
+    assert rows.equals(_result(1000))
+    # the result is memory-mapped from the spill file, rather than allocated in memory:
+    assert pa.total_allocated_bytes() - allocated < 1000 * 8
+    # the file was deleted once mapped:
+    assert list(tmp_path.iterdir()) == []
+    assert metrics.attributes["spilled"] is True
+    assert metrics.counters["spilled_bytes"] == 1000 * 8
+
+
+def test_fetchall_keeps_small_results_in_memory() -> None:
+    buffer = ResultBuffer(spill_bytes=1000 * 8)
+    for batch in _result(1000).to_batches(max_chunksize=100):
+        buffer.append(batch)
+    assert buffer.spill is None
+    assert buffer.to_table().equals(_result(1000))
+
+
+def test_spill_file_is_deleted_if_abandoned(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    buffer = ResultBuffer(spill_bytes=0)
+    buffer.append(_result(10).to_batches()[0])
+    assert buffer.spill is not None
+    assert buffer.spill.path.parent == tmp_path
+    assert buffer.spill.path.exists()
+
+    buffer.close()  # e.g. when the query is cancelled part-way through fetching
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,72 @@
+import pyarrow as pa
+
+from harlequin_databricks.adapter import HarlequinDatabricksAdapter
+from harlequin_databricks.filters import CatalogFilter, glob_to_like
+
+
+def test_glob_to_like() -> None:
+    assert glob_to_like("sales_*") == "sales\\_%"
+    assert glob_to_like("dim?") == "dim_"
+    assert glob_to_like("100%") == "100\\%"
+    assert glob_to_like("[ab]*") is None
+
+
+def test_catalog_filter_matching() -> None:
+    catalog_filter = CatalogFilter(
+        include_catalogs=("sales*", "hive_metastore"),
+        exclude_catalogs=("*_dev",),
+        include_schemas=("dim_*", "hive_metastore.*"),
+        exclude_schemas=("sales.dim_secret",),
+    )
+    assert catalog_filter
+    assert not CatalogFilter()
+
+    assert catalog_filter.catalog_allowed("sales")
+    assert catalog_filter.catalog_allowed("SALES_EU")
+    assert not catalog_filter.catalog_allowed("sales_dev")
+    assert not catalog_filter.catalog_allowed("marketing")
+
+    assert catalog_filter.schema_allowed("sales", "dim_customer")
+    assert not catalog_filter.schema_allowed("sales", "fact_orders")
+    assert not catalog_filter.schema_allowed("sales", "dim_secret")
+    assert catalog_filter.schema_allowed("sales_eu", "dim_secret")
+    assert catalog_filter.schema_allowed("hive_metastore", "default")
+    assert not catalog_filter.schema_allowed("marketing", "dim_customer")
+
+
+def test_catalog_filter_sql_where() -> None:
+    assert CatalogFilter().sql_where() == ""
+    assert CatalogFilter(include_catalogs=("sales*", "it's")).sql_where() == (
+        "WHERE (table_catalog ILIKE 'sales%' OR table_catalog ILIKE 'it\\'s')"
+    )
+    assert CatalogFilter(
+        exclude_catalogs=("*_dev", "[ab]*"), include_schemas=("[ab]*",)
+    ).sql_where() == ("WHERE NOT (table_catalog ILIKE '%\\\\_dev')")
+
+
+def test_catalog_filter_filter_table() -> None:
+    table = pa.table(
+        {
+            "table_catalog": ["sales", "sales", "sales_dev", "marketing"],
+            "table_schema": ["a", "b", "a", "a"],
+            "table_name": ["t1", "t2", "t3", "t4"],
+        }
+    )
+    assert CatalogFilter().filter_table(table) is table
+    filtered = CatalogFilter(
+        include_catalogs=("sales*",),
+        exclude_catalogs=("*_dev",),
+        exclude_schemas=("[b]",),
+    ).filter_table(table)
+    assert filtered["table_name"].to_pylist() == ["t1"]
+
+
+def test_adapter_parses_pattern_options() -> None:
+    adapter = HarlequinDatabricksAdapter(
+        include_catalogs="sales*, hive_metastore",
+        exclude_schemas=["*_tmp"],
+    )
+    assert adapter.options["catalog_filter"] == CatalogFilter(
+        include_catalogs=("sales*", "hive_metastore"),
+        exclude_schemas=("*_tmp",),
+    )
@@ -0,0 +1,40 @@
+import json
+import subprocess
+import sys
+
+# Modules too heavy to import while Harlequin is only discovering its installed adapters:
+HEAVY_MODULES = ["databricks.sql", "pandas", "pyarrow", "pyarrow.compute", "thrift"]
+
+# Budget for importing the adapter, on top of Harlequin itself, in microseconds:
+IMPORT_TIME_BUDGET_US = 150_000
+
+
+def _run(code: str, *args: str) -> subprocess.CompletedProcess[str]:
+    return subprocess.run(  # noqa: S603
+        [sys.executable, *args, "-c", code], capture_output=True, check=True, text=True
+    )
+
+
+def test_adapter_discovery_defers_heavy_imports() -> None:
+    code = (
+        "import json, sys; from harlequin_databricks import HarlequinDatabricksAdapter;"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    assert json.loads(_run(code).stdout) == []
+
+
+def _import_time_us() -> int:
+    stderr = _run(
+        "import harlequin; import harlequin_databricks", "-X", "importtime"
+    ).stderr
+    for line in stderr.splitlines():
+        _, cumulative_us, module = (part.strip() for part in line.split("|"))
+        if module == "harlequin_databricks":
+            return int(cumulative_us)
+    msg = "harlequin_databricks missing from -X importtime output"
+    raise AssertionError(msg)
+
+
+def test_adapter_import_time_budget() -> None:
+    # best of a few runs, as the first may also compile bytecode
+    assert min(_import_time_us() for _ in range(3)) < IMPORT_TIME_BUDGET_US
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from harlequin_databricks.init_script import plan_init_script
+from harlequin_databricks.sql import split_statements
+from tests.fake_databricks import FakeMetastore, connect_adapter, patch_connect
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+INIT_SCRIPT = """
+-- session settings; folded into the connection
+SET ansi_mode = true;
+set TIMEZONE='America/Los_Angeles'; /* ; */
+USE CATALOG `my;catalog`;
+USE SCHEMA sales;
+CREATE TEMP VIEW v AS SELECT ';' AS semicolon;
+SET statement_timeout = 60;
+"""
+
+
+def test_split_statements() -> None:
+    assert split_statements("SELECT 1; -- a; comment\n SELECT ';' /* ; */ ;;") == [
+        "SELECT 1",
+        "-- a; comment\n SELECT ';' /* ; */",
+    ]
+    assert split_statements("  -- only a comment ;\n") == []
+    assert split_statements("SELECT `a;b` FROM t") == ["SELECT `a;b` FROM t"]
+
+
+def test_plan_init_script() -> None:
+    plan = plan_init_script(INIT_SCRIPT)
+    assert plan.session_configuration == {
+        "ansi_mode": "true",
+        "TIMEZONE": "America/Los_Angeles",
+    }
+    assert plan.catalog == "my;catalog"
+    assert plan.schema == "sales"
+    # statements after the first statement that cannot be folded run in order:
+    assert plan.statements == [
+        "CREATE TEMP VIEW v AS SELECT ';' AS semicolon",
+        "SET statement_timeout = 60",
+    ]
+    assert plan.command_count == 6
+    assert plan.session_statement_count == 2
+
+
+def test_plan_init_script_namespaces() -> None:
+    plan = plan_init_script("USE SCHEMA a; USE CATALOG b")
+    assert (plan.catalog, plan.schema) == ("b", None)
+    plan = plan_init_script("USE main.`my schema`")
+    assert (plan.catalog, plan.schema) == ("main", "my schema")
+    plan = plan_init_script("SET TIME ZONE 'Asia/Tokyo'; SET TIME ZONE LOCAL")
+    assert plan.session_configuration == {"TIMEZONE": "Asia/Tokyo"}
+    assert plan.statements == ["SET TIME ZONE LOCAL"]
+    # only the session configuration parameters of Databricks SQL are folded:
+    plan = plan_init_script("SET ansi_mdoe = true; USE catalog")
+    assert (plan.session_configuration, plan.catalog, plan.folded_count) == (
+        {},
+        None,
+        0,
+    )
+    assert plan.statements == ["SET ansi_mdoe = true", "USE catalog"]
+    plan = plan_init_script("SET use_cached_result = false; SET spark.sql.x = 1")
+    assert plan.session_configuration == {"use_cached_result": "false"}
+    assert plan.statements == ["SET spark.sql.x = 1"]
+    plan = plan_init_script("SET VAR x = 1; USE catalog")
+    assert (plan.catalog, plan.schema, plan.folded_count) == (None, None, 0)
+    assert plan.statements == ["SET VAR x = 1", "USE catalog"]
+
+
+def test_plan_init_script_session_statements() -> None:
+    plan = plan_init_script(
+        "CREATE OR REPLACE TEMP VIEW v AS SELECT 1; DECLARE x = 1; "
+        "CREATE TABLE t (id INT); SET y = 2"
+    )
+    assert plan.session_statement_count == 2
+
+
+def test_connect_folds_session_settings(tmp_path: Path) -> None:
+    init_path = tmp_path / ".databricksrc"
+    init_path.write_text(INIT_SCRIPT)
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        connection = connect_adapter(no_init=False, init_path=init_path)
+
+    options = metastore.connections[0].options
+    assert options["session_configuration"] == {
+        "ansi_mode": "true",
+        "TIMEZONE": "America/Los_Angeles",
+    }
+    assert options["catalog"] == "my;catalog"
+    assert options["schema"] == "sales"
+    assert metastore.queries == [
+        "CREATE TEMP VIEW v AS SELECT ';' AS semicolon",
+        "SET statement_timeout = 60",
+    ]
+    assert connection.init_message.endswith(f"Executed 6 commands from {init_path}")
+
+
+def test_warm_standby_defers_statements_with_effects(tmp_path: Path) -> None:
+    init_path = tmp_path / ".databricksrc"
+    init_path.write_text(
+        "USE SCHEMA sales; CREATE TEMP VIEW v AS SELECT 1; CREATE TABLE IF NOT EXISTS t (id INT)"
+    )
+    view, table = (
+        "CREATE TEMP VIEW v AS SELECT 1",
+        "CREATE TABLE IF NOT EXISTS t (id INT)",
+    )
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        connection = connect_adapter(
+            no_init=False, init_path=init_path, warm_standby=True
+        )
+        standby = connection._standby  # noqa: SLF001
+        assert standby is not None
+        standby.result(timeout=5)
+        # the spare only runs the statements which change the state of its session:
+        assert metastore.queries == [view, table, view]
+
+        # e.g. when the active session expires:
+        connection._connect_and_run_init_script()  # noqa: SLF001
+        assert connection.conn is metastore.connections[1]  # type: ignore[comparison-overlap]
+        assert metastore.queries[3] == table
+        assert connection.init_message.endswith(f"Executed 3 commands from {init_path}")
+        connection.close()
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import pytest
+from harlequin.exception import HarlequinQueryError
+from harlequin.query import RowLimit, execute, fetch
+from harlequin.statements import Statement
+
+from harlequin_databricks.adapter import HarlequinDatabricksDeferredCursor
+from harlequin_databricks.sql import supports_limit_pushdown
+from tests.fake_databricks import (
+    FakeMetastore,
+    NetworkProfile,
+    connect_adapter,
+    patch_connect,
+)
+
+QUERY = "SELECT * FROM range(1000)"
+
+
+@pytest.mark.parametrize(
+    ("query", "pushdown"),
+    [
+        ("SELECT * FROM t", True),
+        ("-- comment\n  with x AS (select 1) select * from x", True),
+        ("VALUES (1), (2)", False),
+        ("with x as (select 1) insert into t select * from x", False),
+        ("CREATE TABLE t AS SELECT 1", False),
+        ("select 1; select 2", False),
+    ],
+)
+def test_supports_limit_pushdown(query: str, pushdown: bool) -> None:
+    assert supports_limit_pushdown(query) == pushdown
+
+
+def test_row_limit_is_pushed_down() -> None:
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        conn = connect_adapter(limit_pushdown=True)
+        cursor = conn.execute(QUERY)
+        assert isinstance(cursor, HarlequinDatabricksDeferredCursor)
+        # the query only runs once its limit is known:
+        assert metastore.rpc_counts["execute"] == 0
+        cursor.set_limit(10)
+        assert metastore.rpc_counts["execute"] == 1
+        rows = cursor.fetchall()
+        assert [name for name, _ in cursor.columns()] == ["id"]
+
+    assert rows.num_rows == 10  # type: ignore[union-attr]
+    assert metastore.rpc_counts["execute"] == 1
+    assert metastore.result_rows == [10]
+
+
+@pytest.mark.parametrize(
+    ("limit_pushdown", "limit"), [(False, 10), (True, 0), (True, None)]
+)
+def test_row_limit_without_pushdown(limit_pushdown: bool, limit: int | None) -> None:
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        conn = connect_adapter(limit_pushdown=limit_pushdown)
+        cursor = conn.execute(QUERY)
+        assert cursor is not None
+        if limit is not None:
+            cursor = cursor.set_limit(limit)
+        rows = cursor.fetchall()
+        assert [name for name, _ in cursor.columns()] == ["id"]
+
+    assert rows.num_rows == (1000 if limit is None else limit)  # type: ignore[union-attr]
+    # the warehouse computed the whole result:
+    assert metastore.result_rows == [1000]
+
+
+def test_deferred_queries_run_in_statement_order() -> None:
+    script = ["SELECT * FROM range(5)", "DROP TABLE t", "USE CATALOG other"]
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        conn = connect_adapter(limit_pushdown=True)
+        for limit in (RowLimit(max_rows=10), RowLimit()):
+            metastore.queries.clear()
+            # Harlequin runs all statements of a script before it fetches their results:
+            executed = list(
+                execute(
+                    conn,
+                    [Statement(sql=sql, index=i) for i, sql in enumerate(script)],
+                    limit=limit,
+                )
+            )
+            assert metastore.queries == script
+            assert fetch(executed[0], limit=limit).fetched_row_count == 5
+            assert metastore.queries == script
+
+
+def test_other_statements_run_on_execute() -> None:
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        conn = connect_adapter(limit_pushdown=True)
+        conn.execute("CREATE TABLE t AS SELECT 1")
+        conn.execute("VALUES (1)")
+        assert metastore.rpc_counts["execute"] == 2
+
+
+def test_concurrent_statements_disable_limit_pushdown(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        # statements submitted to run concurrently cannot wait for their limit:
+        conn = connect_adapter(limit_pushdown=True, concurrent_statements=2)
+        assert "--limit-pushdown has no effect" in caplog.text
+        cursor = conn.execute(QUERY)
+        assert not isinstance(cursor, HarlequinDatabricksDeferredCursor)
+        assert metastore.rpc_counts["execute_async"] == 1
+
+
+def test_errors_of_deferred_queries_are_raised_on_fetch() -> None:
+    metastore = FakeMetastore(
+        network=NetworkProfile(failure_rate=1, failure_message="Table not found")
+    )
+    with patch_connect(metastore):
+        conn = connect_adapter(limit_pushdown=True)
+        cursor = conn.execute("SELECT * FROM missing")
+        assert cursor is not None
+        # the query runs (and fails) once its limit is set:
+        cursor = cursor.set_limit(10)
+        with pytest.raises(HarlequinQueryError, match="Table not found"):
+            cursor.fetchall()
+
+
+@pytest.mark.parametrize("limit_pushdown", [False, True])
+def test_failed_deferred_query_stops_the_script(limit_pushdown: bool) -> None:
+    script = ["SELECT * FROM missing", "DROP TABLE t"]
+    metastore = FakeMetastore(
+        network=NetworkProfile(failure_rate=1, failure_message="Table not found")
+    )
+    with patch_connect(metastore):
+        conn = connect_adapter(limit_pushdown=limit_pushdown)
+        executed = list(
+            execute(
+                conn,
+                [Statement(sql=sql, index=i) for i, sql in enumerate(script)],
+                limit=RowLimit(max_rows=10),
+            )
+        )
+
+    # no statement after the failed query is sent to the warehouse:
+    assert metastore.queries == script[:1]
+    assert isinstance(executed[-1].error, HarlequinQueryError)
+    assert "Table not found" in executed[-1].error.msg
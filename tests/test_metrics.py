@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from harlequin.exception import HarlequinQueryError
+
+from harlequin_databricks.metrics import MetricsRecorder
+from harlequin_databricks.sql import statement_type
+from tests.fake_databricks import (
+    FakeMetastore,
+    MetastoreShape,
+    NetworkProfile,
+    connect_adapter,
+    patch_connect,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+
+def test_recorder_reports_to_hooks_and_log_file(tmp_path: Path) -> None:
+    log_path = tmp_path / "metrics.jsonl"
+    recorder = MetricsRecorder(log_path)
+    records: list[dict[str, Any]] = []
+    recorder.add_hook(records.append)
+
+    with recorder.operation("query", statement="select") as metrics:
+        with metrics.phase("execute"):
+            pass
+        with metrics.phase("execute"):
+            pass
+        metrics.count("rows", 3)
+    metrics.finish("cancelled")  # finishing again is a no-op
+
+    assert len(records) == 1
+    assert records[0]["operation"] == "query"
+    assert records[0]["statement"] == "select"
+    assert records[0]["status"] == "ok"
+    assert records[0]["phases"]["execute"] >= 0
+    assert records[0]["counters"] == {"rows": 3}
+    assert [json.loads(line) for line in log_path.read_text().splitlines()] == records
+
+
+def test_recorder_records_errors(caplog: pytest.LogCaptureFixture) -> None:
+    recorder = MetricsRecorder()
+
+    def broken_hook(_: dict[str, Any]) -> None:
+        raise RuntimeError
+
+    recorder.add_hook(broken_hook)
+    msg = "boom"
+    with (
+        caplog.at_level(logging.DEBUG, logger="harlequin_databricks.metrics"),
+        pytest.raises(ValueError, match="boom"),
+        recorder.operation("catalog_index"),
+    ):
+        raise ValueError(msg)
+
+    [debug_record, hook_record] = caplog.records
+    assert debug_record.metrics["status"] == "error"  # type: ignore[attr-defined]
+    assert hook_record.message.startswith("Metrics hook")
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("SELECT 1", "select"),
+        ("  -- comment\n/* block */ With x AS (SELECT 1) SELECT * FROM x", "with"),
+        ("(select 1)", "select"),
+        ("", ""),
+    ],
+)
+def test_statement_type(query: str, expected: str) -> None:
+    assert statement_type(query) == expected
+
+
+def test_query_metrics(tmp_path: Path) -> None:
+    metastore = FakeMetastore(network=NetworkProfile(batch_rows=1000))
+    log_path = tmp_path / "metrics.jsonl"
+    with patch_connect(metastore):
+        conn = connect_adapter(metrics_log=str(log_path))
+        cursor = conn.execute("SELECT * FROM range(2500)")
+        assert cursor is not None
+        cursor.fetchall()
+
+    [record] = [json.loads(line) for line in log_path.read_text().splitlines()]
+    assert record["operation"] == "query"
+    assert record["statement"] == "select"
+    assert record["status"] == "ok"
+    assert record["truncated"] is False
+    assert {"execute", "fetch", "arrow"} <= set(record["phases"])
+    assert record["counters"]["rows"] == 2500
+    assert record["counters"]["bytes"] == 2500 * 8
+    assert record["counters"]["batches"] >= 1
+    # one execute call, then fetches until an empty batch:
+    assert record["counters"]["rpcs"] >= 2
+
+
+def test_query_metrics_errors() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(failure_rate=1))
+    with patch_connect(metastore):
+        conn = connect_adapter()
+        records: list[dict[str, Any]] = []
+        conn.metrics.add_hook(records.append)
+        with pytest.raises(HarlequinQueryError):
+            conn.execute("SELECT 1")
+
+    assert [record["status"] for record in records] == ["error"]
+    assert records[0]["counters"]["rpcs"] == 1
+
+
+def test_catalog_index_metrics() -> None:
+    metastore = FakeMetastore(
+        unity=MetastoreShape(2, 2, 3, 4), legacy=MetastoreShape(1, 2, 2, 3, "hive")
+    )
+    with patch_connect(metastore):
+        conn = connect_adapter()
+        records: list[dict[str, Any]] = []
+        conn.metrics.add_hook(records.append)
+        conn.get_catalog()
+
+    [record] = records
+    assert record["operation"] == "catalog_index"
+    assert record["status"] == "ok"
+    assert {
+        "tables_query",
+        "columns_query",
+        "build",
+        "legacy_catalogs",
+        "legacy_schemas",
+        "legacy_tables",
+        "legacy_columns",
+    } <= set(record["phases"])
+    assert record["counters"]["tables"] == 12 + 4
+    assert record["counters"]["columns"] == 48 + 12
+    # two information schema queries, then catalogs(), and catalog-wide schemas(), tables() &
+    # columns() calls:
+    assert record["counters"]["rpcs"] == 2 + 1 + 1 + 1 + 1
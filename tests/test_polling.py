@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+import pytest
+from harlequin.exception import HarlequinQueryError
+
+from harlequin_databricks.cursors import CursorRegistry
+from tests.fake_databricks import (
+    FakeMetastore,
+    NetworkProfile,
+    connect_adapter,
+    patch_connect,
+)
+
+if TYPE_CHECKING:
+    from harlequin_databricks.polling import QueryProgress
+
+
+class _Cursor:
+    active_command_id = None
+
+
+def test_wait_cancelled() -> None:
+    registry = CursorRegistry()
+    cursor: Any = _Cursor()
+    with registry.track(cursor):
+        assert not registry.wait_cancelled(cursor, 0.01)
+        timer = threading.Timer(0.01, registry.cancel_all)
+        timer.start()
+        start = time.perf_counter()
+        assert registry.wait_cancelled(cursor, 5)
+        assert time.perf_counter() - start < 1
+
+
+def test_async_execution_reports_progress() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(execution_time=0.2))
+    with patch_connect(metastore):
+        conn = connect_adapter(async_execution=True)
+        progress: list[QueryProgress] = []
+        conn.progress_hooks.append(progress.append)
+        records: list[dict[str, Any]] = []
+        conn.metrics.add_hook(records.append)
+
+        cursor = conn.execute("SELECT * FROM range(5)")
+        assert cursor is not None
+        assert cursor.fetchall()["id"].to_pylist() == list(range(5))  # type: ignore[index]
+
+    assert metastore.rpc_counts["execute_async"] == 1
+    assert metastore.rpc_counts["execute"] == 0
+    states = [p.state for p in progress]
+    assert states[0] == "RUNNING"
+    assert states[-1] == "SUCCEEDED"
+    assert [p.elapsed for p in progress] == sorted(p.elapsed for p in progress)
+    assert len({p.query_id for p in progress}) == 1
+    assert records[0]["query_id"] == progress[0].query_id
+    assert records[0]["counters"]["polls"] == len(progress)
+
+
+def test_async_execution_raises_errors_of_failed_queries() -> None:
+    metastore = FakeMetastore(
+        network=NetworkProfile(failure_rate=1, failure_message="Table not found")
+    )
+    with (
+        patch_connect(metastore),
+        pytest.raises(HarlequinQueryError, match="Table not found"),
+    ):
+        connect_adapter(async_execution=True).execute("SELECT * FROM missing")
+
+
+def test_async_execution_cancels_without_waiting_for_next_poll() -> None:
+    metastore = FakeMetastore(network=NetworkProfile(rtt=0.001))
+    with patch_connect(metastore):
+        conn = connect_adapter(async_execution=True)
+        result: list[Any] = []
+        thread = threading.Thread(
+            target=lambda: result.append(
+                conn.execute("/* execution_time=60 */ SELECT * FROM range(5)")
+            )
+        )
+        thread.start()
+        # wait until the query has been polled a few times, and the polls have backed off:
+        while metastore.rpc_counts["get_query_state"] < 10:
+            time.sleep(0.001)
+        start = time.perf_counter()
+        conn.cancel()
+        thread.join(5)
+
+    assert time.perf_counter() - start < 0.1
+    assert result == [None]
+    # the query's operation was cancelled in place, without replacing the session:
+    assert metastore.rpc_counts["cancel"] == 1
+    assert metastore.rpc_counts["close_session"] == 0
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+from harlequin_databricks.adapter import HarlequinDatabricksConnection
+from harlequin_databricks.catalog import LazyTableCatalogItem
+from harlequin_databricks.filters import CatalogFilter
+from harlequin_databricks.pool import ConnectionPool
+from tests.fake_databricks import (
+    FakeMetastore,
+    MetastoreShape,
+    connect_adapter,
+    patch_connect,
+)
+
+# two catalogs `legacy0` & `legacy1`, each of two schemas of two tables of two columns:
+LEGACY = MetastoreShape(2, 2, 2, 2, "legacy")
+
+
+def _index(size: int) -> Any:
+    metastore = FakeMetastore(legacy=LEGACY)
+    pool = ConnectionPool(metastore.connect(), metastore.connect, size)  # type: ignore[arg-type]
+    try:
+        return HarlequinDatabricksConnection._get_legacy_catalogs(  # noqa: SLF001
+            pool, metastore.legacy_catalogs
+        )
+    finally:
+        pool.close()
+
+
+def test_legacy_indexing_is_deterministic_across_concurrency() -> None:
+    serial = _index(1)
+    assert [catalog.label for catalog in serial] == ["legacy0", "legacy1"]
+    schemas = serial[0].children
+    assert [schema.label for schema in schemas] == ["schema0", "schema1"]
+    assert [table.label for table in schemas[1].children] == ["table0", "table1"]
+    assert [col.qualified_identifier for col in schemas[1].children[1].children] == [
+        "legacy0.schema1.table1.col0",
+        "legacy0.schema1.table1.col1",
+    ]
+
+    for size in (2, 4, 8):
+        assert _index(size) == serial
+
+
+def test_legacy_indexing_applies_catalog_filter() -> None:
+    metastore = FakeMetastore(legacy=LEGACY)
+    pool = ConnectionPool(metastore.connect(), metastore.connect, 1)  # type: ignore[arg-type]
+    catalog_items = HarlequinDatabricksConnection._get_legacy_catalogs(  # noqa: SLF001
+        pool,
+        metastore.legacy_catalogs,
+        catalog_filter=CatalogFilter(exclude_schemas=("legacy0.schema0",)),
+    )
+    pool.close()
+    assert catalog_items is not None
+    assert [schema.label for schema in catalog_items[0].children] == ["schema1"]
+    # `legacy0` is listed schema by schema, so excluded schemas' tables are never crawled, while
+    # `legacy1` is listed whole:
+    assert metastore.rpc_counts["columns"] == 2
+
+
+def test_pool_is_bounded_and_closes_extra_connections() -> None:
+    metastore = FakeMetastore()
+    conn = metastore.connect()
+    pool = ConnectionPool(conn, metastore.connect, 3)  # type: ignore[arg-type]
+    in_flight = 0
+    max_in_flight = 0
+    lock = threading.Lock()
+
+    def call(_: Any, item: int) -> int:
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return item * 2
+
+    assert pool.map(call, range(20)) == [i * 2 for i in range(20)]
+    assert max_in_flight <= 3
+    extra_conns: list[Any] = list(pool._extra_conns)  # noqa: SLF001
+    assert len(extra_conns) <= 2
+
+    pool.close()
+    assert not any(extra.open for extra in extra_conns)
+    assert conn.open
+
+
+def test_pool_without_connection_opens_and_closes_its_own() -> None:
+    metastore = FakeMetastore()
+    pool = ConnectionPool(None, metastore.connect, 2)  # type: ignore[arg-type]
+
+    assert pool.map(lambda _, item: item, range(4)) == list(range(4))
+    assert 1 <= len(metastore.connections) <= 2
+    pool.close()
+    assert not any(conn.open for conn in metastore.connections)
+
+
+def test_pool_returns_none_when_cancelled() -> None:
+    metastore = FakeMetastore()
+    pool = ConnectionPool(metastore.connect(), metastore.connect, 2)  # type: ignore[arg-type]
+
+    def call(_: Any, item: int) -> int:
+        if item == 3:
+            pool.close()  # e.g. the user pressed `Cancel Query`
+            msg = "Connection closed"
+            raise RuntimeError(msg)
+        return item
+
+    assert pool.map(call, range(5)) is None
+
+
+def test_lazy_legacy_indexing_fetches_columns_once() -> None:
+    metastore = FakeMetastore(legacy=LEGACY)
+    with patch_connect(metastore):
+        connection = connect_adapter(lazy_column_loading=True)
+    pool = ConnectionPool(connection.conn, metastore.connect, 2)  # type: ignore[arg-type]
+    catalog_items = connection._get_legacy_catalogs(  # noqa: SLF001
+        pool, metastore.legacy_catalogs, connection
+    )
+    assert catalog_items is not None
+    assert metastore.rpc_counts["columns"] == 0
+
+    table_item = catalog_items[0].children[1].children[1]
+    assert isinstance(table_item, LazyTableCatalogItem)
+    assert table_item.children == []
+    columns = table_item.fetch_children()
+    assert [column.qualified_identifier for column in columns] == [
+        "legacy0.schema1.table1.col0",
+        "legacy0.schema1.table1.col1",
+    ]
+    assert table_item.fetch_children() == columns
+    assert metastore.rpc_counts["columns"] == 1
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import pstats
+import time
+from typing import TYPE_CHECKING
+
+from harlequin_databricks.profiling import PROFILE_DIR_ENV_VAR, Profiler
+from tests.fake_databricks import (
+    FakeMetastore,
+    MetastoreShape,
+    connect_adapter,
+    patch_connect,
+)
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+def _busy_wait(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def test_profiler_writes_pstats_and_collapsed_stacks(tmp_path: Path) -> None:
+    profiler = Profiler(tmp_path / "profiles")
+    with profiler.profile("fetchall"):
+        _busy_wait(0.05)
+
+    [pstats_path] = (tmp_path / "profiles").glob("*-fetchall.pstats")
+    [collapsed_path] = (tmp_path / "profiles").glob("*-fetchall.collapsed")
+    assert pstats_path.stem == collapsed_path.stem
+
+    functions = {func for _, _, func in pstats.Stats(str(pstats_path)).stats}  # type: ignore[attr-defined]
+    assert "_busy_wait" in functions
+
+    lines = collapsed_path.read_text().splitlines()
+    stack, samples = next(line for line in lines if "_busy_wait" in line).rsplit(" ", 1)
+    assert int(samples) > 0
+    # stacks run from the outermost frame to the innermost:
+    *_, caller, callee = stack.split(";")
+    assert caller.startswith("test_profiler_writes_pstats_and_collapsed_stacks (")
+    assert callee.startswith("_busy_wait (test_profiling.py:")
+
+
+def test_profiler_skips_overlapping_operations(tmp_path: Path) -> None:
+    profiler = Profiler(tmp_path)
+    with profiler.profile("get_catalog"), profiler.profile("fetchall"):
+        pass
+
+    assert [path.suffix for path in sorted(tmp_path.iterdir())] == [
+        ".collapsed",
+        ".pstats",
+    ]
+
+
+def test_profiling_is_opt_in(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(PROFILE_DIR_ENV_VAR, raising=False)
+    with patch_connect(FakeMetastore()):
+        conn = connect_adapter()
+    assert conn.profiler is None
+
+
+def test_adapter_profiles_get_catalog_and_fetchall(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv(PROFILE_DIR_ENV_VAR, str(tmp_path))
+    with patch_connect(FakeMetastore(unity=MetastoreShape(1, 2, 3, 4))):
+        conn = connect_adapter()
+        conn.get_catalog()
+        cursor = conn.execute("SELECT * FROM range(10)")
+        assert cursor is not None
+        cursor.fetchall()
+
+    assert sorted(path.name.split("-", 2)[2] for path in tmp_path.iterdir()) == [
+        "fetchall.collapsed",
+        "fetchall.pstats",
+        "get_catalog.collapsed",
+        "get_catalog.pstats",
+    ]
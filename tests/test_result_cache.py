@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import os
+import stat
+import time
+from typing import TYPE_CHECKING, Any
+
+import pyarrow as pa
+import pytest
+from databricks import sql as databricks_sql
+
+from harlequin_databricks.adapter import (
+    HarlequinDatabricksCachedCursor,
+    HarlequinDatabricksConnection,
+    HarlequinDatabricksCursor,
+)
+from harlequin_databricks.result_cache import ResultCache
+from harlequin_databricks.sql import is_cacheable, normalize_sql
+from tests.fake_databricks import FakeMetastore, connect_adapter
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+RESULT = pa.table({"id": [1, 2, 3], "name": ["a", "b", "c"]})
+
+
+def test_normalize_sql() -> None:
+    assert (
+        normalize_sql(
+            "SELECT  *\n  FROM Sales.Orders -- all orders\nWHERE  x = 'A  b' ;"
+        )
+        == "select * from sales.orders where x = 'A  b'"
+    )
+    assert normalize_sql("select /* hi */ `My  Col` from t") == (
+        "select `My  Col` from t"
+    )
+    assert normalize_sql("select 'it\\'s -- not a comment'") == (
+        "select 'it\\'s -- not a comment'"
+    )
+
+
+@pytest.mark.parametrize(
+    ("query", "cacheable"),
+    [
+        ("SELECT * FROM t", True),
+        ("  -- comment\n with x AS (select 1) select * from x;", True),
+        ("select 'now()' as s, `rand` from t", True),
+        ("select now()", False),
+        ("SELECT rand() FROM t", False),
+        ("select current_timestamp", False),
+        ("with x as (select 1) insert into t select * from x", False),
+        ("INSERT INTO t VALUES (1)", False),
+        ("CREATE TABLE t AS SELECT 1", False),
+        ("USE CATALOG main", False),
+        ("select 1; drop table t", False),
+        ("", False),
+    ],
+)
+def test_is_cacheable(query: str, cacheable: bool) -> None:
+    assert is_cacheable(query) == cacheable
+
+
+def test_result_cache_round_trip(tmp_path: Path) -> None:
+    cache = ResultCache(ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    assert cache.load("key") is None
+    cache.save("key", RESULT, [("id", "###"), ("name", "s")], complete=True)
+
+    cached = cache.load("key")
+    assert cached is not None
+    assert cached.table.equals(RESULT)
+    assert cached.columns == [("id", "###"), ("name", "s")]
+    assert cached.complete
+
+
+def test_result_cache_is_private(tmp_path: Path) -> None:
+    cache = ResultCache(ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path / "results")
+    cache.save("key", RESULT, [("id", "###"), ("name", "s")], complete=True)
+
+    (path,) = (tmp_path / "results").glob("*.arrow")
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert stat.S_IMODE((tmp_path / "results").stat().st_mode) == 0o700
+
+
+def test_result_cache_ttl(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = ResultCache(ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    an_hour_ago = time.time() - 3600
+    monkeypatch.setattr(time, "time", lambda: an_hour_ago)
+    cache.save("key", RESULT, [], complete=True)
+    monkeypatch.undo()
+    assert cache.load("key") is None
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = ResultCache(ttl=60, max_bytes=1024 * 1024, cache_dir=tmp_path)
+    for key in ("a", "b"):
+        cache.save(key, RESULT, [], complete=True)
+        an_hour_ago = time.time() - 3600
+        os.utime(tmp_path / f"{key}.arrow", (an_hour_ago, an_hour_ago))
+    assert cache.load("a") is not None  # "a" is now more recently used than "b"
+
+    cache.max_bytes = (tmp_path / "a.arrow").stat().st_size * 5 // 2
+    cache.save("c", RESULT, [], complete=True)
+    assert cache.load("a") is not None
+    assert cache.load("b") is None
+    assert cache.load("c") is not None
+
+
+def _connect(
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+    metastore: FakeMetastore,
+    **options: Any,
+) -> HarlequinDatabricksConnection:
+    monkeypatch.setattr(databricks_sql, "connect", metastore.connect)
+    monkeypatch.setattr(
+        "harlequin_databricks.result_cache.user_cache_dir", lambda **_: str(tmp_path)
+    )
+    return connect_adapter(**options)
+
+
+def test_execute_serves_repeated_queries_from_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    metastore = FakeMetastore(results={"orders": RESULT})
+    connection = _connect(monkeypatch, tmp_path, metastore, result_cache=True)
+
+    cursor = connection.execute("SELECT * FROM orders")
+    assert isinstance(cursor, HarlequinDatabricksCursor)
+    assert cursor.fetchall() == RESULT
+
+    cached = connection.execute("select *\nfrom ORDERS;")
+    assert isinstance(cached, HarlequinDatabricksCachedCursor)
+    assert cached.columns() == [("id", "###"), ("name", "s")]
+    assert cached.fetchall() == RESULT
+    assert metastore.queries == [
+        "SELECT current_catalog(), current_schema()",
+        "SELECT * FROM orders",
+    ]
+
+    # a different current schema is a different query:
+    connection.execute("USE SCHEMA sales")
+    cursor = connection.execute("SELECT * FROM orders")
+    assert isinstance(cursor, HarlequinDatabricksCursor)
+    assert metastore.queries[-2:] == [
+        "SELECT current_catalog(), current_schema()",
+        "SELECT * FROM orders",
+    ]
+
+    # non-deterministic queries are never cached:
+    for _ in range(2):
+        cursor = connection.execute("SELECT now()")
+        assert isinstance(cursor, HarlequinDatabricksCursor)
+        cursor.fetchall()
+    assert metastore.queries.count("SELECT now()") == 2
+
+
+def test_execute_reruns_results_cut_short_by_a_limit(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    metastore = FakeMetastore(results={"orders": RESULT})
+    connection = _connect(monkeypatch, tmp_path, metastore, result_cache=True)
+    cursor = connection.execute("SELECT * FROM orders")
+    assert cursor is not None
+    assert cursor.set_limit(2).fetchall() == RESULT.slice(0, 2)
+
+    cached = connection.execute("SELECT * FROM orders")
+    assert isinstance(cached, HarlequinDatabricksCachedCursor)
+    assert cached.set_limit(1).fetchall() == RESULT.slice(0, 1)
+    assert metastore.queries.count("SELECT * FROM orders") == 1
+    assert cached.set_limit(10).fetchall() == RESULT
+    assert metastore.queries.count("SELECT * FROM orders") == 2
+
+
+def test_result_cache_is_opt_in(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    metastore = FakeMetastore(results={"orders": RESULT})
+    connection = _connect(monkeypatch, tmp_path, metastore)
+    for _ in range(2):
+        cursor = connection.execute("SELECT * FROM orders")
+        assert isinstance(cursor, HarlequinDatabricksCursor)
+        cursor.fetchall()
+    assert metastore.queries == ["SELECT * FROM orders"] * 2
+
+
+def test_writes_clear_the_cache(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    metastore = FakeMetastore(results={"orders": RESULT})
+    connection = _connect(monkeypatch, tmp_path, metastore, result_cache=True)
+    cursor = connection.execute("SELECT * FROM orders")
+    assert cursor is not None
+    cursor.fetchall()
+
+    connection.execute("INSERT INTO orders VALUES (4, 'd')")
+    cursor = connection.execute("SELECT * FROM orders")
+    assert isinstance(cursor, HarlequinDatabricksCursor)
+    cursor.fetchall()
+    assert metastore.queries.count("SELECT * FROM orders") == 2
+
+
+def test_results_fetched_after_a_write_are_not_cached(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    # Harlequin runs every statement of a script before fetching their results:
+    metastore = FakeMetastore(results={"orders": RESULT})
+    connection = _connect(monkeypatch, tmp_path, metastore, result_cache=True)
+    before = connection.execute("SELECT * FROM orders")
+    connection.execute("DELETE FROM orders")
+    assert before is not None
+    before.fetchall()
+
+    cursor = connection.execute("SELECT * FROM orders")
+    assert isinstance(cursor, HarlequinDatabricksCursor)
+    assert metastore.queries.count("SELECT * FROM orders") == 2
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import logging
+import stat
+import threading
+import time
+from typing import TYPE_CHECKING, Any
+
+from databricks.sql.experimental.oauth_persistence import OAuthToken
+
+from harlequin_databricks.token_cache import (
+    CachedToken,
+    CachedTokenSource,
+    TokenCache,
+    TokenCachePersistence,
+)
+from tests.fake_databricks import FakeMetastore, connect_adapter, patch_connect
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    import pytest
+
+
+class _Fetcher:
+    """Mints numbered tokens expiring `lifetime` seconds from now, counting the calls."""
+
+    def __init__(self, lifetime: float = 3600, delay: float = 0) -> None:
+        self.lifetime = lifetime
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self) -> CachedToken:
+        time.sleep(self.delay)
+        self.calls += 1
+        return CachedToken(f"token-{self.calls}", time.time() + self.lifetime)
+
+
+def test_token_cache_round_trip_is_private(tmp_path: Path) -> None:
+    cache = TokenCache(tmp_path / "tokens")
+    assert cache.load("host", "client") is None
+    token = CachedToken("secret-token", 1234.5)
+    cache.save("host", "client", token)
+
+    assert cache.load("host", "client") == token
+    # tokens are keyed by host & client id:
+    assert cache.load("host", "other-client") is None
+    assert cache.load("other-host", "client") is None
+
+    [path] = (tmp_path / "tokens").iterdir()
+    assert "client" not in path.name
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert stat.S_IMODE((tmp_path / "tokens").stat().st_mode) == 0o700
+
+
+def test_token_cache_ignores_unreadable_files(tmp_path: Path) -> None:
+    cache = TokenCache(tmp_path)
+    cache.save("host", "client", CachedToken("token"))
+    [path] = tmp_path.iterdir()
+    path.write_text("not json")
+    assert cache.load("host", "client") is None
+
+
+def test_token_source_reuses_cached_tokens(tmp_path: Path) -> None:
+    cache = TokenCache(tmp_path)
+    fetch = _Fetcher()
+    source = CachedTokenSource(cache, "host", "client", fetch)
+    assert source.headers() == {"Authorization": "Bearer token-1"}
+    assert source.headers() == {"Authorization": "Bearer token-1"}
+    assert fetch.calls == 1
+
+    # e.g. the next time Harlequin starts:
+    next_fetch = _Fetcher()
+    next_source = CachedTokenSource(cache, "host", "client", next_fetch)
+    assert next_source.token().access_token == "token-1"  # noqa: S105
+    assert next_fetch.calls == 0
+
+
+def test_token_source_fetches_expired_tokens(tmp_path: Path) -> None:
+    cache = TokenCache(tmp_path)
+    cache.save("host", "client", CachedToken("stale", time.time() - 1))
+    fetch = _Fetcher()
+    source = CachedTokenSource(cache, "host", "client", fetch)
+
+    assert source.token().access_token == "token-1"  # noqa: S105
+    assert cache.load("host", "client") == source.token()
+
+
+def test_token_source_refreshes_in_background(tmp_path: Path) -> None:
+    cache = TokenCache(tmp_path)
+    cache.save("host", "client", CachedToken("expiring", time.time() + 60))
+    fetch = _Fetcher(delay=0.1)
+    source = CachedTokenSource(cache, "host", "client", fetch, refresh_margin=300)
+
+    start = time.perf_counter()
+    # the expiring token is still valid, so it is served without waiting on the refresh:
+    assert source.token().access_token == "expiring"  # noqa: S105
+    assert source.token().access_token == "expiring"  # noqa: S105
+    assert time.perf_counter() - start < 0.05
+
+    assert source._refresh is not None  # noqa: SLF001
+    source._refresh.join(5)  # noqa: SLF001
+    assert fetch.calls == 1
+    assert source.token().access_token == "token-1"  # noqa: S105
+    assert cache.load("host", "client") == source.token()
+
+
+def test_token_source_survives_failed_background_refresh(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    def fetch() -> CachedToken:
+        msg = "token endpoint unavailable"
+        raise RuntimeError(msg)
+
+    cache = TokenCache(tmp_path)
+    cache.save("host", "client", CachedToken("expiring", time.time() + 60))
+    source = CachedTokenSource(cache, "host", "client", fetch)
+    with caplog.at_level(logging.WARNING):
+        assert source.token().access_token == "expiring"  # noqa: S105
+        assert isinstance(source._refresh, threading.Thread)  # noqa: SLF001
+        source._refresh.join(5)  # noqa: SLF001
+
+    assert source.token().access_token == "expiring"  # noqa: S105
+    assert "Could not refresh the OAuth token" in caplog.text
+
+
+def test_token_cache_persistence(tmp_path: Path) -> None:
+    persistence = TokenCachePersistence(TokenCache(tmp_path), "databricks-oauth")
+    assert persistence.read("https://host/") is None
+
+    persistence.persist("https://host/", OAuthToken("access", "refresh"))  # type: ignore[no-untyped-call]
+    token = persistence.read("https://host/")
+    assert token is not None
+    assert (token.access_token, token.refresh_token) == ("access", "refresh")
+    assert (
+        TokenCachePersistence(TokenCache(tmp_path), "azure-oauth").read("https://host/")
+        is None
+    )
+
+
+def _connect_options(**options: Any) -> dict[str, Any]:
+    metastore = FakeMetastore()
+    with patch_connect(metastore):
+        connect_adapter(access_token=None, **options)
+    return metastore.connections[0].options
+
+
+def test_u2m_tokens_are_cached() -> None:
+    options = _connect_options(auth_type="databricks-oauth")
+    assert isinstance(options["experimental_oauth_persistence"], TokenCachePersistence)
+
+    options = _connect_options(auth_type="databricks-oauth", no_token_cache=True)
+    assert "experimental_oauth_persistence" not in options